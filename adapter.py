@@ -6,15 +6,25 @@ try:
 except ImportError:
     import queue
 import subprocess, os
+import codecs
+import re
+import collections
+import json
+try:
+    import selectors
+except ImportError:
+    selectors = None
 import webbrowser
 import datetime
 import shlex
+import shutil
 import sys
 import logging
 log = logging.getLogger(__name__)
 
 # other libraries
 import which_os_am_i_on as is_os
+import progress
 import settings_manager
 settings = settings_manager.settings
 
@@ -24,6 +34,161 @@ TEST = False
 class KEY:
     CMD = 'cmd'
     ENCODING = 'encoding'
+    IO_MULTIPLEXER = 'io-multiplexer'
+
+
+class LineReader(object):
+
+    '''Splits the output of a pipe into lines.
+
+    Data is read in chunks of CHUNK_SIZE bytes and decoded with an incremental
+    decoder so that multibyte characters which are split across two chunks stay intact.
+    A line is terminated by '\n' or by '\r' (youtube-dl ends progress updates with '\r').
+    The separator is kept at the end of the line, the last line may lack it.
+    The beginning of an incomplete line is kept as a list of pieces and only new data
+    is searched for separators so that a long line does not take quadratic time.'''
+
+    CHUNK_SIZE = 64*1024
+
+    _RE_LINE = re.compile(r'[^\r\n]*[\r\n]')
+
+    def __init__(self, fd, encoding='utf-8'):
+        self.fd = fd
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self._pending = list()
+
+    def feed(self, data):
+        '''decode data and return a list of all lines which are complete now'''
+        text = self._decoder.decode(data)
+        i = max(text.rfind('\n'), text.rfind('\r')) + 1
+        if i == 0:
+            if text:
+                self._pending.append(text)
+            return []
+        lines = self._RE_LINE.findall(text, 0, i)
+        if self._pending:
+            self._pending.append(lines[0])
+            lines[0] = ''.join(self._pending)
+            self._pending = list()
+        if i < len(text):
+            self._pending.append(text[i:])
+        return lines
+
+    def flush(self):
+        '''return whatever is left after the end of the stream has been reached'''
+        self._pending.append(self._decoder.decode(b'', True))
+        text = ''.join(self._pending)
+        self._pending = list()
+        return text
+
+    def read_chunk(self):
+        '''block until data is available and return the lines completed by it.
+           returns None if the end of the stream has been reached.'''
+        data = os.read(self.fd, self.CHUNK_SIZE)
+        if not data:
+            return None
+        return self.feed(data)
+
+    def __iter__(self):
+        while True:
+            lines = self.read_chunk()
+            if lines is None:
+                break
+            for ln in lines:
+                yield ln
+        ln = self.flush()
+        if ln:
+            yield ln
+
+
+class Multiplexer(object):
+
+    '''Serves the output pipes of all running processes from one thread.
+
+    Instead of starting two reader threads per process every LineReader is
+    registered here and read whenever the selector reports it to be readable.
+    on_lines(lines) is called from the multiplexer thread for every chunk,
+    on_eof() after the last line of a stream has been passed to on_lines.
+    Selectors do not work on pipes on Windows, use is_supported to check.'''
+
+    def __init__(self):
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending = list()
+
+    @staticmethod
+    def is_supported():
+        return selectors is not None and not is_os.windows()
+
+    def register(self, reader, on_lines, on_eof=None):
+        with self._lock:
+            if self._thread is None:
+                self._start()
+            self._pending.append((reader, on_lines, on_eof))
+        os.write(self._wakeup_w, b'x')
+
+    def _start(self):
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        self._thread = threading.Thread(target=self._run, name="adapter-io")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            for key, events in self._selector.select():
+                if key.data is None:
+                    self._register_pending()
+                else:
+                    self._read(key.fileobj, *key.data)
+
+    def _register_pending(self):
+        os.read(self._wakeup_r, 1024)
+        with self._lock:
+            pending = self._pending
+            self._pending = list()
+        for reader, on_lines, on_eof in pending:
+            try:
+                self._selector.register(reader.fd, selectors.EVENT_READ, (reader, on_lines, on_eof))
+            except (ValueError, KeyError, OSError):
+                log.exception("failed to register fd {fd}".format(fd=reader.fd))
+                self._call(on_eof)
+
+    def _read(self, fd, reader, on_lines, on_eof):
+        '''An exception in a callback must not stop the thread because it serves the
+           streams of all processes. The stream which caused it is not read anymore.'''
+        try:
+            lines = reader.read_chunk()
+        except OSError as e:
+            log.error("failed to read from fd {fd}: {e}".format(fd=fd, e=e))
+            lines = None
+        if lines is None:
+            self._selector.unregister(fd)
+            ln = reader.flush()
+            if ln:
+                self._call(on_lines, [ln])
+            self._call(on_eof)
+        elif lines:
+            if not self._call(on_lines, lines):
+                log.error("stopped reading from fd {fd}".format(fd=fd))
+                self._selector.unregister(fd)
+                self._call(on_eof)
+
+    @staticmethod
+    def _call(callback, *args):
+        '''returns False if callback has raised an exception'''
+        if callback is None:
+            return True
+        try:
+            callback(*args)
+        except Exception:
+            log.exception("exception in callback {callback!r}".format(callback=callback))
+            return False
+        return True
+
+multiplexer = Multiplexer()
+
 
 class ProgramFinder(object):
 
@@ -80,6 +245,29 @@ class ProgramFinder(object):
         return list(self.cmd)
     
 
+def format_playlist_items(indices):
+    '''[1, 2, 3, 7, 9, 10] -> "1-3,7,9-10", the syntax of --playlist-items'''
+    ranges = list()
+    for i in sorted(set(indices)):
+        if ranges and ranges[-1][1] == i - 1:
+            ranges[-1][1] = i
+        else:
+            ranges.append([i, i])
+    return ",".join(str(first) if first == last else "{}-{}".format(first, last) for first, last in ranges)
+
+def split_playlist_items(indices, shard_size):
+    '''split playlist indices into sorted lists of at most shard_size indices each'''
+    indices = sorted(set(indices))
+    return [indices[i:i+shard_size] for i in range(0, len(indices), shard_size)]
+
+def iter_playlist_shards(params, indices, shard_size):
+    '''yield (shard, shard_params) for every shard of indices.
+       shard_params is a copy of params which downloads the entries in shard only.'''
+    for shard in split_playlist_items(indices, shard_size):
+        shard_params = dict(params)
+        shard_params[Adapter.PLAYLIST_ITEMS] = format_playlist_items(shard)
+        yield shard, shard_params
+
 def add_flag_if_given(cmd, params, key):
     if params.pop(key, False):
         cmd.append(key)
@@ -103,16 +291,37 @@ if sys.version_info.major<=2:
 else:
     split_options = shlex.split
 
+class Command(collections.namedtuple('Command', ('argv', 'cwd', 'add_info'))):
+
+    '''An immutable description of one youtube-dl process.
+    argv: the arguments passed to Popen, cwd: the working directory of the process
+    (None to inherit it), add_info: whether the command line is written to the output.'''
+
+    __slots__ = ()
+
+    def __new__(cls, argv, cwd=None, add_info=True):
+        return super(Command, cls).__new__(cls, tuple(argv), cwd, add_info)
+
+    def __str__(self):
+        return " ".join(self.argv)
+
+
 class Adapter(object):
 
     MODE = 'mode'
     WORKING_DIRECTORY = 'working-dir'
     METAINFO_ONLY = '--dump-json'
+    LOAD_INFO_JSON = '--load-info-json'
     
     MODE_PLAYLIST = 'mode-playlist'
     MODE_SINGLE_VIDEO = 'mode-single-video'
     PLAYLIST_NO = '--no-playlist'
     PLAYLIST_YES = '--yes-playlist'
+    PLAYLIST_ITEMS = '--playlist-items'
+    DOWNLOAD_ARCHIVE = '--download-archive'
+    FLAG_CONTINUE = '--continue'
+    FLAT_PLAYLIST = '--flat-playlist'
+    METAINFO_SINGLE_JSON = '--dump-single-json'
     SOURCE_URL = 'src-url'
     AUDIO_ONLY = '--extract-audio'
     AUDIO_FORMAT = '--audio-format'
@@ -155,64 +364,141 @@ class Adapter(object):
 
     def __init__(self):
         self.program_finder = ProgramFinder()
-        self.add_info = True
+        self.command = None
         self._proc = None
+        self._output_listener = None
+        self._closed_streams = set()
+        self._progress_lock = threading.Lock()
+        self._progress = None
+        self._is_progress_pending = False
 
     def set_path(self, path):
         self.program_finder.set_path(path)
 
     def check_installed(self):
-        self.set_command_print_version()
         try:
-            subprocess.call(self.cmd)
+            subprocess.call(self.get_command_print_version().argv)
             return self.RET_INSTALLED
         except FileNotFoundError:
             return self.RET_FILE_NOT_FOUND
         except PermissionError:
             return self.RET_PERMISSION_DENIED
 
-    def start(self):
+    def get_executable_signature(self):
+        '''return (path, size, mtime) of the resolved youtube-dl executable or None if it can not be determined.
+           this is cheap compared to check_installed and changes whenever youtube-dl is updated or replaced.'''
+        cmd = self._get_default_cmd()
+        # on windows youtube-dl may be run as a script by python
+        ffn = cmd[-1] if len(cmd) > 1 else cmd[0]
+        if not os.path.dirname(ffn):
+            ffn = shutil.which(ffn)
+            if ffn is None:
+                return None
+        ffn = os.path.realpath(ffn)
+        try:
+            st = os.stat(ffn)
+        except OSError:
+            return None
+        return (ffn, st.st_size, st.st_mtime)
+
+    def start(self, command):
+        '''start a new process for command, a Command object as returned by build_command or get_command_*'''
         self._queue = queue.Queue()
-        cmd = self.cmd #self.process_params(params)
-        if TEST: cmd[0] = os.path.join(os.path.split(__file__)[0], "test.py")
-        if self.add_info:
-            self._queue.put(("cmd: {}\n".format(cmd), self.STDOUT))
+        self._closed_streams = set()
+        self._progress = None
+        self._is_progress_pending = False
+        if TEST: command = command._replace(argv=(os.path.join(os.path.split(__file__)[0], "test.py"),) + command.argv[1:])
+        self.command = command
+        if command.add_info:
+            self._queue.put(("cmd: {}\n".format(list(command.argv)), self.STDOUT))
         else:
-            log.info("cmd: {}".format(cmd))
+            log.info("cmd: {}".format(list(command.argv)))
+        if command.cwd is not None:
+            log.info("cwd: {}".format(command.cwd))
         self._proc = subprocess.Popen(
-            cmd,
+            command.argv,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
+            stderr=subprocess.PIPE,
+            cwd=command.cwd
         )
         
-        def read_stream(queue, flag, stream):
-            for ln in iter(lambda: self._read_line(stream), ''):
-                queue.put((ln, flag))
-        self._thread_stdout = threading.Thread(target=read_stream, args=[self._queue, self.STDOUT, self._proc.stdout])
+        encoding = settings.setdefault(KEY.ENCODING, 'utf-8')
+        if Multiplexer.is_supported() and settings.setdefault(KEY.IO_MULTIPLEXER, True):
+            self._start_multiplexed(encoding)
+        else:
+            self._start_threads(encoding)
+
+    def _start_multiplexed(self, encoding):
+        multiplexer.register(LineReader(self._proc.stdout.fileno(), encoding), self._on_lines(self._queue, self.STDOUT), self._on_eof(self.STDOUT))
+        multiplexer.register(LineReader(self._proc.stderr.fileno(), encoding), self._on_lines(self._queue, self.STDERR), self._on_eof(self.STDERR))
+
+    def _start_threads(self, encoding):
+        def read_stream(on_lines, on_eof, stream):
+            reader = LineReader(stream.fileno(), encoding)
+            for lines in iter(reader.read_chunk, None):
+                on_lines(lines)
+            ln = reader.flush()
+            if ln:
+                on_lines([ln])
+            on_eof()
+        self._thread_stdout = threading.Thread(target=read_stream, args=[self._on_lines(self._queue, self.STDOUT), self._on_eof(self.STDOUT), self._proc.stdout])
         self._thread_stdout.daemon = True
-        self._thread_stderr = threading.Thread(target=read_stream, args=[self._queue, self.STDERR, self._proc.stderr])
+        self._thread_stderr = threading.Thread(target=read_stream, args=[self._on_lines(self._queue, self.STDERR), self._on_eof(self.STDERR), self._proc.stderr])
         self._thread_stderr.daemon = True
         
         self._thread_stderr.start()
         self._thread_stdout.start()
 
-    @staticmethod
-    def _read_line(stream):
-        #TODO: relies on assumption that linesep is one character only
-        #but I can't check whether there is another character to be interpreted
-        #relies on assumption that '\r' is sent after update. is that true?
-        seps = (b"\n", b"\r")
-        line = bytearray()
-        while line[-1:] not in seps:
-            c = stream.read(1)
-            if len(c)==0:
-                break
-            #sys.stdout.write(c)
-            #sys.stdout.flush()
-            line.extend(c)
-
-        line = line.decode(settings.setdefault(KEY.ENCODING, 'utf-8'))
-        return line
+    # the following callbacks are executed in an I/O thread
+    def _on_lines(self, queue, flag):
+        # Progress lines which are overwritten by the next update (ending with '\r')
+        # are not queued. Only the latest one is kept until it is either
+        # taken by pop_progress or followed by another line.
+        def on_lines(lines):
+            last_match = None
+            with self._progress_lock:
+                for ln in lines:
+                    if ln=='\r':
+                        # youtube-dl writes '\r' before a progress update, not after it
+                        continue
+                    m = progress.match(ln)
+                    if m is not None and ln[-1:]=='\r':
+                        last_match = m
+                        continue
+                    if last_match is not None:
+                        self._set_progress(progress.Progress.from_match(last_match))
+                        last_match = None
+                    if self._is_progress_pending:
+                        queue.put((self._progress.line, flag))
+                        self._is_progress_pending = False
+                    if m is not None:
+                        self._set_progress(progress.Progress.from_match(m))
+                        self._is_progress_pending = False
+                    queue.put((ln, flag))
+                if last_match is not None:
+                    self._set_progress(progress.Progress.from_match(last_match))
+            self._notify_output_listener()
+        return on_lines
+
+    def _set_progress(self, record):
+        self._progress = record
+        self._is_progress_pending = True
+
+    def _on_eof(self, flag):
+        closed_streams = self._closed_streams
+        def on_eof():
+            closed_streams.add(flag)
+            self._notify_output_listener()
+        return on_eof
+
+    def _notify_output_listener(self):
+        listener = self._output_listener
+        if listener is not None:
+            listener()
+
+    def set_output_listener(self, listener):
+        '''listener is called without arguments from an I/O thread whenever new output is available or a stream has been closed'''
+        self._output_listener = listener
 
     def kill(self):
         self._proc.kill()
@@ -229,6 +515,10 @@ class Adapter(object):
         else:
             return not self.is_finished()
 
+    def is_eof(self):
+        '''True if the process has closed both stdout and stderr and all of it's output has been queued'''
+        return len(self._closed_streams) == 2
+
     def get_returncode(self):
         return self._proc.returncode
 
@@ -237,57 +527,56 @@ class Adapter(object):
         while not self._queue.empty():
             yield self._queue.get()
 
+    def pop_progress(self):
+        '''return the latest progress.Progress record if it has not been returned or queued yet, None otherwise.
+           call this after iter_out to keep the order of lines.'''
+        with self._progress_lock:
+            if not self._is_progress_pending:
+                return None
+            self._is_progress_pending = False
+            return self._progress
+
+    def get_progress(self):
+        '''return the latest progress.Progress record or None'''
+        return self._progress
+
 
-    def process_params(self, params):
+    def build_command(self, params):
+        '''return a Command for the given parameters.
+           neither params nor this adapter are changed so this is safe to call for several jobs.'''
         log.debug(params)
         cns = self # constants name space
-        ons = self # options name space
+        params = dict(params)
         mode = params.pop(cns.MODE)
-        self._handle_all_params = True
+        metainfo_only = params.get(cns.METAINFO_ONLY, False)
         if   mode==cns.MODE_SINGLE_VIDEO:
-            cmd = self._process_params_single_video(params)
+            argv = self._process_params_single_video(params)
         elif mode==cns.MODE_CUSTOM_COMMAND:
-            cmd = self._process_params_custom_command(params)
+            argv = self._process_params_custom_command(params)
         elif mode==cns.MODE_PLAYLIST:
-            cmd = self._process_params_playlist(params)
+            argv = self._process_params_playlist(params)
         else:
             raise ValueError("Invalid mode: %r" % (mode,))
 
-        wd = params.pop(cns.WORKING_DIRECTORY)
-        if wd != None:
-            os.chdir(wd)
-        
-        #cmd = ['python', '-u', '/home/user/data/creation/source_code_python/youtube-dl-gui/test.py'] 
-        self.cmd = cmd
+        cwd = params.pop(cns.WORKING_DIRECTORY)
 
-        if self._handle_all_params:
+        # when downloading metainfo only the download options are ignored
+        if not metainfo_only:
             if len(params)>0:
                 raise ValueError("unused arguments: " + ", ".join("%r: %r" % (key, params[key]) for key in params))
 
+        return Command(argv, cwd, add_info=not metainfo_only)
+
     def _process_params_single_video(self, params):
         cns = self # constants name space
         cmd = self._get_default_cmd()
         if params.pop(cns.METAINFO_ONLY, False):
             cmd.append(cns.METAINFO_ONLY)
             cmd.append(cns.PLAYLIST_NO)
-            self.add_info = False
-            self._handle_all_params = False
             params[cns.MARK_WATCHED] = False
         else:
-            self.add_info = True
             params.setdefault(cns.MARK_WATCHED, True)
-            # audio:
-            if params.pop(cns.AUDIO_ONLY):
-                cmd.append(cns.AUDIO_ONLY)
-                add_value_if_given(cmd, params, cns.AUDIO_FORMAT)
-                add_flag_if_given(cmd, params, cns.FLAG_KEEP_VIDEO)
-            # video:
-            add_value_if_given(cmd, params, cns.VIDEO_FORMAT)
-            # subtitles:
-            add_flag_if_given(cmd, params, cns.FLAG_WRITE_SUBTITLES)
-            add_flag_if_given(cmd, params, cns.FLAG_WRITE_SUBTITLES_AUTO_CREATED)
-            add_value_if_given(cmd, params, cns.SUBTITLE_FORMAT)
-            add_value_if_given(cmd, params, cns.SUBTITLE_LANGUAGES)
+            self._add_download_options(cmd, params)
             # playlist:
             opts = params.pop(cns.ADDITIONAL_OPTIONS, None)
             if not(opts and "playlist" in opts):
@@ -299,39 +588,99 @@ class Adapter(object):
 
         cmd.append(cns.MARK_WATCHED if params.pop(cns.MARK_WATCHED) else cns._NO_MARK_WATCHED)
         source = params.pop(cns.SOURCE_URL)
-        if len(source)==0:
+        if len(source.strip())==0:
             raise ValueError("no source url given")
-        cmd.append(source)
+        # the metainfo of source has been saved already, youtube-dl does not need to extract it again
+        info_file = params.pop(cns.LOAD_INFO_JSON, None)
+        if info_file is not None:
+            cmd.append(cns.LOAD_INFO_JSON)
+            cmd.append(info_file)
+        else:
+            # several urls separated by white space are allowed
+            cmd.extend(source.split())
         return cmd
 
+    def _add_download_options(self, cmd, params):
+        cns = self # constants name space
+        # audio:
+        if params.pop(cns.AUDIO_ONLY):
+            cmd.append(cns.AUDIO_ONLY)
+            add_value_if_given(cmd, params, cns.AUDIO_FORMAT)
+            add_flag_if_given(cmd, params, cns.FLAG_KEEP_VIDEO)
+        # video:
+        add_value_if_given(cmd, params, cns.VIDEO_FORMAT)
+        # subtitles:
+        add_flag_if_given(cmd, params, cns.FLAG_WRITE_SUBTITLES)
+        add_flag_if_given(cmd, params, cns.FLAG_WRITE_SUBTITLES_AUTO_CREATED)
+        add_value_if_given(cmd, params, cns.SUBTITLE_FORMAT)
+        add_value_if_given(cmd, params, cns.SUBTITLE_LANGUAGES)
+        # archive:
+        add_value_if_given(cmd, params, cns.DOWNLOAD_ARCHIVE)
+        # resume partially downloaded files:
+        add_flag_if_given(cmd, params, cns.FLAG_CONTINUE)
+
+    def get_download_archive(self, params):
+        '''return the absolute path of the --download-archive file youtube-dl will use for params or None'''
+        ffn = params.get(self.DOWNLOAD_ARCHIVE)
+        if ffn is None:
+            opts = split_options(params.get(self.ADDITIONAL_OPTIONS) or "")
+            if self.DOWNLOAD_ARCHIVE in opts[:-1]:
+                ffn = opts[opts.index(self.DOWNLOAD_ARCHIVE) + 1]
+        if not ffn:
+            return None
+        ffn = os.path.expanduser(ffn)
+        wd = params.get(self.WORKING_DIRECTORY)
+        if wd:
+            ffn = os.path.join(wd, ffn)
+        return os.path.abspath(ffn)
+
     def _process_params_custom_command(self, params):
         cns = self # constants name space
-        cmd = "youtube-dl "
+        cmd = self._get_default_cmd()
         if params.pop(cns.METAINFO_ONLY, False):
-            cmd += cns.METAINFO_ONLY + " "
-        cmd += params.pop(cns.ARGS)
+            cmd.append(cns.METAINFO_ONLY)
+        cmd.extend(split_options(params.pop(cns.ARGS)))
         return cmd
 
     def _process_params_playlist(self, params):
-        raise NotImplementedError()
+        cns = self # constants name space
+        cmd = self._get_default_cmd()
+        if params.pop(cns.METAINFO_ONLY, False):
+            # list the entries without extracting the metainfo of every single video
+            cmd.append(cns.FLAT_PLAYLIST)
+            cmd.append(cns.METAINFO_SINGLE_JSON)
+        else:
+            params.setdefault(cns.MARK_WATCHED, True)
+            self._add_download_options(cmd, params)
+            add_value_if_given(cmd, params, cns.PLAYLIST_ITEMS)
+            opts = params.pop(cns.ADDITIONAL_OPTIONS, None)
+            if opts:
+                cmd.extend(split_options(opts))
+            cmd.append(cns.MARK_WATCHED if params.pop(cns.MARK_WATCHED) else cns._NO_MARK_WATCHED)
+        cmd.append(cns.PLAYLIST_YES)
+        source = params.pop(cns.SOURCE_URL)
+        if len(source.strip())==0:
+            raise ValueError("no source url given")
+        cmd.append(source.strip())
+        return cmd
 
     def _get_default_cmd(self):
         return self.program_finder.get_cmd()
 
-    def set_command_print_help(self):
+    def get_command_print_help(self):
         cmd = self._get_default_cmd()
         cmd.append(self.FLAG_HELP)
-        self.cmd = cmd
+        return Command(cmd)
 
-    def set_command_print_version(self):
+    def get_command_print_version(self):
         cmd = self._get_default_cmd()
         cmd.append(self.FLAG_VERSION)
-        self.cmd = cmd
+        return Command(cmd)
 
-    def set_command_update(self):
+    def get_command_update(self):
         cmd = self._get_default_cmd()
         cmd.append(self.FLAG_UPDATE)
-        self.cmd = cmd
+        return Command(cmd)
 
 
     @staticmethod
@@ -350,6 +699,12 @@ class Adapter(object):
     def is_warning(cls, line):
         return 'WARNING' in line
 
+    # the media urls in an info json file are signed and expire after some hours
+    _RE_EXPIRED_URL = re.compile(r'HTTP Error 40[34]|HTTP Error 410|403: Forbidden|[Ee]xpired')
+    @classmethod
+    def is_expired_url_error(cls, line):
+        return cls.is_error(line) and cls._RE_EXPIRED_URL.search(line) is not None
+
     _MSG_DESTINATION = 'Destination:'
     @classmethod
     def is_destination(cls, line, set_destination):
@@ -361,6 +716,56 @@ class Adapter(object):
         else:
             return False
         
+
+
+
+class MetainfoParser(object):
+
+    '''Parses the output of youtube-dl --dump-json line by line.
+
+    youtube-dl prints one json object per line and video so every line is
+    passed on as soon as it is complete. Only the last MAX_ERROR_LINES
+    other lines are kept.'''
+
+    MAX_ERROR_LINES = 20
+
+    def __init__(self, on_record, on_warning=None):
+        '''on_record(raw, info): raw is the json code, info the parsed object.
+           on_warning(line): a warning printed by youtube-dl.'''
+        self.on_record = on_record
+        self.on_warning = on_warning
+        self.count = 0
+        self.errors = collections.deque(maxlen=self.MAX_ERROR_LINES)
+
+    def feed(self, line, flag=None):
+        line = line.strip()
+        if not line:
+            return
+        if line[0] == '{':
+            try:
+                info = json.loads(line)
+            except ValueError as e:
+                log.error("ValueError while trying to parse metainfo json: {e}".format(e=e))
+                self.errors.append(line[:200])
+                return
+            self.count += 1
+            self.on_record(line, info)
+        elif Adapter.is_warning(line) and not Adapter.is_error(line):
+            if self.on_warning is not None:
+                self.on_warning(line)
+            else:
+                log.warning(line)
+        else:
+            self.errors.append(line)
+
+    def feed_all(self, adapter):
+        '''feed all lines which are currently available from adapter'''
+        for ln, flag in adapter.iter_out():
+            self.feed(ln, flag)
+
+    def get_error_message(self):
+        return "\n".join(self.errors)
+
         
 
 if __name__=='__main__':
@@ -374,10 +779,11 @@ if __name__=='__main__':
 
         POLL_INTERVAL_IN_MS = 100
         
-        def __init__(self, adapter):
+        def __init__(self, adapter, command):
             tk.Tk.__init__(self)
             self.title("test")
             self.adapter = adapter
+            self.command = command
             
             self.text = tk.Text(self)
             self.text.pack(expand=True, fill=tk.BOTH)
@@ -392,7 +798,7 @@ if __name__=='__main__':
 
         def click_start(self):
             adapter = self.adapter
-            adapter.start()
+            adapter.start(self.command)
             self._poll_read(adapter)
             self.button_kill.configure(state=tk.NORMAL)
             self.button_start.configure(state=tk.DISABLED)
@@ -461,6 +867,5 @@ if __name__=='__main__':
             self.text.insert(tk.END, msg, (self.TAG_ERROR,))
 
     a = Adapter()
-    a.cmd = ['python', 'test.py']
-    g = GUI(a)
+    g = GUI(a, Command(['python', 'test.py']))
     g.mainloop()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+'''
+downloads a list of urls without a graphical user interface.
+
+usage:
+    python3 batch.py urls.txt
+    python3 batch.py --jobs 4 --audio-only --output-dir ~/Music - < urls.txt
+
+The file contains one url per line, empty lines and lines starting
+with '#' are ignored (the same format as youtube-dl --batch-file).
+The downloads are run by a download_manager.DownloadManager, the same
+way as in the gui, but this module does not import tkinter so that it
+can be used on a machine without a display.
+
+Every event is printed as one json object per line on stdout:
+    {"event": "state",    "job": 1, "url": "...", "state": "running"}    # or "queued" if a job is retried
+    {"event": "progress", "job": 1, "percent": 12.3, "downloaded_bytes": ..., "total_bytes": ..., "speed": ..., "eta": ...}
+    {"event": "output",   "job": 1, "line": "ERROR: ..."}
+    {"event": "done",     "job": 1, "url": "...", "state": "finished", "exit_code": 0, "destination": "..."}
+    {"event": "skipped",  "url": "...", "reason": "already downloaded", "exit_code": 0}
+    {"event": "summary",  "finished": 1, "failed": 0, "cancelled": 0, "skipped": 0, "exit_code": 0}
+
+Videos which are listed in the --download-archive file already are
+reported as "skipped" with exit code 0 without starting youtube-dl.
+The exit code of this program is 0 if all jobs have succeeded, 1 if
+any job has failed and 130 if it has been interrupted.
+'''
+
+# standard libraries
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import logging
+log = logging.getLogger(__name__)
+
+# other libraries
+import adapter
+import settings_manager
+import download_manager
+import download_archive
+import metainfo_cache
+
+
+EXIT_SUCCESS = 0
+EXIT_FAILED = 1
+EXIT_INTERRUPTED = 130
+
+# exit_code of a job which has been cancelled before youtube-dl has been started, it has no return code.
+# a job which has been cancelled while it was running reports the return code of the killed process.
+EXIT_CODE_CANCELLED = -1
+
+
+def read_urls(f):
+    '''yield the urls in the file object f'''
+    for ln in f:
+        ln = ln.strip()
+        if ln and not ln.startswith('#'):
+            yield ln
+
+
+class Batch(object):
+
+    def __init__(self, args, out=sys.stdout):
+        self.args = args
+        self.out = out
+        self.adapter = adapter.Adapter()
+        self.manager = download_manager.DownloadManager(adapter.Adapter.create_new_instance, max_parallel=args.jobs)
+        self.manager.on_output = self.on_output
+        self.manager.on_progress = self.on_progress
+        self.manager.on_state_changed = self.on_state_changed
+        self._wakeup = threading.Event()
+        self.manager.set_output_listener(self._wakeup.set)
+        self._time_progress = dict()
+        self.skipped = 0
+
+    # ---------- output ----------
+
+    def emit(self, event, **kw):
+        kw['event'] = event
+        self.out.write(json.dumps(kw, sort_keys=True))
+        self.out.write("\n")
+        self.out.flush()
+
+    # ---------- jobs ----------
+
+    def get_params(self, url):
+        cns = self.adapter # constants name space
+        args = self.args
+        params = dict()
+        params[cns.MODE] = cns.MODE_PLAYLIST if args.playlist else cns.MODE_SINGLE_VIDEO
+        params[cns.SOURCE_URL] = url
+        params[cns.WORKING_DIRECTORY] = args.output_dir
+        params[cns.AUDIO_ONLY] = args.audio_only
+        if args.audio_only:
+            params[cns.AUDIO_FORMAT] = args.audio_format
+        if args.format:
+            params[cns.VIDEO_FORMAT] = args.format
+        if args.sub_lang:
+            params[cns.FLAG_WRITE_SUBTITLES] = True
+            params[cns.SUBTITLE_LANGUAGES] = args.sub_lang
+        if args.download_archive:
+            params[cns.DOWNLOAD_ARCHIVE] = args.download_archive
+        if args.options:
+            params[cns.ADDITIONAL_OPTIONS] = args.options
+        if args.no_mark_watched:
+            params[cns.MARK_WATCHED] = False
+        return params
+
+    def is_downloaded(self, params):
+        '''True if the video is in the download archive already. only possible for urls whose video id is known without youtube-dl.'''
+        cns = self.adapter # constants name space
+        if params[cns.MODE] != cns.MODE_SINGLE_VIDEO:
+            return False
+        ffn = self.adapter.get_download_archive(params)
+        if ffn is None:
+            return False
+        key = metainfo_cache.get_key_from_url(params[cns.SOURCE_URL])
+        if key is None:
+            return False
+        extractor, video_id = key.split(':', 1)
+        return download_archive.get_archive(ffn).contains(extractor, video_id)
+
+    def add(self, url):
+        params = self.get_params(url)
+        if self.is_downloaded(params):
+            self.skipped += 1
+            self.emit('skipped', url=url, reason="already downloaded", exit_code=EXIT_SUCCESS)
+            return
+        # the url is needed in the listeners which may be called before add returns
+        self.manager.add(params, name=url, data=url)
+
+    # ---------- listeners ----------
+
+    def on_output(self, job, lines):
+        for ln, flag in lines:
+            if flag == self.adapter.STDERR or self.args.verbose:
+                self.emit('output', job=job.id, line=ln.rstrip('\r\n'))
+
+    def on_progress(self, job):
+        now = time.time()
+        record = job.progress
+        if not record.is_finished() and now - self._time_progress.get(job.id, 0) < self.args.progress_interval:
+            return
+        self._time_progress[job.id] = now
+        self.emit('progress', job=job.id,
+            percent = record.percent,
+            downloaded_bytes = record.downloaded_bytes,
+            total_bytes = record.total_bytes,
+            speed = record.speed,
+            eta = record.eta,
+        )
+
+    def on_state_changed(self, job):
+        if not job.is_done():
+            self.emit('state', job=job.id, url=job.data, state=job.state)
+        else:
+            self._time_progress.pop(job.id, None)
+            exit_code = job.returncode
+            if exit_code is None:
+                exit_code = EXIT_CODE_CANCELLED if job.state == download_manager.Job.STATE_CANCELLED else EXIT_FAILED
+            self.emit('done', job=job.id, url=job.data, state=job.state, exit_code=exit_code,
+                destination = job.destination,
+                error = job.error,
+                duration = job.time_finished - job.time_started if job.time_started is not None else None,
+            )
+
+    # ---------- main loop ----------
+
+    def run(self, urls):
+        '''download all urls and return the exit code of this program'''
+        interrupted = False
+        try:
+            for url in urls:
+                self.add(url)
+            self.wait()
+        except KeyboardInterrupt:
+            interrupted = True
+            log.info("interrupted, cancelling all jobs")
+            self.manager.cancel_all()
+            self.wait()
+
+        Job = download_manager.Job
+        finished = self.manager.count(Job.STATE_FINISHED)
+        failed = self.manager.count(Job.STATE_FAILED)
+        cancelled = self.manager.count(Job.STATE_CANCELLED)
+        if interrupted:
+            exit_code = EXIT_INTERRUPTED
+        elif failed or cancelled:
+            exit_code = EXIT_FAILED
+        else:
+            exit_code = EXIT_SUCCESS
+        self.emit('summary', finished=finished, failed=failed, cancelled=cancelled, skipped=self.skipped, exit_code=exit_code)
+        return exit_code
+
+    def wait(self):
+        while self.manager.is_active():
+            # a process which has closed it's output may not have exited yet, it is not going to notify us again
+            timeout = self.args.poll_interval if not self.manager.is_eof() else 0.01
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            self.manager.poll()
+
+
+def create_argument_parser():
+    p = argparse.ArgumentParser(description="download a list of urls with youtube-dl without a graphical user interface. progress is printed as json lines on stdout.")
+    p.add_argument('batch_file', help="file containing one url per line, '-' for stdin")
+    p.add_argument('-j', '--jobs', type=int, default=3, help="number of downloads running at the same time (default: %(default)s)")
+    p.add_argument('-o', '--output-dir', default=os.getcwd(), help="directory to download to (default: current directory)")
+    p.add_argument('-x', '--audio-only', action='store_true', help="extract the audio")
+    p.add_argument('--audio-format', default='best', choices=adapter.Adapter.FORMATS_AUDIO, help="used together with --audio-only (default: %(default)s)")
+    p.add_argument('-f', '--format', help="video format, passed to youtube-dl --format")
+    p.add_argument('--sub-lang', help="download subtitles in these languages, e.g. 'en,de'")
+    p.add_argument('--playlist', action='store_true', help="download the whole playlist if an url refers to a video and a playlist")
+    p.add_argument('--download-archive', help="skip videos listed in this file and record downloaded videos in it")
+    p.add_argument('--options', help="additional options passed to youtube-dl")
+    p.add_argument('--no-mark-watched', action='store_true', help="do not mark the videos watched")
+    p.add_argument('--youtube-dl', help="the youtube-dl command to use (default: as configured in the settings of the gui)")
+    p.add_argument('--progress-interval', type=float, default=1., help="minimum time in seconds between two progress events of the same job (default: %(default)s)")
+    p.add_argument('--poll-interval', type=float, default=0.5, help=argparse.SUPPRESS)
+    p.add_argument('-v', '--verbose', action='store_true', help="print all output of youtube-dl and debug messages")
+    return p
+
+def main(argv=None):
+    args = create_argument_parser().parse_args(argv)
+    # stdout is reserved for the json lines
+    logging.basicConfig(stream=sys.stderr, level=logging.DEBUG if args.verbose else logging.WARNING,
+        format="%(levelname)s %(name)s: %(message)s")
+    if args.jobs < 1:
+        log.error("--jobs must be at least 1")
+        return EXIT_FAILED
+
+    # use the same youtube-dl command as the gui
+    settings_manager.load_settings()
+    if args.youtube_dl:
+        adapter.settings[adapter.KEY.CMD] = adapter.split_options(args.youtube_dl)
+
+    if args.batch_file == '-':
+        urls = list(read_urls(sys.stdin))
+    else:
+        with open(args.batch_file, 'rt') as f:
+            urls = list(read_urls(f))
+
+    return Batch(args).run(urls)
+
+
+if __name__=='__main__':
+    sys.exit(main())
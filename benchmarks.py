@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+'''
+micro benchmarks for performance critical parts of this program.
+
+usage:
+    python3 benchmarks.py            # run all benchmarks
+    python3 benchmarks.py render_log # run selected benchmarks
+'''
+
+# standard libraries
+import sys
+import time
+import subprocess
+
+# other libraries
+import adapter
+import tkinter_extensions as tkx
+
+
+# ===== helpers =====
+
+def measure(func, *args, **kw):
+    t0 = time.perf_counter()
+    result = func(*args, **kw)
+    return time.perf_counter() - t0, result
+
+def report(name, n, seconds, unit="lines"):
+    print("{name:<32} {n:>9} {unit} in {t:7.3f} s  => {rate:>12,.0f} {unit}/s".format(name=name, n=n, t=seconds, rate=n/seconds, unit=unit))
+
+
+# ===== read lines =====
+
+# a fake youtube-dl which prints progress updates as fast as possible
+_PRODUCER = r'''
+import sys
+out = sys.stdout.buffer
+n = int(sys.argv[1])
+for i in range(n):
+    out.write("[download] {:5.1f}% of 312.45MiB at  3.2MiB/s ETA 01:12 äöü\r".format(i*100./n).encode('utf-8'))
+    if i % 1000 == 0:
+        out.write(b"[download] Destination: some video.mp4\n")
+out.flush()
+'''
+
+def _start_producer(n):
+    return subprocess.Popen([sys.executable, '-c', _PRODUCER, str(n)], stdout=subprocess.PIPE)
+
+def _read_line_bytewise(stream):
+    # the implementation which has been used before adapter.LineReader
+    seps = (b"\n", b"\r")
+    line = bytearray()
+    while line[-1:] not in seps:
+        c = stream.read(1)
+        if len(c)==0:
+            break
+        line.extend(c)
+    return line.decode(adapter.settings.setdefault(adapter.KEY.ENCODING, 'utf-8'))
+
+def _consume_bytewise(proc):
+    return sum(1 for ln in iter(lambda: _read_line_bytewise(proc.stdout), ''))
+
+def _consume_chunked(proc):
+    return sum(1 for ln in adapter.LineReader(proc.stdout.fileno()))
+
+def read_lines(n=200000):
+    for name, consume in (("byte-at-a-time reader", _consume_bytewise), ("adapter.LineReader", _consume_chunked)):
+        proc = _start_producer(n)
+        t, lines = measure(consume, proc)
+        proc.wait()
+        report(name, lines, t)
+
+
+# ===== render log =====
+
+def _make_log_lines(n):
+    lines = list()
+    for i in range(n):
+        if i % 50 == 0:
+            lines.append(("WARNING: fragment {} not found, skipping\n".format(i), None))
+        elif i % 20 == 0:
+            lines.append(("[hlsnative] Downloading fragment {}\n".format(i), ('error',)))
+        else:
+            lines.append(("[download] {:5.1f}% of 312.45MiB at  3.2MiB/s ETA 01:12\n".format(i*100./n), None))
+    return lines
+
+def _get_tags(ln):
+    if adapter.Adapter.is_error(ln):
+        return ('error',)
+    elif adapter.Adapter.is_warning(ln):
+        return ('warning',)
+    return None
+
+def _build_runs(lines):
+    return tkx.group_runs((ln, tags if tags is not None else _get_tags(ln)) for ln, tags in lines)
+
+def render_log(n=100000, lines_per_tick=1000, views=1000):
+    import random
+    lines = _make_log_lines(n)
+    t, runs = measure(_build_runs, lines)
+    report("tkx.group_runs", n, t)
+
+    try:
+        root = tkx.tk.Tk()
+    except tkx.tk.TclError as e:
+        print("skipping widget benchmarks: {}".format(e))
+        return
+
+    # the implementation which has been used before tkx.VirtualLog
+    text = tkx.AutoScrolledText(root)
+    text.pack()
+    def per_line():
+        for ln, tags in lines:
+            text.append(ln, tags if tags is not None else _get_tags(ln))
+            text.update()
+    t, _ = measure(per_line)
+    report("AutoScrolledText per line", n, t)
+    text.frame_ver.destroy()
+
+    # like gui.FrameLog: one append_runs per tick, rendered when the event loop is idle
+    log_view = tkx.VirtualLog(root, readonly=True)
+    log_view.pack()
+    root.update()
+    def per_tick():
+        for i in range(0, n, lines_per_tick):
+            log_view.append_runs(_build_runs(lines[i:i+lines_per_tick]))
+            root.update()
+    t, _ = measure(per_tick)
+    report("VirtualLog per tick", n, t)
+
+    # scrolling through the lines added above
+    log_view.auto_scroll(False)
+    tops = [random.randrange(n) for i in range(views)]
+    def scroll():
+        for top in tops:
+            log_view.scroll_to(top)
+            root.update_idletasks()
+    t, _ = measure(scroll)
+    report("VirtualLog.scroll_to", views, t, unit="views")
+    root.destroy()
+
+
+# ===== line store =====
+
+def line_store(n=1000000, rows=40):
+    import random
+    lines = _make_log_lines(n)
+    store = tkx.LineStore()
+    t, _ = measure(store.extend, ((ln, tags if tags is not None else _get_tags(ln)) for ln, tags in lines))
+    report("LineStore.extend", n, t)
+
+    views = 10000
+    tops = [random.randrange(n - rows) for i in range(views)]
+    t, _ = measure(lambda: [store.get_runs(top, top + rows) for top in tops])
+    report("LineStore.get_runs ({} rows)".format(rows), views, t, unit="views")
+
+
+# ===== main =====
+
+BENCHMARKS = (
+    read_lines,
+    render_log,
+    line_store,
+)
+
+if __name__=='__main__':
+    selected = sys.argv[1:]
+    for benchmark in BENCHMARKS:
+        if not selected or benchmark.__name__ in selected:
+            print("===== {} =====".format(benchmark.__name__))
+            benchmark()
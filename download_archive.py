@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+'''
+keeps the content of youtube-dl --download-archive files in memory.
+
+An archive file contains one line per downloaded video consisting of
+the extractor and the video id, e.g. "youtube dQw4w9WgXcQ". youtube-dl
+appends to it whenever a download has finished. A DownloadArchive reads
+the whole file once and afterwards only the lines which have been
+appended since the last refresh so that checking whether a video has
+been downloaded already does not require to start youtube-dl.
+'''
+
+# standard libraries
+import os
+import logging
+log = logging.getLogger(__name__)
+
+
+def get_archive_id(extractor, video_id):
+    '''the line youtube-dl writes to the archive for a video'''
+    return "{} {}".format(extractor.lower(), video_id)
+
+
+class DownloadArchive(object):
+
+    def __init__(self, ffn):
+        self.ffn = ffn
+        self._ids = set()
+        self._offset = 0
+        self.refresh()
+
+    def refresh(self):
+        '''read the lines which have been appended since the last call'''
+        try:
+            f = open(self.ffn, 'rb')
+        except (IOError, OSError):
+            # youtube-dl creates the file when the first download has finished
+            return
+        with f:
+            if os.fstat(f.fileno()).st_size < self._offset:
+                log.info("{ffn!r} has been truncated, reading it again".format(ffn=self.ffn))
+                self._ids.clear()
+                self._offset = 0
+            f.seek(self._offset)
+            data = f.read()
+        # an incomplete last line is read again next time
+        end = data.rfind(b'\n') + 1
+        for ln in data[:end].decode('utf-8', 'replace').splitlines():
+            ln = ln.strip()
+            if ln:
+                self._ids.add(ln)
+        self._offset += end
+
+    def contains(self, extractor, video_id):
+        return get_archive_id(extractor, video_id) in self._ids
+
+    def contains_key(self, key):
+        '''key: "<extractor>:<video id>" as returned by metainfo_cache.get_key_from_url'''
+        extractor, sep, video_id = key.partition(':')
+        if not sep or not extractor or not video_id:
+            raise ValueError("invalid key: {key!r}".format(key=key))
+        return self.contains(extractor, video_id)
+
+    def __len__(self):
+        return len(self._ids)
+
+
+_archives = dict()
+
+def get_archive(ffn):
+    '''return the DownloadArchive for ffn, it is read only the first time'''
+    ffn = os.path.abspath(ffn)
+    archive = _archives.get(ffn)
+    if archive is None:
+        archive = DownloadArchive(ffn)
+        _archives[ffn] = archive
+        log.info("{n} ids in download archive {ffn!r}".format(n=len(archive), ffn=ffn))
+    return archive
+
+
+if __name__=='__main__':
+    import sys
+    import time
+    for ffn in sys.argv[1:]:
+        t0 = time.time()
+        archive = get_archive(ffn)
+        print("{ffn}: {n} ids loaded in {t:.3f} s".format(ffn=ffn, n=len(archive), t=time.time()-t0))
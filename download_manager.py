@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+'''
+runs several youtube-dl processes at the same time.
+
+DownloadManager has no thread of it's own. poll must be called regularly
+(or whenever the output listener is notified) from the thread which owns
+the manager. It reads the output of all running jobs, notices which jobs
+have finished and starts queued jobs as long as less than max_parallel
+jobs are running. Everything which happens is reported through the
+listeners on_output, on_progress and on_state_changed.
+
+If a job_journal.JobJournal is given every job, it's state changes and
+it's destination are recorded in it so that unfinished jobs can be
+resumed after a crash. Set journal to None before cancelling the jobs
+at shutdown to keep them unfinished in the journal.
+'''
+
+# standard libraries
+import time
+import itertools
+import logging
+log = logging.getLogger(__name__)
+
+# other libraries
+import progress
+
+
+class Job(object):
+
+    STATE_QUEUED = 'queued'
+    STATE_RUNNING = 'running'
+    STATE_FINISHED = 'finished'
+    STATE_FAILED = 'failed'
+    STATE_CANCELLED = 'cancelled'
+
+    STATES_DONE = (STATE_FINISHED, STATE_FAILED, STATE_CANCELLED)
+
+    def __init__(self, job_id, params, name, data=None):
+        self.id = job_id
+        self.params = params
+        self.name = name
+        # anything the owner of the manager wants to associate with this job
+        self.data = data
+        self.journal_id = None
+        self.command = None
+        self.state = self.STATE_QUEUED
+        self.adapter = None
+        self.progress = None
+        self.returncode = None
+        self.destination = None
+        self.error = None
+        self.is_info_expired = False
+        self.is_cancel_requested = False
+        self.time_started = None
+        self.time_finished = None
+        self.time_exited = None
+
+    def is_done(self):
+        return self.state in self.STATES_DONE
+
+    def set_destination(self, destination):
+        self.destination = destination
+
+    def __repr__(self):
+        return "<Job {id} {state} {name!r}>".format(id=self.id, state=self.state, name=self.name)
+
+
+class DownloadManager(object):
+
+    # a process which has exited may have passed it's pipes on to a child process (e.g. ffmpeg)
+    # which keeps them open. do not wait longer than this for the end of it's output.
+    TIMEOUT_EOF_AFTER_EXIT = 2.
+
+    def __init__(self, create_adapter, max_parallel=3, journal=None):
+        '''create_adapter: a function without arguments returning a new adapter.Adapter instance
+           journal: a job_journal.JobJournal or None'''
+        self.create_adapter = create_adapter
+        self.max_parallel = max_parallel
+        self.journal = journal
+        self.jobs = list()
+        self._ids = itertools.count(1)
+        self._output_listener = None
+
+        # on_output(job, lines): lines is a list of (line, flag) pairs without progress lines
+        self.on_output = None
+        # on_progress(job): job.progress has changed
+        self.on_progress = None
+        # on_state_changed(job): job.state has changed
+        self.on_state_changed = None
+
+    # ---------- jobs ----------
+
+    def add(self, params, name=None, first=False, data=None, journal_id=None):
+        '''params: the parameters for adapter.Adapter.build_command
+           first: start this job before all other queued jobs
+           data: stored in job.data, it is available in the listeners already
+           journal_id: the id of an unfinished job in the journal which is resumed by this job'''
+        job = Job(next(self._ids), params, name, data)
+        if job.name is None:
+            job.name = "job {}".format(job.id)
+        if self.journal is not None:
+            if journal_id is None:
+                journal_id = self.journal.add(params, job.name, data)
+            else:
+                self.journal.set_params(journal_id, params)
+                self.journal.set_state(journal_id, job.state)
+            job.journal_id = journal_id
+        if first:
+            self.jobs.insert(0, job)
+        else:
+            self.jobs.append(job)
+        log.debug("added {job}".format(job=job))
+        self._start_queued()
+        return job
+
+    def cancel(self, job):
+        if job.state == Job.STATE_QUEUED:
+            self._set_state(job, Job.STATE_CANCELLED)
+        elif job.state == Job.STATE_RUNNING and not job.is_cancel_requested:
+            # the state is changed by poll as soon as the process has exited
+            job.is_cancel_requested = True
+            job.adapter.kill()
+
+    def cancel_all(self):
+        for job in self.jobs:
+            self.cancel(job)
+
+    def clear_done(self):
+        '''forget all jobs which are not queued or running anymore'''
+        self.jobs = [job for job in self.jobs if not job.is_done()]
+
+    def iter_jobs(self, *states):
+        for job in self.jobs:
+            if job.state in states:
+                yield job
+
+    def count(self, *states):
+        return sum(1 for job in self.iter_jobs(*states))
+
+    def is_active(self):
+        return self.count(Job.STATE_QUEUED, Job.STATE_RUNNING) > 0
+
+    # ---------- aggregated state ----------
+
+    def get_total_progress(self):
+        '''a progress.Progress object combining all running jobs'''
+        return progress.aggregate(job.progress for job in self.iter_jobs(Job.STATE_RUNNING) if job.progress is not None)
+
+    def get_total_speed(self):
+        '''the sum of the download speeds of all running jobs in bytes per second'''
+        return self.get_total_progress().speed
+
+    # ---------- subprocesses ----------
+
+    def set_output_listener(self, listener):
+        '''listener is called from an I/O thread when any running job has new output, see adapter.Adapter.set_output_listener'''
+        self._output_listener = listener
+        for job in self.iter_jobs(Job.STATE_RUNNING):
+            job.adapter.set_output_listener(listener)
+
+    def is_eof(self):
+        '''True if poll needs to be called again without notification:
+           a process has closed it's output but has not exited yet or it has exited but it's output has not been closed yet'''
+        return any(job.adapter.is_eof() or job.time_exited is not None for job in self.iter_jobs(Job.STATE_RUNNING))
+
+    def poll(self):
+        for job in list(self.iter_jobs(Job.STATE_RUNNING)):
+            self._read(job)
+            if job.adapter.is_finished():
+                # the last lines may still be on their way through the I/O thread
+                if job.time_exited is None:
+                    job.time_exited = time.time()
+                if not job.adapter.is_eof():
+                    if time.time() - job.time_exited < self.TIMEOUT_EOF_AFTER_EXIT:
+                        continue
+                    log.warning("{job}: the output has not been closed {t} seconds after the process has exited".format(job=job, t=self.TIMEOUT_EOF_AFTER_EXIT))
+                self._read(job)
+                job.adapter.set_output_listener(None)
+                job.returncode = job.adapter.get_returncode()
+                job.time_finished = time.time()
+                if job.is_cancel_requested:
+                    state = Job.STATE_CANCELLED
+                elif job.returncode == 0:
+                    state = Job.STATE_FINISHED
+                elif self._retry_with_full_extraction(job):
+                    continue
+                else:
+                    state = Job.STATE_FAILED
+                self._set_state(job, state)
+        self._start_queued()
+
+    def _retry_with_full_extraction(self, job):
+        '''requeue job without --load-info-json if it has failed because the media urls in the info file have expired'''
+        a = job.adapter
+        if not job.is_info_expired or a.LOAD_INFO_JSON not in job.params:
+            return False
+        log.info("{job}: the saved metainfo has expired, retrying with full extraction".format(job=job))
+        job.params = dict(job.params)
+        del job.params[a.LOAD_INFO_JSON]
+        if self.journal is not None:
+            self.journal.set_params(job.journal_id, job.params)
+        job.is_info_expired = False
+        job.progress = None
+        job.returncode = None
+        job.time_finished = None
+        job.time_exited = None
+        self._emit_output(job, [("the saved metainfo has expired, retrying with full extraction\n", a.STDERR)])
+        self._set_state(job, Job.STATE_QUEUED)
+        return True
+
+    def _start_queued(self):
+        running = self.count(Job.STATE_RUNNING)
+        for job in list(self.iter_jobs(Job.STATE_QUEUED)):
+            if running >= self.max_parallel:
+                break
+            if self._start(job):
+                running += 1
+
+    def _start(self, job):
+        a = self.create_adapter()
+        job.adapter = a
+        try:
+            # every job has it's own command and working directory, nothing is shared between the processes
+            job.command = a.build_command(job.params)
+            a.set_output_listener(self._output_listener)
+            a.start(job.command)
+        except (ValueError, OSError) as e:
+            log.exception(e)
+            job.error = str(e)
+            job.time_finished = time.time()
+            self._emit_output(job, [("{}\n".format(e), a.STDERR)])
+            self._set_state(job, Job.STATE_FAILED)
+            return False
+        job.time_started = time.time()
+        self._set_state(job, Job.STATE_RUNNING)
+        return True
+
+    def _read(self, job):
+        a = job.adapter
+        lines = list()
+        record = None
+        for ln, flag in a.iter_out():
+            if flag == a.STDOUT:
+                # progress is reported via on_progress, only the final line of a download is passed on
+                m = progress.match(ln)
+                if m is not None:
+                    record = progress.Progress.from_match(m)
+                    if not record.is_finished():
+                        continue
+                if a.is_destination(ln, job.set_destination) and self.journal is not None:
+                    self.journal.set_destination(job.journal_id, job.destination)
+            elif a.is_expired_url_error(ln):
+                job.is_info_expired = True
+            lines.append((ln, flag))
+        # all progress updates since the last poll are coalesced into the latest one
+        latest = a.pop_progress()
+        if latest is not None:
+            record = latest
+        if lines:
+            self._emit_output(job, lines)
+        if record is not None:
+            job.progress = record
+            if self.on_progress is not None:
+                self.on_progress(job)
+
+    # ---------- listeners ----------
+
+    def _emit_output(self, job, lines):
+        if self.on_output is not None:
+            self.on_output(job, lines)
+
+    def _set_state(self, job, state):
+        log.debug("{job} -> {state}".format(job=job, state=state))
+        job.state = state
+        if self.journal is not None:
+            self.journal.set_state(job.journal_id, state)
+        if self.on_state_changed is not None:
+            self.on_state_changed(job)
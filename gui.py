@@ -1,31 +1,43 @@
 #!/usr/bin/env python3
 # ===== libraries =====
+# must be imported first in order to measure all other imports
+import startup_profiler
+startup_profiler.enable_if_requested()
+
+# a second launch passes it's urls to the running instance and exits before anything slow is imported
+import sys
+import single_instance
+if __name__=='__main__' and single_instance.hand_over(startup_profiler.remove_arg(sys.argv[1:])):
+    sys.exit(0)
+
 import logging_setup
 log = logging_setup.getLogger(__name__)
 
 # standard
+import lazy_import
 try:
     # Python 2
     import Tkinter as tk
-    import tkFileDialog
-    import tkMessageBox
-    import tkFont
     import ttk
-except:
+    # dialogs are not needed to show the main window
+    tkFileDialog = lazy_import.LazyModule('tkFileDialog')
+    tkMessageBox = lazy_import.LazyModule('tkMessageBox')
+    tkFont = lazy_import.LazyModule('tkFont')
+except ImportError:
     # Python 3
     import tkinter as tk
-    from tkinter import filedialog, messagebox, font
-    tkFileDialog = filedialog
-    tkMessageBox = messagebox
-    tkFont = font
     from tkinter import ttk
+    # dialogs are not needed to show the main window
+    tkFileDialog = lazy_import.LazyModule('tkinter.filedialog')
+    tkMessageBox = lazy_import.LazyModule('tkinter.messagebox')
+    tkFont = lazy_import.LazyModule('tkinter.font')
 import os, sys
-try:
-    from gi.repository import GLib
-except ImportError:
-    import os.path
+import shutil
 import json
 import time
+import tempfile
+import io
+import threading
 
 # other
 import locales
@@ -36,7 +48,14 @@ import tkinter_extensions as tkx
 import tkinter_constants as tkc
 import metainfo
 import settings_manager
+# not needed to show the main window, metainfo_cache and job_journal import sqlite3
+progress = lazy_import.LazyModule('progress')
+download_manager = lazy_import.LazyModule('download_manager')
+metainfo_cache = lazy_import.LazyModule('metainfo_cache')
+download_archive = lazy_import.LazyModule('download_archive')
+job_journal = lazy_import.LazyModule('job_journal')
 settings = settings_manager.settings
+startup_profiler.mark("imports")
 
 # ===== documentation =====
 r"""
@@ -63,7 +82,6 @@ and add libav\usr\bin to PATH variable
 #TODO: tkx.SelectableLabel too small for kana
 
 #TODO? filename (not really necessary, just click open and hit F2)
-#TODO: direct support for playlists
 #TODO: download available subtitle information and set menu accordingly
 #TODO: tooltips for shortcuts
 #TODO: padding based on https://developer.gnome.org/hig/stable/visual-layout.html.en
@@ -93,8 +111,24 @@ class KEY:
     ADDITIONAL_OPTIONS = 'additional-options'
     ADDITIONAL_OPTIONS_ENABLED = 'additional-options-enabled'
     AUTO_REMOVE_LOG_AT_CLOSE = 'auto-remove-log-at-close'
+    AUTO_REMOVE_OUTPUT_HISTORY_AT_CLOSE = 'auto-remove-output-history-at-close'
     POLL_INTERVAL_IN_MS_FOR_METAINFO = 'poll-interval-for-metainfo-in-milli-seconds'
     POLL_INTERVAL_IN_MS_FOR_DOWNLOAD = 'poll-interval-for-download-in-milli-seconds'
+    METAINFO_DEBOUNCE_IN_MS = 'metainfo-debounce-in-milli-seconds'
+    PLAYLIST_METAINFO_PARALLEL = 'playlist-metainfo-parallel'
+    PLAYLIST_SPLIT_INTO_SHARDS = 'playlist-split-into-shards'
+    PLAYLIST_SHARD_SIZE = 'playlist-shard-size'
+    DOWNLOAD_ARCHIVE = 'download-archive'
+    RESUME_UNFINISHED_DOWNLOADS = 'resume-unfinished-downloads-on-startup'
+    EVENT_DRIVEN_UPDATES = 'event-driven-updates'
+    LOG_MAX_LINES = 'log-max-lines'
+    PROGRESS_MAX_FRAMES_PER_SECOND = 'progress-max-frames-per-second'
+    MAX_PARALLEL_DOWNLOADS = 'max-parallel-downloads'
+    METAINFO_CACHE_ENABLED = 'metainfo-cache-enabled'
+    METAINFO_CACHE_TTL_IN_S = 'metainfo-cache-time-to-live-in-seconds'
+    METAINFO_CACHE_MAX_ENTRIES = 'metainfo-cache-max-entries'
+    REUSE_METAINFO_FOR_DOWNLOAD = 'reuse-metainfo-for-download'
+    REUSE_METAINFO_MAX_AGE_IN_S = 'reuse-metainfo-max-age-in-seconds'
 
     # geometry
     WIDTH_SOURCE_URL = 'width-source-url'
@@ -106,6 +140,7 @@ class KEY:
 
     # internal
     CHECK_BACKEND = 'check-backend'
+    BACKEND_SIGNATURE = 'backend-signature'
 
 
 #TODO: move to other file. adapter?
@@ -115,8 +150,10 @@ def get_default_destination_directory(settings):
         if os.path.isdir(path):
             return path
     try:
+        # GLib is slow to import and needed only here
+        from gi.repository import GLib
         path = GLib.get_user_special_dir(GLib.USER_DIRECTORY_DESKTOP)
-    except NameError:
+    except ImportError:
         path = os.path.expanduser("~")
     settings[KEY.DESTINATION_PATH] = path
     return path
@@ -182,22 +219,29 @@ class WindowMain(tk.Tk):
     STATE_UNCHECKED = "unchecked"
     STATE_SUCCESS = "successful"
     STATE_ERROR = "error"
+    STATE_DOWNLOADED = "downloaded"
+
+    POLL_INTERVAL_IN_MS_AFTER_EOF = 10
+    # the server wakes up the event loop when a request arrives (see _watch),
+    # this is only used where tkx.Waker is not supported
+    POLL_INTERVAL_IN_MS_FOR_OTHER_INSTANCES = 5000
 
     class ApplicationMenus(tkx.Menu):
         def __init__(self, root):
             tkx.Menu.__init__(self, root)
+            self.root = root
             root.configure(menu=self)
 
-            m = self.add_named_cascade("backend", label=_("youtube-dl"))
-            m.add_named_command("version", label=_("version"), command=root.open_window_cli_version)
-            m.add_named_command("update", label=_("update"), command=root.perform_update)
-            m.add_named_command("help", label=_("help"), command=root.open_window_cli_help)
+            m = self.add_named_cascade("backend")
+            m.add_named_command("version", command=root.open_window_cli_version)
+            m.add_named_command("update", command=root.perform_update)
+            m.add_named_command("help", command=root.open_window_cli_help)
 
-            m = self.add_named_cascade("frontend", label=_("frontend"))
-            m.add_named_command("save_settings", label=_("save settings"), command=lambda: root.save_settings(force=True))
-            m.add_named_command("edit_settings", label=_("edit settings"), command=root.open_settings)
-            m.add_named_command("edit_shortcuts", label=_("edit shortcuts"), command=lambda: open_directory.open_file(metainfo.get_config_ffn(FN_SHORTCUTS, create=True)))
-            m.add_named_command("reload_settings", label=_("reload settings"), command=root.reload_settings)
+            m = self.add_named_cascade("frontend")
+            m.add_named_command("save_settings", command=lambda: root.save_settings(force=True))
+            m.add_named_command("edit_settings", command=root.open_settings)
+            m.add_named_command("edit_shortcuts", command=lambda: open_directory.open_file(metainfo.get_config_ffn(FN_SHORTCUTS, create=True)))
+            m.add_named_command("reload_settings", command=root.reload_settings)
             def cmd_update_settings(value):
                 old_value = settings[settings_manager.KEY.UPDATE_SETTINGS]
                 settings[settings_manager.KEY.UPDATE_SETTINGS] = value
@@ -214,25 +258,82 @@ class WindowMain(tk.Tk):
                             icon=tkMessageBox.WARNING,
                         )
                     )
-            m.add_named_command("reset_settings", label=_("reset settings..."), command=lambda: WindowResetSettings(root))
-            m.add_named_checkbutton("update_settings", label=_("auto save settings"), command=cmd_update_settings)
+            m.add_named_command("reset_settings", command=lambda: WindowResetSettings(root))
+            m.add_named_checkbutton("update_settings", command=cmd_update_settings)
             
             
-##            m = self.add_named_cascade("language", label=_("language"))
-##            m.add_named_command("en", label=_("English"))
-##            m.add_named_command("de", label=_("Deutsch"))
+##            m = self.add_named_cascade("language")
+##            m.add_named_command("en")
+##            m.add_named_command("de")
 ##            self.menu_language.entry_disable("en")
 ##            self.menu_language.entry_disable("de")
             
-            m = self.add_named_cascade("debug", label=_("debug"), visible=False)
-            m.add_named_command("save_metainfo", label=_("save metainfo"), command=lambda: root.save_metainfo(raw=False), state=tkc.STATE_DISABLED)
-            m.add_named_command("save_raw_metainfo", label=_("save raw metainfo"), command=lambda: root.save_metainfo(raw=True))
+            # hidden unless enabled in the settings, the entries are created when it is opened for the first time
+            self.add_named_cascade("debug", visible=False, populate=self.populate_menu_debug)
+
+            # update_labels is handled by root
+
+        def populate_menu_debug(self, m):
+            root = self.root
+            m.add_named_command("save_metainfo", command=lambda: root.save_metainfo(raw=False))
+            m.add_named_command("save_raw_metainfo", command=lambda: root.save_metainfo(raw=True))
+            m.add_named_command("reload_metainfo", command=lambda: root.update_metainfo(force_refresh=True))
+            m.add_named_command("clear_metainfo_cache", command=lambda: root.metainfo_cache.clear())
+            m.add_separator()
+            m.add_named_checkbutton("enable_log_file", command=logging_setup.logfile.set_enable, value=logging_setup.logfile.is_enabled())
+            m.add_named_checkbutton("auto_remove_log", command=lambda value: settings.__setitem__(KEY.AUTO_REMOVE_LOG_AT_CLOSE,value))
+            m.add_named_command("open_log_settings", command=lambda: open_directory.open_file(metainfo.get_config_ffn(logging_setup.FN_LOGGING_JSON, create=True)))
+            m.add_named_command("open_log", command=lambda: open_directory.open_file(logging_setup.logfile.get_name()))
+            m.add_named_command("save_log_as", command=root.save_log_as)
             m.add_separator()
-            m.add_named_checkbutton("enable_log_file", label=_("write log file"), command=logging_setup.logfile.set_enable, value=logging_setup.logfile.is_enabled())
-            m.add_named_checkbutton("auto_remove_log", label=_("auto remove log"), command=lambda value: settings.__setitem__(KEY.AUTO_REMOVE_LOG_AT_CLOSE,value))
-            m.add_named_command("open_log_settings", label=_("open log file settings"), command=lambda: open_directory.open_file(metainfo.get_config_ffn(logging_setup.FN_LOGGING_JSON, create=True)))
-            m.add_named_command("open_log", label=_("open log file"), command=lambda: open_directory.open_file(logging_setup.logfile.get_name()))
-            m.add_named_command("save_log_as", label=_("save log as ..."), command=root.save_log_as)
+            m.add_named_command("save_displayed_output_as", command=root.save_displayed_output_as)
+            m.add_named_command("open_output", command=root.open_output_history)
+            m.add_named_command("save_output_as", command=root.save_output_history_as)
+            self.update_labels_menu_debug()
+            self.update_menu_debug()
+
+        def update_labels(self):
+            self.relabel("backend", _("youtube-dl"))
+            m = self.menu_backend
+            m.relabel("version", _("version"))
+            m.relabel("update", _("update"))
+            m.relabel("help", _("help"))
+
+            self.relabel("frontend", _("frontend"))
+            m = self.menu_frontend
+            m.relabel("save_settings", _("save settings"))
+            m.relabel("edit_settings", _("edit settings"))
+            m.relabel("edit_shortcuts", _("edit shortcuts"))
+            m.relabel("reload_settings", _("reload settings"))
+            m.relabel("reset_settings", _("reset settings..."))
+            m.relabel("update_settings", _("auto save settings"))
+
+            self.relabel("debug", _("debug"))
+            if self.menu_debug.is_populated():
+                self.update_labels_menu_debug()
+
+        def update_labels_menu_debug(self):
+            m = self.menu_debug
+            m.relabel("save_metainfo", _("save metainfo"))
+            m.relabel("save_raw_metainfo", _("save raw metainfo"))
+            m.relabel("reload_metainfo", _("reload metainfo"))
+            m.relabel("clear_metainfo_cache", _("clear metainfo cache"))
+            m.relabel("enable_log_file", _("write log file"))
+            m.relabel("auto_remove_log", _("auto remove log"))
+            m.relabel("open_log_settings", _("open log file settings"))
+            m.relabel("open_log", _("open log file"))
+            m.relabel("save_log_as", _("save log as ..."))
+            m.relabel("save_displayed_output_as", _("save displayed output as ..."))
+            m.relabel("open_output", _("open complete output"))
+            m.relabel("save_output_as", _("save complete output as ..."))
+
+        def update_menu_debug(self):
+            '''update the state of the entries of the debug menu if it has been created already'''
+            m = self.menu_debug
+            if not m.is_populated():
+                return
+            m.set_entry_enabled('save_metainfo', getattr(self.root, 'meta_info', None) is not None)
+            m.set_named_checkbutton('auto_remove_log', settings.setdefault(KEY.AUTO_REMOVE_LOG_AT_CLOSE, True))
         
 
     class FrameMain(tk.Frame):
@@ -271,9 +372,10 @@ class WindowMain(tk.Tk):
             
             self.entry_source = tkx.Entry(frame)
             self.entry_source.bind("<Return>", self.update_metainfo)
+            self.entry_source.bind("<Shift-Return>", lambda event: self.root.update_metainfo(force_refresh=True))
             self.entry_source.var = tk.StringVar()
             self.entry_source.config(textvariable=self.entry_source.var)
-            self.entry_source.var.trace('w', lambda a,b,c: self.root.invalidate_meta_info())
+            self.entry_source.var.trace('w', lambda a,b,c: self.root.on_source_url_changed())
             self.entry_source.grid(row=row, column=col, sticky=tk.W+tk.E)
             tk.Grid.columnconfigure(frame, col, weight=1)
             col += 1
@@ -284,6 +386,10 @@ class WindowMain(tk.Tk):
             tkx.add_tooltip(self.button_source_clear_and_paste)
             col += 1
 
+            self.checkbox_playlist = tkx.Checkbutton(frame, command=self.root.on_source_url_changed)
+            self.checkbox_playlist.grid(row=row, column=col, sticky=tk.W)
+            col += 1
+
             # input working directory
             row += 1
             col = 0
@@ -376,9 +482,34 @@ class WindowMain(tk.Tk):
 
 
             # ----- tab: custom command -----
+            # the content is created when this tab is selected for the first time
             tab = ttk.Frame(self.tabs)
             self.tabs.add(tab)
             self.tab_custom_command = tab
+            self.is_tab_custom_command_created = False
+            self.tabs.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+
+
+            # ----- buttons -----
+            frame = tkx.ButtonsFrame(root,
+                ok = dict(command=self.root.download, imagepath=Icon.DOWNLOAD, compound=tk.LEFT),
+                cancel = dict(command=self.root.close),
+            )
+            frame.pack(fill=tk.X)
+            self.button_download = frame.button_ok
+            self.button_close    = frame.button_cancel
+
+            # update_labels is handled by root
+            # update_settings is handled by root
+
+
+        def on_tab_changed(self, event=None):
+            if not self.is_tab_custom_command_created and self.tabs.nametowidget(self.tabs.select()) == self.tab_custom_command:
+                self.create_tab_custom_command()
+
+        def create_tab_custom_command(self):
+            log.debug("creating tab custom command")
+            tab = self.tab_custom_command
 
             # working directory
             frame = tk.Frame(tab)
@@ -419,19 +550,10 @@ class WindowMain(tk.Tk):
             self.button_man_pages.pack(side=tk.LEFT)
             self.button_copy.pack(side=tk.LEFT)
             self.button_paste.pack(side=tk.LEFT)
-            
-
-            # ----- buttons -----
-            frame = tkx.ButtonsFrame(root,
-                ok = dict(command=self.root.download, imagepath=Icon.DOWNLOAD, compound=tk.LEFT),
-                cancel = dict(command=self.root.close),
-            )
-            frame.pack(fill=tk.X)
-            self.button_download = frame.button_ok
-            self.button_close    = frame.button_cancel
 
-            # update_labels is handled by root
-            # update_settings is handled by root
+            self.is_tab_custom_command_created = True
+            self.update_labels_tab_custom_command()
+            self.update_settings_tab_custom_command()
 
 
         def update_settings(self):
@@ -445,7 +567,7 @@ class WindowMain(tk.Tk):
 
             menus = self.root.menus
             menus.menu_frontend.set_named_checkbutton('update_settings', value=settings.setdefault(settings_manager.KEY.UPDATE_SETTINGS, False))
-            menus.menu_debug.set_named_checkbutton('auto_remove_log', value=settings.setdefault(KEY.AUTO_REMOVE_LOG_AT_CLOSE, True))
+            menus.update_menu_debug()
 
             # ----- tab: single video -----
             self.entry_source.configure(width=WIDTH_SOURCE)
@@ -475,8 +597,14 @@ class WindowMain(tk.Tk):
             self.entry_cl_options.set_value(settings.setdefault(KEY.ADDITIONAL_OPTIONS, ""))
 
             # ----- tab: custom command -----
-            self.entry_working_dir.configure(width=WIDTH_WORKING_DIR)
-            self.text_command_arguments.configure(width=WIDTH_CMD_ARGS, height=HEIGHT_CMD_ARGS)
+            self._size_tab_custom_command = (WIDTH_WORKING_DIR, WIDTH_CMD_ARGS, HEIGHT_CMD_ARGS)
+            if self.is_tab_custom_command_created:
+                self.update_settings_tab_custom_command()
+
+        def update_settings_tab_custom_command(self):
+            width_working_dir, width_cmd_args, height_cmd_args = self._size_tab_custom_command
+            self.entry_working_dir.configure(width=width_working_dir)
+            self.text_command_arguments.configure(width=width_cmd_args, height=height_cmd_args)
 
 
         @staticmethod
@@ -511,17 +639,14 @@ class WindowMain(tk.Tk):
             self.radiobox_subtitles_on[tkc.TEXT] = _("subtitles") + ":"
             self.radiobox_subtitles_auto_created[tkc.TEXT] = _("auto created subtitles") + ":"
             self.button_source_clear_and_paste.tooltip[tkc.TEXT] = _("clear & paste")
+            self.checkbox_playlist[tkc.TEXT] = _("playlist")
             self.button_dest_dir_search.tooltip[tkc.TEXT] = _("browse for output directory")
             self.frame_cl_options.configure(label=_("Additional command line options:"), label_expand=_("Specify additional command line options"))
             self.frame_info.update_labels()
 
             # tab: custom command
-            self.label_working_dir[tkc.TEXT] = _("working direcotry")
-            self.button_man_pages[tkc.TEXT] = _("man")
-            self.button_man_pages.tooltip[tkc.TEXT] = _("youtube-dl --help")
-            self.button_copy[tkc.TEXT] = _("copy")
-            self.button_paste[tkc.TEXT] = _("paste")
-            self.button_working_dir_search.tooltip[tkc.TEXT] = _("browse for working directory")
+            if self.is_tab_custom_command_created:
+                self.update_labels_tab_custom_command()
 
             # global buttons
             self.button_search_youtube[tkc.TEXT] = _("open youtube")
@@ -529,6 +654,14 @@ class WindowMain(tk.Tk):
             self.button_download[tkc.TEXT] = _("download")
             self.button_close[tkc.TEXT] = _("close")
 
+        def update_labels_tab_custom_command(self):
+            self.label_working_dir[tkc.TEXT] = _("working direcotry")
+            self.button_man_pages[tkc.TEXT] = _("man")
+            self.button_man_pages.tooltip[tkc.TEXT] = _("youtube-dl --help")
+            self.button_copy[tkc.TEXT] = _("copy")
+            self.button_paste[tkc.TEXT] = _("paste")
+            self.button_working_dir_search.tooltip[tkc.TEXT] = _("browse for working directory")
+
         def update_metainfo(self, event=None):
             self.root.update_metainfo()
 
@@ -561,7 +694,13 @@ class WindowMain(tk.Tk):
             out = dict()
             active_tab = self.tabs.nametowidget(self.tabs.select())
             if   active_tab==self.tab_single_video:
-                out[cns.MODE] = cns.MODE_SINGLE_VIDEO
+                if self.checkbox_playlist.get_value():
+                    out[cns.MODE] = cns.MODE_PLAYLIST
+                    indices = self.frame_info.frame_entries.get_selected_indices()
+                    if indices:
+                        out[cns.PLAYLIST_ITEMS] = adapter.format_playlist_items(indices)
+                else:
+                    out[cns.MODE] = cns.MODE_SINGLE_VIDEO
                 out[cns.SOURCE_URL] = tkx.get_text(self.entry_source)
                 out[cns.WORKING_DIRECTORY] = tkx.get_text(self.var_working_directory)
                 out[cns.AUDIO_ONLY] = self.checkbox_audio_only.get_value()
@@ -579,6 +718,9 @@ class WindowMain(tk.Tk):
                     out[cns.SUBTITLE_LANGUAGES] = tkx.get_text(self.entry_subtitle_languages_auto_created)
                 if self.frame_cl_options.is_expanded():
                     out[cns.ADDITIONAL_OPTIONS] = self.entry_cl_options.get_value()
+                archive = settings.setdefault(KEY.DOWNLOAD_ARCHIVE, None)
+                if archive:
+                    out[cns.DOWNLOAD_ARCHIVE] = archive
                 
             elif active_tab==self.tab_custom_command:
                 out[cns.MODE] = cns.MODE_CUSTOM_COMMAND
@@ -595,7 +737,6 @@ class WindowMain(tk.Tk):
                 if url[:len(URL_START)]!=URL_START:
                     return
             tkx.set_text(self.entry_source, url)
-            self.entry_source.update()
             self.update_metainfo()
 
         def dest_select_directory(self, event=None):
@@ -608,7 +749,7 @@ class WindowMain(tk.Tk):
             tkx.set_text(self.var_working_directory, directory)
 
         # setters
-        def mark_source_url(self, state):
+        def mark_source_url(self, state, focus=True):
             if state==self.root.STATE_UNCHECKED:
                 color = "#FFFFFF"
                 widget_to_be_focused = None
@@ -618,8 +759,11 @@ class WindowMain(tk.Tk):
             elif state==self.root.STATE_ERROR:
                 color = "#ff6363"
                 widget_to_be_focused = self.entry_source
+            elif state==self.root.STATE_DOWNLOADED:
+                color = "#cfe3fb"
+                widget_to_be_focused = self.entry_source
             self.entry_source[tkc.COLOR_BACKGROUND] = color
-            if widget_to_be_focused!=None:
+            if widget_to_be_focused!=None and focus:
                 widget_to_be_focused.focus_set()
 
         class FrameInfo(tkx.HideableFrame):
@@ -693,6 +837,82 @@ class WindowMain(tk.Tk):
                 frame.rowconfigure(row, weight=1)
                 row += 1
 
+                self.frame_entries = self.FrameEntries(self)
+                self.frame_entries.pack(fill=tk.X)
+
+            class FrameEntries(tkx.HideableFrame):
+
+                '''lists the entries of a playlist or all videos if youtube-dl has printed the metainfo of more than one.
+                   only the displayed values are kept, not the whole metainfo.'''
+
+                def __init__(self, master):
+                    tk.Frame.__init__(self, master)
+                    self._count = 0
+                    self.tree = ttk.Treeview(self, columns=('duration', 'uploader'), height=5)
+                    self.tree.column('#0', stretch=True)
+                    self.tree.column('duration', stretch=False, width=70, anchor=tk.E)
+                    self.tree.column('uploader', stretch=False, width=150)
+                    self.tree.pack(side=tk.LEFT, expand=True, fill=tk.X)
+                    self.vbar = tk.Scrollbar(self, command=self.tree.yview)
+                    self.vbar.pack(side=tk.RIGHT, fill=tk.Y)
+                    self.tree.configure(yscrollcommand=self._on_scroll)
+
+                    # listeners without arguments, set by the owner
+                    self.on_select = None
+                    self.on_view_changed = None
+                    self.tree.bind('<<TreeviewSelect>>', lambda event: self._notify(self.on_select))
+                    self.tree.bind('<Configure>', lambda event: self._notify(self.on_view_changed))
+
+                def update_labels(self):
+                    self.tree.heading('#0', text=_("title"))
+                    self.tree.heading('duration', text=_("duration"))
+                    self.tree.heading('uploader', text=_("uploaded by"))
+
+                def _on_scroll(self, first, last):
+                    self.vbar.set(first, last)
+                    self._notify(self.on_view_changed)
+
+                def _notify(self, listener):
+                    if listener is not None:
+                        listener()
+
+                @staticmethod
+                def _get_values(metainfo):
+                    duration = progress.format_duration(metainfo.get('duration')) or ""
+                    return (duration, metainfo.get('uploader') or "")
+
+                def add_entry(self, metainfo):
+                    self.tree.insert('', tk.END, text=metainfo.get('title') or "", values=self._get_values(metainfo))
+                    self._count += 1
+                    if self._count == 2:
+                        self.show()
+
+                def set_playlist(self, entries):
+                    '''entries: the flat entries of a playlist. the item ids are the (1-based) playlist indices.'''
+                    self.clear()
+                    for i, entry in enumerate(entries, 1):
+                        self.tree.insert('', tk.END, iid=str(i), text=entry.get('title') or entry.get('url') or "", values=self._get_values(entry))
+                    self._count = len(entries)
+                    self.show()
+
+                def update_entry(self, index, metainfo):
+                    self.tree.item(str(index), text=metainfo.get('title') or "", values=self._get_values(metainfo))
+
+                def get_selected_indices(self):
+                    return [int(iid) for iid in self.tree.selection() if iid.isdigit()]
+
+                def get_visible_indices(self):
+                    '''the playlist indices of the rows which are currently visible'''
+                    if self._count == 0:
+                        return range(0)
+                    first, last = self.tree.yview()
+                    return range(int(first*self._count) + 1, min(self._count, int(last*self._count) + 1) + 1)
+
+                def clear(self):
+                    self.tree.delete(*self.tree.get_children())
+                    self._count = 0
+                    self.hide()
+
 
             def update_labels(self):
                 self.label_title[tkc.TEXT] = _("title")
@@ -704,6 +924,7 @@ class WindowMain(tk.Tk):
                 self._update_label_and_tooltip('dislike_count', _("dislikes"))
                 self._update_label_and_tooltip('average_rating', _("rating"))
                 self._update_label_and_tooltip('view_count', _("view count"))
+                self.frame_entries.update_labels()
                 
 
             def _update_label_and_tooltip(self, widgetkey, text, sep=":"):
@@ -752,7 +973,7 @@ class WindowMain(tk.Tk):
             root = self
             frame = root
 
-            self.text_log = tkx.AutoScrolledText(frame, wrap=tk.WORD, readonly=True, height=5)
+            self.text_log = tkx.VirtualLog(frame, readonly=True, height=5)
             self.text_log.pack(expand=True, fill=tk.BOTH)
             self.text_log.tag_configure(self.TAG_WARNING, background='#ffff64')
             self.text_log.tag_configure(self.TAG_ERROR, background='#ff9f9f')
@@ -761,6 +982,12 @@ class WindowMain(tk.Tk):
             font.configure(weight=tkc.FONT_WEIGHT_BOLD)
             self.text_log.tag_configure(self.TAG_FINISHED, font=font)
 
+            self.frame_progress = self.FrameProgress(root)
+            self.frame_progress.pack(fill=tk.X)
+
+            self.frame_jobs = self.FrameJobs(root)
+            self.frame_jobs.pack(fill=tk.X)
+
             frame = tk.Frame(root)
             frame.pack(side=tk.BOTTOM)
             self.button_cancel = tk.Button(frame, command=self.root.cancel_download)
@@ -770,7 +997,7 @@ class WindowMain(tk.Tk):
             tkx.add_tooltip(self.button_open)
 
             # update_labels is handled by root
-            # self.pack_buttons_before_download() is done indirectly by root (WindowMain.__init__ > WindowMain.switch_to_frame > FrameLog.pack_forget > FrameLog.pack_buttons_before_download)
+            # self.pack_buttons_before_download() is done indirectly by root (WindowMain.switch_to_frame > FrameLog.pack_forget > FrameLog.pack_buttons_before_download)
 
         def update_labels(self):
             self.button_cancel[tkc.TEXT] = _("cancel")
@@ -779,10 +1006,13 @@ class WindowMain(tk.Tk):
             self.button_open[tkc.TEXT] = _("open")
             self.button_open.tooltip[tkc.TEXT] = _("open download directory")
             self.text_log.checkbox_auto_scroll[tkc.TEXT] = _("scroll automatically to end")
+            self.frame_progress.update_labels()
+            self.frame_jobs.update_labels()
 
         def pack_buttons_before_download(self, dummy=None):
             self.button_cancel.pack(side=tk.LEFT)
-            self.button_back.pack_forget()
+            # back is allowed while downloading in order to add more downloads
+            self.button_back.pack(side=tk.LEFT)
             self.button_open.pack_forget()
             self.button_close.pack_forget()
         
@@ -806,12 +1036,186 @@ class WindowMain(tk.Tk):
                 self.root.log(_("process failed with return code {0}".format(returncode)), tags=(self.TAG_FINISHED,self.TAG_ERROR))
             self.pack_buttons_after_download()
 
+        def on_job_finished(self, job):
+            if job.state==download_manager.Job.STATE_FINISHED:
+                self.root.log(_("download {0} finished").format(job.id), tags=(self.TAG_FINISHED,))
+            elif job.state==download_manager.Job.STATE_CANCELLED:
+                self.root.log(_("download {0} cancelled").format(job.id), tags=(self.TAG_FINISHED,self.TAG_WARNING))
+            else:
+                self.root.log(_("download {0} failed with return code {1}").format(job.id, job.returncode), tags=(self.TAG_FINISHED,self.TAG_ERROR))
+
+        def on_downloads_finished(self):
+            self.pack_buttons_after_download()
+
         def pack_forget(self):
             tk.Pack.pack_forget(self)
-            self.text_log.delete(1.0, tk.END)
+            if self.root.download_manager.is_active():
+                # keep the log of the running downloads
+                return
+            self.root.download_manager.clear_done()
+            self.text_log.clear()
+            self.frame_progress.reset()
+            self.frame_jobs.clear()
             self.pack_buttons_before_download()
             self.root.reset()
 
+        class FrameJobs(tkx.HideableFrame):
+
+            '''a table of all downloads. it is shown as soon as there is more than one.'''
+
+            COLUMNS = ('state', 'progress', 'speed', 'eta')
+
+            def __init__(self, master):
+                tk.Frame.__init__(self, master)
+                self._is_shown = False
+                self.state_labels = dict()
+                self.tree = ttk.Treeview(self, columns=self.COLUMNS, height=4)
+                self.tree.column('#0', stretch=True)
+                for col in self.COLUMNS:
+                    self.tree.column(col, stretch=False, width=90, anchor=tk.E)
+                self.tree.pack(side=tk.LEFT, expand=True, fill=tk.X)
+                self.vbar = tk.Scrollbar(self, command=self.tree.yview)
+                self.vbar.pack(side=tk.RIGHT, fill=tk.Y)
+                self.tree.configure(yscrollcommand=self.vbar.set)
+
+            def update_labels(self):
+                self.tree.heading('#0', text=_("download"))
+                self.tree.heading('state', text=_("state"))
+                self.tree.heading('progress', text=_("progress"))
+                self.tree.heading('speed', text=_("speed"))
+                self.tree.heading('eta', text=_("ETA"))
+                self.state_labels = {
+                    download_manager.Job.STATE_QUEUED : _("queued"),
+                    download_manager.Job.STATE_RUNNING : _("running"),
+                    download_manager.Job.STATE_FINISHED : _("finished"),
+                    download_manager.Job.STATE_FAILED : _("failed"),
+                    download_manager.Job.STATE_CANCELLED : _("cancelled"),
+                }
+
+            def update_job(self, job):
+                p = job.progress
+                if p is not None and not job.is_done():
+                    percent = "{:.1f}%".format(p.percent) if p.percent is not None else ""
+                    speed = progress.format_bytes(p.speed) + "/s" if p.speed is not None else ""
+                    eta = progress.format_duration(p.eta) or ""
+                else:
+                    percent = speed = eta = ""
+                values = (self.state_labels.get(job.state, job.state), percent, speed, eta)
+                iid = str(job.id)
+                if self.tree.exists(iid):
+                    self.tree.item(iid, values=values)
+                else:
+                    self.tree.insert('', tk.END, iid=iid, text=job.name, values=values)
+                    if not self._is_shown and len(self.tree.get_children()) > 1:
+                        self.show()
+                        self._is_shown = True
+
+            def clear(self):
+                self.tree.delete(*self.tree.get_children())
+                self._is_shown = False
+                self.hide()
+
+        class FrameProgress(tkx.HideableFrame):
+
+            '''shows the latest progress.Progress record, redrawing at most every min_interval_ms milliseconds'''
+
+            def __init__(self, master):
+                tk.Frame.__init__(self, master)
+                self.min_interval_ms = 100
+                self._record = None
+                self._count = None
+                self._after_id = None
+                self._time_last_draw = 0
+                self._is_shown = False
+
+                self.progressbar = ttk.Progressbar(self, orient=tk.HORIZONTAL, mode='determinate', maximum=100)
+                self.progressbar.pack(fill=tk.X)
+
+                frame = tk.Frame(self)
+                frame.pack(fill=tk.X)
+                self.label_size = tk.Label(frame)
+                self.label_size.pack(side=tk.LEFT)
+                self.label_fragment = tk.Label(frame)
+                self.label_fragment.pack(side=tk.LEFT)
+                self.label_count = tk.Label(frame)
+                self.label_count.pack(side=tk.LEFT)
+                self.label_eta = tk.Label(frame)
+                self.label_eta.pack(side=tk.RIGHT)
+                self.label_speed = tk.Label(frame)
+                self.label_speed.pack(side=tk.RIGHT)
+
+            def update_labels(self):
+                self.draw()
+                self._draw_count()
+
+            def set_count(self, done, total):
+                '''the number of downloaded videos if several videos are downloaded'''
+                self._count = (done, total)
+                self._draw_count()
+
+            def _draw_count(self):
+                if self._count is None:
+                    self.label_count[tkc.TEXT] = ""
+                    return
+                if not self._is_shown:
+                    self.show()
+                    self._is_shown = True
+                done, total = self._count
+                self.label_count[tkc.TEXT] = _("{done} of {total} videos").format(done=done, total=total)
+
+            def set_progress(self, record):
+                self._record = record
+                if self._after_id is not None:
+                    return
+                wait_ms = int((self._time_last_draw - time.time()) * 1000) + self.min_interval_ms
+                if wait_ms <= 0:
+                    self.draw()
+                else:
+                    self._after_id = self.after(wait_ms, self.draw)
+
+            def draw(self):
+                self._after_id = None
+                self._time_last_draw = time.time()
+                r = self._record
+                if r is None:
+                    return
+                if not self._is_shown:
+                    self.show()
+                    self._is_shown = True
+
+                self.progressbar['value'] = r.percent if r.percent is not None else 0
+                downloaded = progress.format_bytes(r.downloaded_bytes)
+                total = progress.format_bytes(r.total_bytes)
+                if total is None:
+                    size = downloaded if downloaded is not None else ""
+                else:
+                    if r.is_estimate:
+                        total = "~" + total
+                    size = _("{downloaded} of {total}").format(downloaded=downloaded, total=total)
+                self.label_size[tkc.TEXT] = size
+                if r.fragment_index is not None:
+                    self.label_fragment[tkc.TEXT] = _("(fragment {index} of {count})").format(index=r.fragment_index, count=r.fragment_count)
+                else:
+                    self.label_fragment[tkc.TEXT] = ""
+                speed = progress.format_bytes(r.speed)
+                self.label_speed[tkc.TEXT] = speed + "/s" if speed is not None else ""
+                if r.is_finished():
+                    self.label_eta[tkc.TEXT] = _("finished")
+                elif r.eta is not None:
+                    self.label_eta[tkc.TEXT] = _("ETA {eta}").format(eta=progress.format_duration(r.eta))
+                else:
+                    self.label_eta[tkc.TEXT] = ""
+
+            def reset(self):
+                if self._after_id is not None:
+                    self.after_cancel(self._after_id)
+                    self._after_id = None
+                self._record = None
+                self._count = None
+                self.label_count[tkc.TEXT] = ""
+                self._is_shown = False
+                self.hide()
+
 
     class FrameNotInstalled(tk.Frame):
 
@@ -918,8 +1322,12 @@ http://rg3.github.io/youtube-dl/download.html
             if ret == adapter.Adapter.RET_INSTALLED:
                 self.root.frames.remove(self)
                 self.destroy()
-                self.root.start()
-                self.root.save_settings(force=True)
+                if hasattr(self.root, 'frame_main'):
+                    # the backend has been found missing by the check in the background
+                    self.root.switch_to_frame(self.root.frame_main)
+                else:
+                    self.root.start()
+                self.root.on_backend_installed(self.root.adapter.get_executable_signature())
             else:
                 self.check_installed_ret = ret
                 self.update_error_label()
@@ -933,7 +1341,16 @@ http://rg3.github.io/youtube-dl/download.html
         self.window_cli_help = None
         self.window_cli_version = None
         self.adapter = adapter
+        # created by the corresponding properties when they are needed for the first time
+        self._metainfo_cache = None
+        self._job_journal = None
+        self._download_manager = None
+        self._metainfo_request_id = 0
+        self._metainfo_after_id = None
+        self._metainfo_adapter = None
         self.frames = []
+        self.menus = None
+        self.instance_server = None
 
         if settings.setdefault(KEY.CHECK_BACKEND, True):
             self.check_backend()
@@ -942,18 +1359,34 @@ http://rg3.github.io/youtube-dl/download.html
 
 
     def start(self):
-        # increases startup time significantly.
-        # please note that this only takes effect if update-settings is True.
-        settings[KEY.CHECK_BACKEND] = False
         self.frame_main = self.FrameMain(self)
         self.frames.append(self.frame_main)
         self.meta_info_display = self.frame_main.frame_info
-        
-        self.frame_log = self.FrameLog(self)
-        self.frames.append(self.frame_log)
 
+        self._is_watching_downloads = False
+        self._info_files = dict()
+
+        # full metainfo of the playlist entries which are visible or selected
+        self.metainfo_prefetcher = download_manager.DownloadManager(self.adapter.create_new_instance)
+        self.metainfo_prefetcher.on_output = self._on_prefetch_output
+        self.metainfo_prefetcher.on_state_changed = self._on_prefetch_state_changed
+        self._is_watching_prefetcher = False
+        self._prefetch_jobs = dict()
+        self._prefetch_after_id = None
+        self._entries_filled = set()
+        self.playlist_entries = None
+
+        # created by the frame_log property when it is needed for the first time
+        self._frame_log = None
+
+        frame_entries = self.meta_info_display.frame_entries
+        frame_entries.on_select = self._on_playlist_select
+        frame_entries.on_view_changed = self._on_playlist_view_changed
+
+        startup_profiler.mark("frames created")
         self.update_labels()
         self.switch_to_frame(self.frame_main)
+        startup_profiler.mark("main frame shown")
 
         self.reset()
         self._state = None
@@ -970,18 +1403,53 @@ http://rg3.github.io/youtube-dl/download.html
         if settings.setdefault(KEY.AUTO_PASTE_ON_STARTUP, True):
             self.frame_main.source_clear_and_paste(precheck=True)
 
+        # opening the journal is not required to show the main window
+        self.after_idle(self.resume_downloads)
+
     def check_backend(self):
-        ret = self.adapter.check_installed()
-        if ret == adapter.Adapter.RET_INSTALLED:
-            self.start()
-            self.save_settings(force=True)
+        # running youtube-dl --version takes about a second.
+        # it is only required if the executable has changed since it has been checked the last time.
+        signature = self.adapter.get_executable_signature()
+        if signature is None:
+            # the executable does not exist, the main frame would start processes which can not be started
+            log.warning("backend not found: {}".format(self.adapter._get_default_cmd()))
+            self.show_frame_not_installed(self.adapter.RET_FILE_NOT_FOUND)
+            return
+        self.start()
+        if signature is not None and list(signature) == settings.get(KEY.BACKEND_SIGNATURE):
+            log.debug("backend has not changed since last check: {}".format(signature))
             return
+        self.after_idle(self._check_backend_in_background, signature)
+
+    def _check_backend_in_background(self, signature):
+        result = list()
+        a = self.adapter.create_new_instance()
+        thread = threading.Thread(target=lambda: result.append(a.check_installed()))
+        thread.daemon = True
+        thread.start()
+        self._poll_check_backend(thread, result, signature)
+
+    def _poll_check_backend(self, thread, result, signature):
+        if thread.is_alive():
+            self.after(self.POLL_INTERVAL_IN_MS_FOR_METAINFO, self._poll_check_backend, thread, result, signature)
+            return
+        ret = result[0] if result else self.adapter.RET_FILE_NOT_FOUND
+        if ret == self.adapter.RET_INSTALLED:
+            self.on_backend_installed(signature)
+            return
+
+        log.warning("backend check failed: {}".format(ret))
+        self.show_frame_not_installed(ret)
 
+    def show_frame_not_installed(self, ret):
         self.frame_not_installed = self.FrameNotInstalled(self, check_installed_ret=ret)
-        self.frame_not_installed.pack(expand=True, fill=tk.BOTH)
         self.frames.append(self.frame_not_installed)
+        self.frame_not_installed.update_labels()
+        self.switch_to_frame(self.frame_not_installed)
 
-        self.update_labels(menus=False)
+    def on_backend_installed(self, signature):
+        settings[KEY.BACKEND_SIGNATURE] = list(signature) if signature is not None else None
+        self.save_settings(force=True)
 
     def update_settings(self):
         log.debug("update_settings()")
@@ -989,8 +1457,65 @@ http://rg3.github.io/youtube-dl/download.html
         self.frame_main.update_settings()
         self.POLL_INTERVAL_IN_MS_FOR_DOWNLOAD = settings.setdefault(KEY.POLL_INTERVAL_IN_MS_FOR_DOWNLOAD, 500)
         self.POLL_INTERVAL_IN_MS_FOR_METAINFO = settings.setdefault(KEY.POLL_INTERVAL_IN_MS_FOR_METAINFO, 100)
+        self.METAINFO_DEBOUNCE_IN_MS = settings.setdefault(KEY.METAINFO_DEBOUNCE_IN_MS, 500)
+        self.EVENT_DRIVEN_UPDATES = settings.setdefault(KEY.EVENT_DRIVEN_UPDATES, True)
+        if self._frame_log is not None:
+            self.update_settings_frame_log()
+        if self._download_manager is not None:
+            self.update_settings_download_manager()
+        if self._metainfo_cache is not None:
+            self.update_settings_metainfo_cache()
+        self.metainfo_prefetcher.max_parallel = settings.setdefault(KEY.PLAYLIST_METAINFO_PARALLEL, 2)
         self.shortcuts()
 
+    def update_settings_frame_log(self):
+        self._frame_log.text_log.store.max_lines = settings.setdefault(KEY.LOG_MAX_LINES, 1000000)
+        self._frame_log.frame_progress.min_interval_ms = 1000 // settings.setdefault(KEY.PROGRESS_MAX_FRAMES_PER_SECOND, 10)
+
+    def update_settings_download_manager(self):
+        self._download_manager.max_parallel = settings.setdefault(KEY.MAX_PARALLEL_DOWNLOADS, 3)
+
+    def update_settings_metainfo_cache(self):
+        self._metainfo_cache.ttl = settings.setdefault(KEY.METAINFO_CACHE_TTL_IN_S, 24*60*60)
+        self._metainfo_cache.max_entries = settings.setdefault(KEY.METAINFO_CACHE_MAX_ENTRIES, 1000)
+
+    @property
+    def metainfo_cache(self):
+        '''opened when it is accessed for the first time'''
+        if self._metainfo_cache is None:
+            self._metainfo_cache = metainfo_cache.MetainfoCache()
+            self.update_settings_metainfo_cache()
+        return self._metainfo_cache
+
+    @property
+    def job_journal(self):
+        '''opened when it is accessed for the first time'''
+        if self._job_journal is None:
+            self._job_journal = job_journal.JobJournal()
+        return self._job_journal
+
+    @property
+    def download_manager(self):
+        '''created when it is accessed for the first time, i.e. when resuming or starting a download'''
+        if self._download_manager is None:
+            self._download_manager = download_manager.DownloadManager(self.adapter.create_new_instance, journal=self.job_journal)
+            self._download_manager.on_output = self._on_job_output
+            self._download_manager.on_progress = self._on_job_progress
+            self._download_manager.on_state_changed = self._on_job_state_changed
+            self.update_settings_download_manager()
+        return self._download_manager
+
+    @property
+    def frame_log(self):
+        '''the log is not needed before the first download or update, it is created when it is accessed for the first time'''
+        if self._frame_log is None:
+            log.debug("creating frame log")
+            self._frame_log = self.FrameLog(self)
+            self.frames.append(self._frame_log)
+            self._frame_log.update_labels()
+            self.update_settings_frame_log()
+        return self._frame_log
+
     def shortcuts(self):
         log.debug("shortcuts()")
         ffn = metainfo.get_config_ffn(FN_SHORTCUTS)
@@ -1009,7 +1534,9 @@ http://rg3.github.io/youtube-dl/download.html
         log.debug("update_labels()")
         self.title(_("youtube-dl"))
         if menus:
-            self.menus = self.ApplicationMenus(self)
+            if self.menus is None:
+                self.menus = self.ApplicationMenus(self)
+            self.menus.update_labels()
         
         for f in self.frames:
             f.update_labels()
@@ -1027,55 +1554,55 @@ http://rg3.github.io/youtube-dl/download.html
 
 
     def log(self, msg, tags=None):
-        if tags and self.FrameLog.TAG_ERROR in tags:
-            sys.stderr.write(msg)
-        else:
-            sys.stdout.write(msg)
+        self.log_lines([(msg, tags)])
+
+    def log_lines(self, lines):
+        '''lines: list of (msg, tags) pairs. If tags is None they are determined based on the content of msg.'''
+        out = list()
+        err = list()
+        for msg, tags in lines:
+            if tags and self.FrameLog.TAG_ERROR in tags:
+                err.append(msg)
+            else:
+                out.append(msg)
+        if out:
+            sys.stdout.write("".join(out))
+        if err:
+            sys.stderr.write("".join(err))
         #sys.stdout.flush()
-        self._log_gui(msg, tags)
+        self._log_gui(lines)
 
-    def _log_gui(self, msg, tags):
+    def _log_gui(self, lines):
         # get text widget
         text = self.frame_log.text_log
-        
-        # process cariage return
-        msg = msg.replace("\r\n", "\n")
-        msg = msg.replace("\r", "\n")
-##        #ERROR: text is not overwritten with cr but only with following content
-##        i0 = 0
-##        while True:
-##            i1 = msg.rfind("\r")
-##            if i1==-1:
-##                break
-##            i0 = msg.rfind("\n", 0, i1)
-##            if i0==-1:
-##                break
-##            msg = msg[:i0+1] + msg[i1+1:]
-##        if i0==-1:
-##            msg = msg[i1+1:]
-##            #TODO: remove last line from text widget
-
-        if msg[-1]!='\n':
-            msg += '\n'
-
-        # add message to text widget & scroll
-        if tags==None:
-            msg = msg[:-1]
-            for ln in msg.split("\n"):
-                if self.adapter.is_error(ln):
-                    tags = (self.frame_log.TAG_ERROR,)
-                elif self.adapter.is_warning(ln):
-                    tags = (self.frame_log.TAG_WARNING,)
-                elif self.adapter.is_destination(ln, self.set_destination):
-                    tags = (self.frame_log.TAG_DESTINATION,)
-                else:
-                    tags = None
-                text.append(ln+'\n', tags)
+
+        chunks = list()
+        for msg, tags in lines:
+            # a line ending with a carriage return is overwritten by the next line, see tkx.LineStore
+            if msg[-1:] not in ('\n', '\r'):
+                msg += '\n'
+
+            if tags==None:
+                for ln, end in tkx.LineStore.split_lines(msg):
+                    chunks.append((ln+end, self._get_tags(ln)))
+            else:
+                chunks.append((msg, tags))
+
+        # the text widget shows the last lines only, keep everything on disk
+        logging_setup.output_history.write("".join(chunk for chunk, tags in chunks))
+
+        # add all messages of this tick to the log view at once
+        text.append_runs(tkx.group_runs(chunks))
+
+    def _get_tags(self, ln):
+        if self.adapter.is_error(ln):
+            return (self.FrameLog.TAG_ERROR,)
+        elif self.adapter.is_warning(ln):
+            return (self.FrameLog.TAG_WARNING,)
+        elif self.adapter.is_destination(ln, self.set_destination):
+            return (self.FrameLog.TAG_DESTINATION,)
         else:
-            text.append(msg, tags)
-        text.update()
-        
-        return msg
+            return None
 
 
     # event listener frame main
@@ -1101,23 +1628,26 @@ http://rg3.github.io/youtube-dl/download.html
         self.meta_info = None
         #self.meta_info_display.update_info(dict())
         self.meta_info_display.hide()
+        self.meta_info_display.frame_entries.clear()
+        self._cancel_prefetch()
+        self.playlist_entries = None
 
-    def _on_new_meta_data(self):
+    def _on_new_meta_data(self, focus=True):
         if self._state != self.STATE_UNCHECKED: log.warning("changed directly from state {old_state} to state {new_state}".format(old_state=self._state, new_state=self.STATE_SUCCESS))
         self._state = self.STATE_SUCCESS
-        self.frame_main.mark_source_url(self._state)
+        self.frame_main.mark_source_url(self._state, focus)
         self.meta_info_display.update_info(self.meta_info)
         self.meta_info_display.show()
         self.cursor_manager.reset_cursor()
-        self.menus.menu_debug.entry_enable('save_metainfo')
+        self.menus.update_menu_debug()
         
-    def _on_error_metainfo_download(self, error_message):
+    def _on_error_metainfo_download(self, error_message, focus=True):
         if self._state != self.STATE_UNCHECKED: log.warning("changed directly from state {old_state} to state {new_state}".format(old_state=self._state, new_state=self.STATE_ERROR))
         self._state = self.STATE_ERROR
         self._error_message = error_message
         log.error(error_message)
         #TODO: determine the cause
-        self.frame_main.mark_source_url(self._state)
+        self.frame_main.mark_source_url(self._state, focus)
 ##        tkMessageBox.showerror(
 ##            title=_("Failed to retrieve meta info"),
 ##            message = error_message
@@ -1125,61 +1655,325 @@ http://rg3.github.io/youtube-dl/download.html
         self.cursor_manager.reset_cursor()
     
     
-    def update_metainfo(self):
-        if self.meta_info_raw != None:
+    def _on_already_downloaded(self, url, focus=True):
+        if self._state != self.STATE_UNCHECKED: log.warning("changed directly from state {old_state} to state {new_state}".format(old_state=self._state, new_state=self.STATE_DOWNLOADED))
+        self._state = self.STATE_DOWNLOADED
+        log.info("not downloading metainfo of {url!r} because it is in the download archive".format(url=url))
+        self.frame_main.mark_source_url(self._state, focus)
+        self.cursor_manager.reset_cursor()
+
+    def on_source_url_changed(self):
+        self.invalidate_meta_info()
+        if tkx.get_text(self.frame_main.entry_source).strip():
+            self.request_metainfo(delay_ms=self.METAINFO_DEBOUNCE_IN_MS)
+        else:
+            self.cancel_metainfo()
+
+    def request_metainfo(self, delay_ms=0, force_refresh=False):
+        '''update the metainfo after the source url has not changed for delay_ms milliseconds.
+           every call supersedes all previous requests.'''
+        self._metainfo_request_id += 1
+        if self._metainfo_after_id is not None:
+            self.after_cancel(self._metainfo_after_id)
+        self._metainfo_after_id = self.after(delay_ms, self.update_metainfo, force_refresh, False)
+
+    def cancel_metainfo(self):
+        '''drop all pending requests and stop a running metainfo download'''
+        self._metainfo_request_id += 1
+        if self._metainfo_after_id is not None:
+            self.after_cancel(self._metainfo_after_id)
+            self._metainfo_after_id = None
+        a = self._metainfo_adapter
+        if a is not None:
+            self._metainfo_adapter = None
+            self._unwatch(a)
+            if a.is_running():
+                log.debug("killing download-metainfo-subprocess")
+                a.kill()
+            self.cursor_manager.reset_cursor()
+
+    def update_metainfo(self, force_refresh=False, focus=True):
+        '''force_refresh: ignore the cache and download the metainfo again.
+           focus: move the focus depending on the result, False if triggered while typing.'''
+        self._metainfo_request_id += 1
+        request_id = self._metainfo_request_id
+        if self._metainfo_after_id is not None:
+            self.after_cancel(self._metainfo_after_id)
+            self._metainfo_after_id = None
+        if self.meta_info_raw != None and not force_refresh:
             log.debug("update metainfo not necessary...")
             return
-        adapter = self.adapter
-        if adapter.is_running():
-            log.info("killing download-metainfo-subprocess in order to download other metainfo")
-            self.kill()
-            self.update()
-            time.sleep(0.1) # visual feedback. short time span in which normal cursor is visible to show the user that the button click is not ignored.
+        params = self.frame_main.get_settings()
+        url = params.get(self.adapter.SOURCE_URL)
+
+        a = self._metainfo_adapter
+        mode = params.get(self.adapter.MODE)
+        if a is not None and a.is_running() and not force_refresh and a._metainfo_url == url and a._metainfo_mode == mode:
+            # the result of the running process is still valid
+            log.debug("metainfo is being downloaded already")
+            a._metainfo_request_id = request_id
+            a._metainfo_focus = a._metainfo_focus or focus
+            return
+        self.cancel_metainfo()
+        self._metainfo_request_id = request_id
+
         log.debug("update metainfo...")
-        self.cursor_manager.set_cursor()
-        self.update()
         self.invalidate_meta_info()
-        self._on_finish_listener = self.update_metainfo_on_finish
-        settings = self.frame_main.get_settings()
-        if not settings[adapter.SOURCE_URL]:
-            self._on_error_metainfo_download("no source URL given")
-        settings[adapter.METAINFO_ONLY] = True
-        adapter.process_params(settings)
-        adapter.start()
-        self.update_metainfo_poll(adapter)
+        if not url:
+            self._on_error_metainfo_download("no source URL given", focus)
+            return
+        # the list of entries of a playlist is not cached, it is cheap to get and it changes
+        if settings.setdefault(KEY.METAINFO_CACHE_ENABLED, True) and mode == self.adapter.MODE_SINGLE_VIDEO:
+            if force_refresh:
+                self.metainfo_cache.remove(url)
+            else:
+                entry = self.metainfo_cache.get_entry(url)
+                if entry is not None:
+                    raw, time_fetched = entry
+                    try:
+                        info = json.loads(raw)
+                    except ValueError as e:
+                        log.error("invalid metainfo in cache: {e}".format(e=e))
+                    else:
+                        self._set_meta_info(raw, info, time_fetched, focus)
+                        return
+        if not force_refresh and mode == self.adapter.MODE_SINGLE_VIDEO:
+            archive = self._get_download_archive(params)
+            if archive is not None and self._is_downloaded(archive, params):
+                # download would not start youtube-dl either, reload_metainfo does
+                self._on_already_downloaded(url, focus)
+                return
+        self.cursor_manager.set_cursor()
+        params[self.adapter.METAINFO_ONLY] = True
+        a = self.adapter.create_new_instance()
+        a._metainfo_request_id = request_id
+        a._metainfo_url = url
+        a._metainfo_mode = mode
+        a._metainfo_focus = focus
+        a._metainfo_parser = adapter.MetainfoParser(lambda raw, info: self._on_metainfo_record(a, raw, info))
+        self._metainfo_adapter = a
+        self._watch(a, self.update_metainfo_poll)
+        try:
+            a.start(a.build_command(params))
+        except (ValueError, OSError) as e:
+            log.exception(e)
+            self._metainfo_adapter = None
+            self._unwatch(a)
+            self._on_error_metainfo_download(str(e), focus)
+            return
+        self.update_metainfo_poll(a)
     def update_metainfo_poll(self, adapter):
+        # records are displayed as soon as they arrive, not when the process has finished
+        adapter._metainfo_parser.feed_all(adapter)
         if adapter.is_finished():
+            self._unwatch(adapter)
+            adapter._metainfo_parser.feed_all(adapter)
             self.update_metainfo_on_finish(adapter)
         else:
-            adapter._after_id = self.after(self.POLL_INTERVAL_IN_MS_FOR_METAINFO, self.update_metainfo_poll, adapter)
+            self._schedule_poll(adapter, self.update_metainfo_poll, self.POLL_INTERVAL_IN_MS_FOR_METAINFO)
+    def _on_metainfo_record(self, adapter, raw, info):
+        if adapter._metainfo_request_id != self._metainfo_request_id:
+            return
+        if adapter._metainfo_parser.count == 1:
+            self._set_meta_info(raw, info, focus=adapter._metainfo_focus)
+            if info.get('_type') == 'playlist':
+                self._set_playlist(info)
+                return
+        elif settings.setdefault(KEY.METAINFO_CACHE_ENABLED, True):
+            self.metainfo_cache.put(None, raw, info)
+        self.meta_info_display.frame_entries.add_entry(info)
     def update_metainfo_on_finish(self, adapter):#self=self, lines_json=lines_json):
         returncode = adapter.get_returncode()
         log.debug("return code of get metainfo subprocess: {c}".format(c=returncode))
-        self.meta_info_raw = "".join(ln for ln,flag in adapter.iter_out())
-        if "is not a valid URL" not in self.meta_info_raw: #returncode==0:
-            json_code = self.meta_info_raw
-            WARNING = 'WARNING'
-            while json_code[:len(WARNING)]==WARNING:
-                ln, json_code = json_code.split('\n', 1)
-                log.warning(ln)
-            try:
-                self.meta_info = json.loads(json_code)
-            except ValueError as e:
-                log.error("ValueError while trying to parse metainfo json:")
-                log.error(e)
-                self._on_error_metainfo_download(self.meta_info_raw)
-                return
-            self._on_new_meta_data()
+        if adapter._metainfo_request_id != self._metainfo_request_id:
+            log.debug("dropping metainfo of {url!r} because it has been superseded".format(url=adapter._metainfo_url))
+            return
+        self._metainfo_adapter = None
+        parser = adapter._metainfo_parser
+        if parser.count == 0:
+            error_message = parser.get_error_message() or "youtube-dl has not printed any metainfo, return code {c}".format(c=returncode)
+            self._on_error_metainfo_download(error_message, adapter._metainfo_focus)
+            return
+        if settings.setdefault(KEY.METAINFO_CACHE_ENABLED, True) and adapter._metainfo_mode == self.adapter.MODE_SINGLE_VIDEO:
+            # if the url refers to several videos it must not become an alias of the first one
+            url = adapter._metainfo_url if parser.count == 1 else None
+            self.metainfo_cache.put(url, self._meta_info_json, self.meta_info)
+
+    # ----- playlist -----
+
+    def _set_playlist(self, info):
+        self._cancel_prefetch()
+        self.playlist_entries = info.get('entries') or []
+        log.info("playlist with {n} entries".format(n=len(self.playlist_entries)))
+        self.meta_info_display.frame_entries.set_playlist(self.playlist_entries)
+        self._on_playlist_view_changed()
+
+    @staticmethod
+    def _get_entry_url(entry):
+        url = entry.get('webpage_url') or entry.get('url')
+        if url and '://' not in url and entry.get('ie_key') == 'Youtube':
+            url = "https://www.youtube.com/watch?v=" + url
+        return url
+
+    def _get_entry_info(self, index):
+        '''the full metainfo of a playlist entry if it is cached, None otherwise'''
+        entry = self.playlist_entries[index-1]
+        if entry.get('ie_key') and entry.get('id'):
+            cached = self.metainfo_cache.get_entry_by_key(metainfo_cache.get_key(entry['ie_key'], entry['id']))
+        else:
+            cached = self.metainfo_cache.get_entry(self._get_entry_url(entry) or "")
+        if cached is None:
+            return None
+        try:
+            return json.loads(cached[0])
+        except ValueError:
+            return None
+
+    def _on_playlist_select(self):
+        if not self.playlist_entries:
+            return
+        indices = self.meta_info_display.frame_entries.get_selected_indices()
+        if len(indices) != 1:
+            return
+        index = indices[0]
+        info = self._get_entry_info(index)
+        if info is not None:
+            self.meta_info_display.frame_entries.update_entry(index, info)
+            self.meta_info_display.update_info(info)
+        else:
+            self._prefetch(index, first=True)
+
+    def _on_playlist_view_changed(self):
+        if not self.playlist_entries:
+            return
+        if self._prefetch_after_id is not None:
+            self.after_cancel(self._prefetch_after_id)
+        self._prefetch_after_id = self.after(self.METAINFO_DEBOUNCE_IN_MS, self._prefetch_visible)
+
+    def _prefetch_visible(self):
+        self._prefetch_after_id = None
+        if not self.playlist_entries:
+            return
+        frame_entries = self.meta_info_display.frame_entries
+        wanted = set(frame_entries.get_visible_indices())
+        wanted.update(frame_entries.get_selected_indices())
+        # rows which have been scrolled out of view before their turn came are not needed anymore
+        for index, job in list(self._prefetch_jobs.items()):
+            if index not in wanted and job.state == download_manager.Job.STATE_QUEUED:
+                self.metainfo_prefetcher.cancel(job)
+        for index in sorted(wanted):
+            if index in self._prefetch_jobs or index in self._entries_filled:
+                continue
+            info = self._get_entry_info(index)
+            if info is not None:
+                frame_entries.update_entry(index, info)
+                self._entries_filled.add(index)
+            else:
+                self._prefetch(index)
+
+    def _prefetch(self, index, first=False):
+        if index in self._prefetch_jobs:
+            return
+        cns = self.adapter
+        params = {
+            cns.MODE : cns.MODE_SINGLE_VIDEO,
+            cns.SOURCE_URL : self._get_entry_url(self.playlist_entries[index-1]),
+            cns.WORKING_DIRECTORY : None,
+            cns.METAINFO_ONLY : True,
+        }
+        manager = self.metainfo_prefetcher
+        if not self._is_watching_prefetcher:
+            self._is_watching_prefetcher = True
+            self._watch(manager, self._poll_prefetcher)
+        parser = adapter.MetainfoParser(lambda raw, info: self._on_prefetched(index, parser, raw, info))
+        job = manager.add(params, name=str(index), first=first, data=(index, parser))
+        if not job.is_done():
+            self._prefetch_jobs[index] = job
+        self._poll_prefetcher(manager)
+
+    def _poll_prefetcher(self, manager):
+        manager.poll()
+        manager.clear_done()
+        if manager.is_active():
+            self._schedule_poll(manager, self._poll_prefetcher, self.POLL_INTERVAL_IN_MS_FOR_METAINFO)
         else:
-            log.error("{string!r} is contained in downloaded metainfo".format(string="is not a valid URL"))
-            self._on_error_metainfo_download(self.meta_info_raw)
+            self._unwatch(manager)
+            self._is_watching_prefetcher = False
+
+    def _on_prefetch_output(self, job, lines):
+        index, parser = job.data
+        for ln, flag in lines:
+            parser.feed(ln, flag)
+
+    def _on_prefetched(self, index, parser, raw, info):
+        if settings.setdefault(KEY.METAINFO_CACHE_ENABLED, True):
+            self.metainfo_cache.put(None, raw, info)
+        job = self._prefetch_jobs.get(index)
+        if job is None or job.data[1] is not parser:
+            # the playlist has changed in the mean time
+            return
+        self._entries_filled.add(index)
+        frame_entries = self.meta_info_display.frame_entries
+        frame_entries.update_entry(index, info)
+        if frame_entries.get_selected_indices() == [index]:
+            self.meta_info_display.update_info(info)
+
+    def _on_prefetch_state_changed(self, job):
+        index, parser = job.data
+        if job.is_done() and self._prefetch_jobs.get(index) is job:
+            del self._prefetch_jobs[index]
+            if job.state == download_manager.Job.STATE_FAILED:
+                log.warning("failed to get metainfo of playlist entry {index}: {error}".format(index=index, error=parser.get_error_message()))
+
+    def _cancel_prefetch(self):
+        if self._prefetch_after_id is not None:
+            self.after_cancel(self._prefetch_after_id)
+            self._prefetch_after_id = None
+        self.metainfo_prefetcher.cancel_all()
+        self._prefetch_jobs = dict()
+        self._entries_filled = set()
+
+    def _set_meta_info(self, raw, info, time_fetched=None, focus=True):
+        '''display info, the parsed json code raw printed by youtube-dl --dump-json'''
+        self.meta_info_raw = raw
+        self.meta_info = info
+        self._meta_info_json = raw
+        self._meta_info_time = time_fetched if time_fetched is not None else time.time()
+        self._on_new_meta_data(focus)
     
     def kill(self):
         adapter = self.adapter
-        self.after_cancel(adapter._after_id)
+        self._unwatch(adapter)
         adapter.kill()
         if self.cursor_manager.is_cursor_changed():
             self.cursor_manager.reset_cursor()
+
+    # In event driven mode the adapter wakes up the Tk event loop as soon as
+    # output arrives. Otherwise (or if that is not supported) it is polled.
+    def _watch(self, adapter, poll):
+        adapter._after_id = None
+        adapter._waker = None
+        if self.EVENT_DRIVEN_UPDATES and tkx.Waker.is_supported(self):
+            adapter._waker = tkx.Waker(self, lambda: poll(adapter))
+            adapter.set_output_listener(adapter._waker.notify)
+
+    def _schedule_poll(self, adapter, poll, interval):
+        if adapter._waker is not None:
+            if not adapter.is_eof():
+                # poll is called by the waker when new output arrives
+                return
+            # all output has been read but the process has not exited yet
+            interval = self.POLL_INTERVAL_IN_MS_AFTER_EOF
+        adapter._after_id = self.after(interval, poll, adapter)
+
+    def _unwatch(self, adapter):
+        if getattr(adapter, '_after_id', None) is not None:
+            self.after_cancel(adapter._after_id)
+            adapter._after_id = None
+        if getattr(adapter, '_waker', None) is not None:
+            adapter.set_output_listener(None)
+            adapter._waker.close()
+            adapter._waker = None
     
 
     def save_metainfo(self, raw):
@@ -1233,11 +2027,66 @@ http://rg3.github.io/youtube-dl/download.html
             log.debug("save log as was canceled by user.")
             return
         log.debug("save log as {fn}".format(fn=ffn_dest))
+        # records may still be waiting to be written by the logging thread
+        logging_setup.async_file_handlers.flush()
         ffn_source = logging_setup.logfile.get_name()
         with open(ffn_source, 'rt') as f_source:
             with open(ffn_dest, 'wt') as f_dest:
                 for ln in f_source:
                     f_dest.write(ln)
+
+    def save_displayed_output_as(self):
+        '''save the output which is shown in the log frame, see save_output_history_as for the complete output'''
+        if self.meta_info!=None:
+            fn = self.meta_info['title']
+        else:
+            fn = "youtube-dl-output"
+        path = tkx.get_text(self.frame_main.var_working_directory)
+        ffn_dest = tkFileDialog.asksaveasfilename(
+            title = _("save displayed output as"),
+            initialdir = path,
+            initialfile = fn,
+            defaultextension = '.log',
+            filetypes = (
+                (_("log files"), ".log"),
+                (_("text files"), ".txt"),
+                (_("all files"), ".*"),
+            ),
+        )
+        if ffn_dest=='':
+            log.debug("save displayed output as was canceled by user.")
+            return
+        log.debug("save displayed output as {fn}".format(fn=ffn_dest))
+        with open(ffn_dest, 'wt') as f_dest:
+            self.frame_log.text_log.store.write_to(f_dest)
+
+    def open_output_history(self):
+        if not logging_setup.output_history.exists():
+            log.info("no output has been written yet")
+            return
+        open_directory.open_file(logging_setup.output_history.get_name())
+
+    def save_output_history_as(self):
+        if not logging_setup.output_history.exists():
+            log.info("no output has been written yet")
+            return
+        path = tkx.get_text(self.frame_main.var_working_directory)
+        ffn_dest = tkFileDialog.asksaveasfilename(
+            title = _("save complete output as"),
+            initialdir = path,
+            initialfile = "youtube-dl-output",
+            defaultextension = '.log',
+            filetypes = (
+                (_("log files"), ".log"),
+                (_("text files"), ".txt"),
+                (_("all files"), ".*"),
+            ),
+        )
+        if ffn_dest=='':
+            log.debug("save complete output as was canceled by user.")
+            return
+        log.debug("save complete output as {fn}".format(fn=ffn_dest))
+        shutil.copyfile(logging_setup.output_history.get_name(), ffn_dest)
         
 
     def open_window_cli_help(self, event=None):
@@ -1259,16 +2108,190 @@ http://rg3.github.io/youtube-dl/download.html
             self._on_error_metainfo_download("no source URL given")
             tkMessageBox.showerror(_("No source URL given"), _("Please paste the source URL."))
             return
-        settings = self.frame_main.get_settings()
+        params = self.frame_main.get_settings()
         adapter = self.adapter
-        if adapter.is_running():
-            log.info("killing download-metainfo-subprocess in order to start download")
-            self.kill()
-        adapter.process_params(settings)
-        self._on_finish_listener = self.frame_log.on_subprocess_finished
+        manager = self.download_manager
+        self._show_downloads()
+        archive = self._get_download_archive(params)
+        if params[adapter.MODE] == adapter.MODE_PLAYLIST and self.playlist_entries and settings.setdefault(KEY.PLAYLIST_SPLIT_INTO_SHARDS, True):
+            self._add_playlist_shards(params, archive)
+        elif archive is not None and self._is_downloaded(archive, params):
+            # there is no need to start youtube-dl just to find that out
+            self.log(_("{url} has already been downloaded").format(url=params[adapter.SOURCE_URL]), tags=(self.FrameLog.TAG_FINISHED,))
+        else:
+            info_file = self._save_meta_info_for_download(params)
+            if info_file is not None:
+                params[adapter.LOAD_INFO_JSON] = info_file
+            job = manager.add(params, name=params.get(adapter.SOURCE_URL))
+            if info_file is not None:
+                self._info_files[job.id] = info_file
+        self._poll_downloads(manager)
+
+    def _show_downloads(self):
         self.switch_to_frame(self.frame_log)
-        adapter.start()
-        self._poll_read(adapter)
+        self.frame_log.pack_buttons_before_download()
+        if not self._is_watching_downloads:
+            self._is_watching_downloads = True
+            self._watch(self.download_manager, self._poll_downloads)
+
+    def resume_downloads(self):
+        '''requeue the downloads which had not finished when this program was closed or crashed the last time'''
+        # other instances do not resume the same jobs
+        entries = self.job_journal.claim_unfinished()
+        if not entries:
+            return
+        if not settings.setdefault(KEY.RESUME_UNFINISHED_DOWNLOADS, True):
+            log.info("not resuming {n} unfinished downloads".format(n=len(entries)))
+            for entry in entries:
+                self.job_journal.set_state(entry.id, download_manager.Job.STATE_CANCELLED)
+            return
+        cns = self.adapter
+        self._show_downloads()
+        self.log(_("resuming {n} unfinished downloads").format(n=len(entries)), tags=(self.FrameLog.TAG_WARNING,))
+        for entry in entries:
+            params = dict(entry.params)
+            # the temporary info file has been removed at close
+            params.pop(cns.LOAD_INFO_JSON, None)
+            if params.get(cns.MODE) != cns.MODE_CUSTOM_COMMAND:
+                # continue the .part files instead of downloading the completed bytes again
+                params[cns.FLAG_CONTINUE] = True
+            self.download_manager.add(params, name=entry.name, data=entry.data, journal_id=entry.id)
+        self._poll_downloads(self.download_manager)
+
+    def _get_download_archive(self, params):
+        '''the download_archive.DownloadArchive used for params or None'''
+        ffn = self.adapter.get_download_archive(params)
+        if ffn is None:
+            return None
+        return download_archive.get_archive(ffn)
+
+    def _is_downloaded(self, archive, params):
+        '''True if the single video described by params is contained in archive'''
+        cns = self.adapter
+        url = params[cns.SOURCE_URL].strip()
+        if params[cns.MODE] != cns.MODE_SINGLE_VIDEO or len(url.split()) > 1:
+            return False
+        if self.meta_info is not None and self.meta_info.get('extractor_key') and self.meta_info.get('id'):
+            return archive.contains(self.meta_info['extractor_key'], self.meta_info['id'])
+        key = metainfo_cache.get_key_from_url(url)
+        if key is None:
+            return False
+        return archive.contains_key(key)
+
+    def _add_playlist_shards(self, params, archive=None):
+        '''download a playlist with several processes, each one downloading a range of entries'''
+        cns = self.adapter
+        params.pop(cns.PLAYLIST_ITEMS, None)
+        indices = self.meta_info_display.frame_entries.get_selected_indices()
+        if not indices:
+            indices = range(1, len(self.playlist_entries)+1)
+
+        # a video which is contained several times must not be downloaded by two processes at the same time
+        ids = set()
+        unique_indices = list()
+        downloaded = 0
+        for i in indices:
+            entry = self.playlist_entries[i-1]
+            entry_id = entry.get('id') or entry.get('url')
+            if entry_id in ids:
+                log.info("skipping playlist entry {i} because it is a duplicate".format(i=i))
+                continue
+            ids.add(entry_id)
+            if archive is not None and entry.get('ie_key') and entry.get('id') and archive.contains(entry['ie_key'], entry['id']):
+                downloaded += 1
+                continue
+            unique_indices.append(i)
+        if downloaded > 0:
+            self.log(_("{n} videos of this playlist have already been downloaded").format(n=downloaded), tags=(self.FrameLog.TAG_FINISHED,))
+        if not unique_indices:
+            return
+
+        shard_size = settings.setdefault(KEY.PLAYLIST_SHARD_SIZE, 0)
+        if shard_size <= 0:
+            # several shards per process so that a process which finishes early takes over the remaining shards
+            shard_size = max(1, min(25, -(-len(unique_indices) // (self.download_manager.max_parallel * 4))))
+
+        # the indices are the real playlist indices so that %(playlist_index)s in file names does not depend on the shards.
+        # all shards have the same working directory and therefore the same --download-archive.
+        url = params[cns.SOURCE_URL]
+        for shard, shard_params in adapter.iter_playlist_shards(params, unique_indices, shard_size):
+            items = shard_params[cns.PLAYLIST_ITEMS]
+            # data: the number of videos in this shard
+            self.download_manager.add(shard_params, name="{url} [{items}]".format(url=url, items=items), data=len(shard))
+
+    def _save_meta_info_for_download(self, params):
+        '''write the metainfo to a temporary file for --load-info-json if it is recent enough.
+           returns the name of the file or None.'''
+        cns = self.adapter
+        if self.meta_info is None or not settings.setdefault(KEY.REUSE_METAINFO_FOR_DOWNLOAD, True):
+            return None
+        if params.get(cns.MODE) != cns.MODE_SINGLE_VIDEO or "playlist" in (params.get(cns.ADDITIONAL_OPTIONS) or ""):
+            return None
+        if len(params[cns.SOURCE_URL].split()) > 1:
+            # the info file can hold the metainfo of one video only
+            return None
+        age = time.time() - self._meta_info_time
+        if age > settings.setdefault(KEY.REUSE_METAINFO_MAX_AGE_IN_S, 60*60):
+            log.info("metainfo is {age:.0f} seconds old, downloading with full extraction".format(age=age))
+            return None
+        fd, ffn = tempfile.mkstemp(prefix="youtube-dl-gui-", suffix=".info.json")
+        with io.open(fd, 'wt', encoding='utf-8') as f:
+            f.write(self._meta_info_json)
+        log.debug("saved metainfo to {ffn!r}".format(ffn=ffn))
+        return ffn
+
+    def _remove_info_file(self, job_id):
+        ffn = self._info_files.pop(job_id, None)
+        if ffn is not None:
+            try:
+                os.remove(ffn)
+            except OSError as e:
+                log.warning("failed to remove {ffn!r}: {e}".format(ffn=ffn, e=e))
+
+    def _poll_downloads(self, manager):
+        manager.poll()
+        if manager.is_active():
+            self._schedule_poll(manager, self._poll_downloads, self.POLL_INTERVAL_IN_MS_FOR_DOWNLOAD)
+        else:
+            self._unwatch(manager)
+            self._is_watching_downloads = False
+            self.frame_log.on_downloads_finished()
+
+    def _on_job_output(self, job, lines):
+        prefix = "[{}] ".format(job.id) if len(self.download_manager.jobs) > 1 else ""
+        tags_stderr = (self.FrameLog.TAG_ERROR,)
+        self.log_lines([(prefix+ln, None if flag==job.adapter.STDOUT else tags_stderr) for ln, flag in lines])
+
+    def _on_job_progress(self, job):
+        manager = self.download_manager
+        if manager.count(download_manager.Job.STATE_RUNNING) > 1:
+            self.frame_log.frame_progress.set_progress(manager.get_total_progress())
+        else:
+            self.frame_log.frame_progress.set_progress(job.progress)
+        self.frame_log.frame_jobs.update_job(job)
+
+    def _on_job_state_changed(self, job):
+        self.frame_log.frame_jobs.update_job(job)
+        if job.is_done():
+            self._remove_info_file(job.id)
+            self.frame_log.on_job_finished(job)
+            # youtube-dl has appended the downloaded videos to the archive
+            archive = self._get_download_archive(job.params)
+            if archive is not None:
+                archive.refresh()
+        if job.data is not None:
+            self._update_playlist_count()
+
+    def _update_playlist_count(self):
+        '''show how many videos of all playlist shards have been downloaded'''
+        total = 0
+        done = 0
+        for job in self.download_manager.jobs:
+            if job.data is not None:
+                total += job.data
+                if job.state == download_manager.Job.STATE_FINISHED:
+                    done += job.data
+        self.frame_log.frame_progress.set_count(done, total)
 
     def perform_update(self, event=None):
         #TODO: disable backend-menu while running
@@ -1278,23 +2301,38 @@ http://rg3.github.io/youtube-dl/download.html
         if adapter.is_running():
             log.info("killing download-metainfo-subprocess in order to start backend update")
             self.kill()
-        adapter.set_command_update()
-        adapter.start()
+        self._watch(adapter, self._poll_read)
+        try:
+            adapter.start(adapter.get_command_update())
+        except OSError as e:
+            log.exception(e)
+            self._unwatch(adapter)
+            self.log("{}\n".format(e), tags=(self.FrameLog.TAG_ERROR,))
+            self._on_finish_listener(None)
+            return
         self._poll_read(adapter)
 
     def _poll_read(self, adapter):
         self._read(adapter)
         if adapter.is_finished():
+            self._unwatch(adapter)
+            self._read(adapter)
             self._on_finish_listener(adapter.get_returncode())
         else:
-            adapter._after_id = self.after(self.POLL_INTERVAL_IN_MS_FOR_DOWNLOAD, self._poll_read, adapter)
+            self._schedule_poll(adapter, self._poll_read, self.POLL_INTERVAL_IN_MS_FOR_DOWNLOAD)
     
     def _read(self, adapter):
+        lines = list()
         for ln, flag in adapter.iter_out():
             if flag==adapter.STDOUT:
-                self.log(ln)
+                lines.append((ln, None))
             else:
-                self.log(ln, (self.FrameLog.TAG_ERROR,))
+                lines.append((ln, (self.FrameLog.TAG_ERROR,)))
+        record = adapter.pop_progress()
+        if record is not None:
+            lines.append((record.line, None))
+        if lines:
+            self.log_lines(lines)
 
     def open_download_directory(self, event=None):
         dirpath = self.frame_main.var_working_directory.get()
@@ -1346,16 +2384,38 @@ http://rg3.github.io/youtube-dl/download.html
     def cancel_download(self, event=None):
         self.log(_("cancelling download on behalf of user intervention"), tags=(self.FrameLog.TAG_WARNING,))
         #TODO: kill_in
-        self.kill()
+        if self.adapter.is_running():
+            self.kill()
+        self.download_manager.cancel_all()
     
     def close(self, event=None):
         log.debug("close()")
+        self.cancel_metainfo()
+        if hasattr(self, 'metainfo_prefetcher'):
+            self._cancel_prefetch()
         if self.adapter.is_running():
             log.info("killing subprocess in order to quit program")
             self.kill()
+        if self._download_manager is not None:
+            # the jobs which are still queued or running are resumed on the next start
+            self.download_manager.journal = None
+            self.download_manager.cancel_all()
+            for job_id in list(self._info_files):
+                self._remove_info_file(job_id)
         
+        if self.instance_server is not None:
+            self._unwatch(self.instance_server)
+            self.instance_server.close()
+        if self._metainfo_cache is not None:
+            self._metainfo_cache.close()
+        if self._job_journal is not None:
+            self._job_journal.close()
         self.save_settings()
         logging_setup.logfile.append_end_line() # atexit is not called if executed from IDLE
+        logging_setup.output_history.close()
+        # the output of previous sessions is removed by OutputHistory.remove_stale when it is too old
+        if settings.setdefault(KEY.AUTO_REMOVE_OUTPUT_HISTORY_AT_CLOSE, False):
+            logging_setup.output_history.remove()
         if settings.setdefault(KEY.AUTO_REMOVE_LOG_AT_CLOSE, True):
             try:
                 logging_setup.logfile.remove()
@@ -1382,6 +2442,33 @@ http://rg3.github.io/youtube-dl/download.html
         self.update_settings()
 
 
+    # ---------- other instances ----------
+
+    def listen_for_other_instances(self, server):
+        '''server: a started single_instance.Server'''
+        self.instance_server = server
+        self._watch(server, self._poll_instance_server)
+        self._poll_instance_server(server)
+
+    def _poll_instance_server(self, server):
+        for urls in server.iter_requests():
+            log.info("received urls from other instance: {urls}".format(urls=urls))
+            self.open_urls(urls)
+        self._schedule_poll(server, self._poll_instance_server, self.POLL_INTERVAL_IN_MS_FOR_OTHER_INSTANCES)
+
+    def open_urls(self, urls):
+        '''show urls given on the command line of this or another instance'''
+        self.deiconify()
+        self.lift()
+        self.focus_force()
+        if not urls or not hasattr(self, 'frame_main'):
+            return
+        self.switch_to_frame(self.frame_main)
+        # several urls separated by white space are downloaded by one process
+        tkx.set_text(self.frame_main.entry_source, " ".join(urls))
+        self.request_metainfo()
+
+
 
 # ===== other windows ======
 
@@ -1392,7 +2479,6 @@ class WindowCLIHelp(tk.Tk):
     def __init__(self, adapter):
         tk.Tk.__init__(self)
         self.adapter = adapter.create_new_instance()
-        self.adapter.add_info = False
         self.cursor_manager = tkx.CursorManager(self)
         
         frame = self
@@ -1404,17 +2490,16 @@ class WindowCLIHelp(tk.Tk):
         #self.update() #is done in self._run()
 
     def display_help(self):
-        self.adapter.set_command_print_help()
-        self._run()
+        self._run(self.adapter.get_command_print_help())
     def display_version(self):
-        self.adapter.set_command_print_version()
-        self._run()
+        self._run(self.adapter.get_command_print_version())
 
-    def _run(self):
+    def _run(self, command):
+        command = command._replace(add_info=False)
         self.cursor_manager.set_cursor()
-        self.title(" ".join(self.adapter.cmd))
+        self.title(str(command))
         self.update()
-        self.adapter.start()
+        self.adapter.start(command)
         self._poll_read(self.adapter)
 
     def _read(self, adapter):
@@ -1570,5 +2655,15 @@ if __name__=='__main__':
     import adapter
     #adapter.TEST = True
     a = adapter.Adapter()
+    server = single_instance.Server()
+    if not server.start():
+        server = None
     m = WindowMain(a)
+    startup_profiler.mark("main window created")
+    if server is not None:
+        m.listen_for_other_instances(server)
+    urls = single_instance.get_urls(sys.argv[1:])
+    if urls:
+        m.open_urls(urls)
+    startup_profiler.report_when_idle(m)
     m.mainloop()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+'''
+a persistent record of the download jobs so that they survive a crash.
+
+Every job added to a download_manager.DownloadManager with a journal is
+stored together with it's parameters. All state changes and the
+destination are written immediately. The database is in WAL mode so a
+write is cheap and a crash does not corrupt the journal.
+
+Jobs which have not finished when the program is closed or crashes
+are returned by claim_unfinished on the next start. Jobs which are done
+are kept for keep_done seconds.
+
+Several instances of this program may share the journal. Every job is
+owned by the process which has added or claimed it. close releases
+the unfinished jobs of this process, the jobs of a process which has
+crashed are released by the next claim_unfinished. A job is claimed
+by one instance only.
+'''
+
+# standard libraries
+import os
+import time
+import json
+import sqlite3
+import collections
+import logging
+log = logging.getLogger(__name__)
+
+# other libraries
+import metainfo
+import process_status
+
+
+FN_JOURNAL = "jobs.sqlite"
+
+STATES_DONE = ('finished', 'failed', 'cancelled')
+
+
+Entry = collections.namedtuple('Entry', ('id', 'name', 'params', 'data', 'state', 'destination'))
+
+_COLUMNS_ENTRY = 'id, name, params, data, state, destination'
+_WHERE_UNFINISHED = 'state NOT IN ({})'.format(','.join('?'*len(STATES_DONE)))
+
+
+class JobJournal(object):
+
+    def __init__(self, ffn=None, keep_done=7*24*60*60, owner=None):
+        '''owner: the pid of the process which uses this journal, defaults to the current process'''
+        if ffn is None:
+            ffn = os.path.join(metainfo.PATH_CONFIG, FN_JOURNAL)
+        if owner is None:
+            owner = os.getpid()
+        self.ffn = ffn
+        self.keep_done = keep_done
+        self.owner = owner
+        self._db = None
+
+    def _connect(self):
+        if self._db is None:
+            path = os.path.dirname(self.ffn)
+            if path and not os.path.isdir(path):
+                log.info("creating new directory {path!r} for job journal".format(path=path))
+                os.makedirs(path)
+            self._db = sqlite3.connect(self.ffn)
+            # a committed transaction survives a crash of this program, fsync on checkpoints is enough
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.executescript('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT,
+                    params TEXT NOT NULL,
+                    data TEXT,
+                    state TEXT NOT NULL,
+                    destination TEXT,
+                    time_created REAL NOT NULL,
+                    time_updated REAL NOT NULL,
+                    owner INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state);
+            ''')
+            columns = [row[1] for row in self._db.execute('PRAGMA table_info(jobs)')]
+            if 'owner' not in columns:
+                # journal written by a version without owners, it's jobs are not owned by anyone
+                with self._db:
+                    self._db.execute('ALTER TABLE jobs ADD COLUMN owner INTEGER')
+            with self._db:
+                self._db.execute('DELETE FROM jobs WHERE state IN ({}) AND time_updated < ?'.format(','.join('?'*len(STATES_DONE))),
+                    STATES_DONE + (time.time() - self.keep_done,))
+        return self._db
+
+    def add(self, params, name=None, data=None, state='queued'):
+        '''store a new job and return it's id or None if the journal can not be written.
+           params and data must be serializable as json.'''
+        try:
+            db = self._connect()
+            now = time.time()
+            with db:
+                cur = db.execute('INSERT INTO jobs (name, params, data, state, time_created, time_updated, owner) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (name, json.dumps(params), json.dumps(data), state, now, now, self.owner))
+            return cur.lastrowid
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            log.error("failed to write job journal {ffn!r}: {e}".format(ffn=self.ffn, e=e))
+            return None
+
+    def set_state(self, job_id, state):
+        self._update(job_id, 'state', state)
+
+    def set_destination(self, job_id, destination):
+        self._update(job_id, 'destination', destination)
+
+    def set_params(self, job_id, params):
+        self._update(job_id, 'params', json.dumps(params))
+
+    def _update(self, job_id, column, value):
+        if job_id is None:
+            return
+        try:
+            db = self._connect()
+            with db:
+                db.execute('UPDATE jobs SET {column}=?, time_updated=? WHERE id=?'.format(column=column), (value, time.time(), job_id))
+        except sqlite3.Error as e:
+            log.error("failed to write job journal {ffn!r}: {e}".format(ffn=self.ffn, e=e))
+
+    def get_unfinished(self):
+        '''return a list of Entry objects for all jobs which are queued or have been running, oldest first,
+           no matter which process owns them'''
+        try:
+            rows = self._connect().execute('SELECT {columns} FROM jobs WHERE {unfinished} ORDER BY id'.format(columns=_COLUMNS_ENTRY, unfinished=_WHERE_UNFINISHED),
+                STATES_DONE).fetchall()
+        except sqlite3.Error as e:
+            log.error("failed to read job journal {ffn!r}: {e}".format(ffn=self.ffn, e=e))
+            return []
+        return self._to_entries(rows)
+
+    def claim_unfinished(self):
+        '''take over the unfinished jobs which are not owned by a running process.
+           returns a list of Entry objects, oldest first. Another instance calling this
+           at the same time gets none of the returned jobs.'''
+        try:
+            db = self._connect()
+            with db:
+                # lock the database for writing before reading so that no other instance can claim the same jobs
+                db.execute('BEGIN IMMEDIATE')
+                for owner, in db.execute('SELECT DISTINCT owner FROM jobs WHERE {unfinished} AND owner IS NOT NULL AND owner != ?'.format(unfinished=_WHERE_UNFINISHED),
+                        STATES_DONE + (self.owner,)).fetchall():
+                    if not process_status.is_running(owner):
+                        log.info("releasing unfinished jobs of process {owner} which is not running anymore".format(owner=owner))
+                        db.execute('UPDATE jobs SET owner=NULL WHERE {unfinished} AND owner=?'.format(unfinished=_WHERE_UNFINISHED), STATES_DONE + (owner,))
+                rows = db.execute('SELECT {columns} FROM jobs WHERE {unfinished} AND owner IS NULL ORDER BY id'.format(columns=_COLUMNS_ENTRY, unfinished=_WHERE_UNFINISHED),
+                    STATES_DONE).fetchall()
+                db.execute('UPDATE jobs SET owner=? WHERE {unfinished} AND owner IS NULL'.format(unfinished=_WHERE_UNFINISHED), (self.owner,) + STATES_DONE)
+        except sqlite3.Error as e:
+            log.error("failed to claim unfinished jobs in job journal {ffn!r}: {e}".format(ffn=self.ffn, e=e))
+            return []
+        return self._to_entries(rows)
+
+    def release(self):
+        '''allow other instances to claim the unfinished jobs of this process'''
+        if self._db is None:
+            return
+        try:
+            with self._db:
+                self._db.execute('UPDATE jobs SET owner=NULL WHERE {unfinished} AND owner=?'.format(unfinished=_WHERE_UNFINISHED), STATES_DONE + (self.owner,))
+        except sqlite3.Error as e:
+            log.error("failed to write job journal {ffn!r}: {e}".format(ffn=self.ffn, e=e))
+
+    def _to_entries(self, rows):
+        out = list()
+        for job_id, name, params, data, state, destination in rows:
+            try:
+                out.append(Entry(job_id, name, json.loads(params), json.loads(data) if data is not None else None, state, destination))
+            except ValueError as e:
+                log.error("ignoring invalid job {job_id} in journal: {e}".format(job_id=job_id, e=e))
+        return out
+
+    def close(self):
+        '''release the unfinished jobs and close the database'''
+        self.release()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+if __name__=='__main__':
+    for entry in JobJournal().get_unfinished():
+        print("{e.id:>5} {e.state:<10} {e.name}\n      {e.destination}".format(e=entry))
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+'''
+defers importing a module until one of it's attributes is used.
+
+usage:
+    tkMessageBox = lazy_import.LazyModule('tkinter.messagebox')
+    ...
+    tkMessageBox.showerror(...)  # tkinter.messagebox is imported here
+
+This is meant for modules which are slow to import but are not
+required to show the main window, e.g. dialogs.
+'''
+
+# standard libraries
+import importlib
+import logging
+log = logging.getLogger(__name__)
+
+
+class LazyModule(object):
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        if self._module is None:
+            log.debug("importing {name}".format(name=self._name))
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        # called only for attributes which are not found in this object
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return "<LazyModule {name!r} ({state})>".format(name=self._name, state=state)
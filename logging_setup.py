@@ -25,12 +25,21 @@ metainfo. must specify the following two str constants:
 
 # standard libraries
 import os
+import re
+import time
+import gzip
+import shutil
 import atexit
-import logging, logging.config, json
+import logging, logging.config, logging.handlers, json
+try:
+    import Queue as queue
+except ImportError:
+    import queue
 getLogger = logging.getLogger
 
 # other libraries
 import metainfo
+import process_status
 
 
 # constants
@@ -63,6 +72,163 @@ class DelayedLogger(object):
         return log
 
 
+# read the end of a file without reading all of it
+def read_last_line(ffn, block_size=4096, max_size=64*1024):
+    '''return the last line of ffn which is not empty or an empty str if there is none.
+       at most max_size bytes are read from the end, if the last line is longer it is truncated.'''
+    with open(ffn, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b''
+        while pos > 0 and len(data) < max_size:
+            n = min(block_size, pos)
+            pos -= n
+            f.seek(pos)
+            data = f.read(n) + data
+            line_end = len(data.rstrip(b'\r\n'))
+            i = data.rfind(b'\n', 0, line_end)
+            if i >= 0:
+                return data[i+1:line_end].decode('utf-8', 'replace')
+        return data.rstrip(b'\r\n').decode('utf-8', 'replace')
+
+
+# a log file which does not grow without limit
+class RotatingLogFileHandler(logging.handlers.RotatingFileHandler):
+
+    '''When the file exceeds maxBytes it is renamed to <filename>.1.gz and compressed,
+    the older generations are shifted to <filename>.2.gz and so on.
+    At most backupCount old generations are kept.
+
+    If defer_flush is True emit does not flush the file after every record,
+    whoever sets it is responsible for calling flush (see BatchingQueueListener).'''
+
+    EXT_COMPRESSED = '.gz'
+
+    def __init__(self, filename, mode='a', maxBytes=0, backupCount=0, encoding=None, delay=False, compress=True, defer_flush=False):
+        logging.handlers.RotatingFileHandler.__init__(self, filename, mode=mode, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding, delay=delay)
+        self.defer_flush = defer_flush
+        if compress:
+            self.namer = self.name_compressed
+            self.rotator = self.rotate_compressed
+
+    def emit(self, record):
+        if not self.defer_flush:
+            logging.handlers.RotatingFileHandler.emit(self, record)
+            return
+        # like StreamHandler.emit without the flush
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    @classmethod
+    def name_compressed(cls, default_name):
+        return default_name + cls.EXT_COMPRESSED
+
+    @staticmethod
+    def rotate_compressed(source, dest):
+        with open(source, 'rb') as f_in:
+            with gzip.open(dest, 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+
+# write to the log file in a background thread
+class BatchingQueueListener(logging.handlers.QueueListener):
+
+    '''a QueueListener which flushes it's handlers once for all records which have been
+    queued while it was busy (but at least every MAX_BATCH_SIZE records) and when it is stopped.
+    This saves a system call per record for handlers which do not flush on their own,
+    see RotatingLogFileHandler.defer_flush.
+    The handlers are flushed before the last record of a batch is marked as done,
+    so queue.join() returns when everything has been written.'''
+
+    MAX_BATCH_SIZE = 1000
+
+    def __init__(self, queue, *handlers, **kw):
+        logging.handlers.QueueListener.__init__(self, queue, *handlers, **kw)
+        self._unflushed = 0
+
+    def handle(self, record):
+        logging.handlers.QueueListener.handle(self, record)
+        self._unflushed += 1
+        if self._unflushed >= self.MAX_BATCH_SIZE or self.queue.empty():
+            self.flush()
+
+    def flush(self):
+        for handler in self.handlers:
+            handler.flush()
+        self._unflushed = 0
+
+    def stop(self):
+        '''write all records which have been queued so far and end the thread'''
+        logging.handlers.QueueListener.stop(self)
+        # records which were followed by the sentinel have not been flushed yet
+        self.flush()
+
+
+class AsyncFileHandlers(object):
+
+    '''replaces the file handlers of the configured loggers by QueueHandlers
+    so that logging does not block the thread which is logging (the gui)'''
+
+    def __init__(self):
+        self._listeners = list()
+        # (logger, queue handler, file handler)
+        self._replaced = list()
+
+    def install(self, _log_settings):
+        loggers = [logging.getLogger()]
+        loggers.extend(logging.getLogger(name) for name in _log_settings.get('loggers', ()))
+        queue_handlers = dict()
+        for logger in loggers:
+            for handler in list(logger.handlers):
+                if not isinstance(handler, logging.FileHandler):
+                    continue
+                queue_handler = queue_handlers.get(handler)
+                if queue_handler is None:
+                    q = queue.Queue()
+                    queue_handler = logging.handlers.QueueHandler(q)
+                    queue_handler.setLevel(handler.level)
+                    if isinstance(handler, RotatingLogFileHandler):
+                        handler.defer_flush = True
+                    listener = BatchingQueueListener(q, handler, respect_handler_level=True)
+                    listener.start()
+                    self._listeners.append(listener)
+                    queue_handlers[handler] = queue_handler
+                logger.removeHandler(handler)
+                logger.addHandler(queue_handler)
+                self._replaced.append((logger, queue_handler, handler))
+
+    def is_installed(self):
+        return bool(self._listeners)
+
+    def flush(self):
+        '''block until all records which have been logged so far are written'''
+        for listener in self._listeners:
+            listener.queue.join()
+
+    def uninstall(self):
+        '''write all queued records and log synchronously from now on'''
+        listeners = self._listeners
+        self._listeners = list()
+        for logger, queue_handler, handler in self._replaced:
+            logger.removeHandler(queue_handler)
+        for listener in listeners:
+            listener.stop()
+        for logger, queue_handler, handler in self._replaced:
+            if isinstance(handler, RotatingLogFileHandler):
+                handler.defer_flush = False
+            logger.addHandler(handler)
+        self._replaced = list()
+
+
 # check whether log file is already in use
 class UniqueFilenameCreator(object):
     PATTERN = "_{counter}"
@@ -82,46 +248,79 @@ class UniqueFilenameCreator(object):
     @staticmethod
     def is_filename_usable(ffn):
         if os.path.isfile(ffn):
-            with open(ffn, 'rt') as f:
-                for ln in f:
-                    pass
-                if logfile.END_LINE not in ln:
-                    # log file is (most likely) in use by other currently running instance
-                    return False
+            # the log file may be big, only the end is relevant
+            ln = read_last_line(ffn)
+            if ln and logfile.END_LINE not in ln:
+                # log file is (most likely) in use by other currently running instance
+                return False
         return True
 
 
+# configuration files which have been copied from an older template
+CLASS_OLD_FILE_HANDLER = 'logging.FileHandler'
+CLASS_ROTATING_FILE_HANDLER = 'logging_setup.RotatingLogFileHandler'
+ROTATING_FILE_HANDLER_DEFAULTS = dict(maxBytes=10*1024*1024, backupCount=3)
+
+def migrate_log_settings(_log_settings):
+    '''replace the FileHandlers of older templates by RotatingLogFileHandlers.
+       Older templates opened the log file with mode "w" which truncates the log file
+       when it is opened and lets it grow without limit while it is in use.
+       returns True if _log_settings has been changed.'''
+    changed = False
+    for handler in LogFile.iter_file_handlers(_log_settings):
+        if handler.get('class') != CLASS_OLD_FILE_HANDLER or handler['filename'] in (os.devnull, '/dev/null'):
+            continue
+        handler['class'] = CLASS_ROTATING_FILE_HANDLER
+        handler.pop('mode', None)
+        for key, value in ROTATING_FILE_HANDLER_DEFAULTS.items():
+            handler.setdefault(key, value)
+        changed = True
+    return changed
+
 # read logging configuration file
 def read_logging_configuration_file():
     ffn_log_configuration = metainfo.get_config_ffn(FN_LOGGING_JSON, log=_log)
     _log.log(logging.INFO, "log configuration file location: {ffn}".format(ffn=ffn_log_configuration))
     with open(ffn_log_configuration, 'rt') as f:
         _log_settings = json.load(f)
-        # specify directory for log file if not given
-        _fn_log_file = _log_settings['handlers']['log-file']['filename']
-        if os.path.isabs(_fn_log_file):
-            ffn_log_file = _fn_log_file
-            _log_directory = os.path.split(ffn_log_file)[0]
-        else:
-            _log_directory = metainfo.PATH_LOG
-            ffn_log_file = os.path.join(_log_directory, _fn_log_file)
-        # create directory for log file if not existing
-        if not os.path.isfile(ffn_log_file):
-            if not os.path.isdir(_log_directory):
-                os.makedirs(_log_directory)
-                _log.log(logging.INFO, "created directory for log file: {}".format(_log_directory))
-        # make sure to not use the log file of another currently running instance
-        ffn_log_file = UniqueFilenameCreator(ffn_log_file).create()
-        _log_settings['handlers']['log-file']['filename'] = ffn_log_file
-        _log.log(logging.DEBUG, "log file location: {}".format(ffn_log_file))
-        # configure logging module
-        logging.config.dictConfig(_log_settings)
-        logfile.init(_log_settings)
+    if migrate_log_settings(_log_settings):
+        try:
+            with open(ffn_log_configuration, 'wt') as f:
+                _log.log(logging.INFO, "writing log configuration file (replace {old} by {new}): {ffn}".format(old=CLASS_OLD_FILE_HANDLER, new=CLASS_ROTATING_FILE_HANDLER, ffn=ffn_log_configuration))
+                f.write(json.dumps(_log_settings, indent=4, sort_keys=True))
+        except (IOError, OSError) as e:
+            # the migrated settings are used anyway
+            _log.log(logging.WARNING, "failed to update log configuration file {ffn}: {e}".format(ffn=ffn_log_configuration, e=e))
+    # specify directory for log file if not given
+    _fn_log_file = _log_settings['handlers']['log-file']['filename']
+    if os.path.isabs(_fn_log_file):
+        ffn_log_file = _fn_log_file
+        _log_directory = os.path.split(ffn_log_file)[0]
+    else:
+        _log_directory = metainfo.PATH_LOG
+        ffn_log_file = os.path.join(_log_directory, _fn_log_file)
+    # create directory for log file if not existing
+    if not os.path.isfile(ffn_log_file):
+        if not os.path.isdir(_log_directory):
+            os.makedirs(_log_directory)
+            _log.log(logging.INFO, "created directory for log file: {}".format(_log_directory))
+    # make sure to not use the log file of another currently running instance
+    ffn_log_file = UniqueFilenameCreator(ffn_log_file).create()
+    _log_settings['handlers']['log-file']['filename'] = ffn_log_file
+    _log.log(logging.DEBUG, "log file location: {}".format(ffn_log_file))
+    # configure logging module
+    logging.config.dictConfig(_log_settings)
+    # the log file is appended to, it's last line is the end line of the previous instance.
+    # mark the file as used by this instance before the records are written in the background.
+    logging.getLogger(__name__).log(LEVEL_SENTINEL, LogFile.START_LINE)
+    async_file_handlers.install(_log_settings)
+    logfile.init(_log_settings)
 
 
 # enable/disable log file in log settings (does not take effect until restart)
 class LogFile(object):
 
+    START_LINE = " start of log ".center(30, '=')
     END_LINE = " end of log ".center(30, '=')
 
     @staticmethod
@@ -148,6 +347,16 @@ class LogFile(object):
     def get_directory(self):
         return os.path.split(self.get_name())[0]
 
+    def iter_old_generations(self):
+        '''the file names of the rotated log files, see RotatingLogFileHandler'''
+        path, fn = os.path.split(self.get_name())
+        prefix = fn + '.'
+        if not os.path.isdir(path):
+            return
+        for name in os.listdir(path):
+            if name.startswith(prefix) and name[len(prefix):].split('.')[0].isdigit():
+                yield os.path.join(path, name)
+
     def is_enabled(self):
         return self._is_enabled
     
@@ -196,6 +405,8 @@ class LogFile(object):
 
 
     def append_end_line(self):
+        # the end line must be the last line, it is written synchronously after all queued records
+        async_file_handlers.uninstall()
         if os.path.isfile(self.get_name()):
             _log.log(LEVEL_SENTINEL, self.END_LINE)
 
@@ -203,16 +414,125 @@ class LogFile(object):
     def remove(self):
         if not self._is_enabled:
             return
+        async_file_handlers.uninstall()
         os.remove(self.get_name())
+        for ffn in self.iter_old_generations():
+            os.remove(ffn)
         log_directory = self.get_directory()
         if len(os.listdir(log_directory))==0:
             print("rmdir  {0!r}".format(log_directory))
             os.rmdir(log_directory)
 
 
+# complete output of youtube-dl, the log view in the gui keeps the last lines only
+class OutputHistory(object):
+
+    '''There is one file per process. It is written by a BatchingQueueListener so that write
+    does not block the gui and it is rotated like the log file (see RotatingLogFileHandler).
+    remove_stale keeps the files of the last KEEP_SESSIONS processes which are not running anymore
+    and removes older files.'''
+
+    FN_PATTERN = "youtube-dl-output-{pid}.log"
+    _RE_FN = re.compile(r'^youtube-dl-output-(?P<pid>\d+)\.log(?:\.\d+(?:\.gz)?)?$')
+
+    MAX_BYTES = 10*1024*1024
+    BACKUP_COUNT = 2
+    KEEP_SESSIONS = 5
+    MAX_AGE_IN_S = 7*24*60*60
+
+    def __init__(self, path=None, pid=None):
+        if path is None:
+            path = metainfo.PATH_LOG
+        if pid is None:
+            pid = os.getpid()
+        self._path = path
+        self._pid = pid
+        self._ffn = os.path.join(path, self.FN_PATTERN.format(pid=pid))
+        self._queue_handler = None
+        self._listener = None
+
+    def get_name(self):
+        return self._ffn
+
+    def _open(self):
+        if not os.path.isdir(self._path):
+            os.makedirs(self._path)
+        handler = RotatingLogFileHandler(self._ffn, maxBytes=self.MAX_BYTES, backupCount=self.BACKUP_COUNT, encoding='utf-8', delay=True, defer_flush=True)
+        handler.terminator = ''
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        q = queue.Queue()
+        self._queue_handler = logging.handlers.QueueHandler(q)
+        self._listener = BatchingQueueListener(q, handler)
+        self._listener.start()
+
+    def write(self, text):
+        if self._listener is None:
+            self._open()
+        self._queue_handler.emit(logging.makeLogRecord(dict(msg=text)))
+
+    def flush(self):
+        '''block until everything which has been passed to write is written'''
+        if self._listener is not None:
+            self._listener.queue.join()
+
+    def exists(self):
+        self.flush()
+        return os.path.isfile(self._ffn)
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
+            self._queue_handler = None
+
+    def iter_files(self, pid=None):
+        '''yield (pid, ffn) for the files of all processes or of process pid, including rotated files'''
+        if not os.path.isdir(self._path):
+            return
+        for name in os.listdir(self._path):
+            m = self._RE_FN.match(name)
+            if m is not None and (pid is None or int(m.group('pid')) == pid):
+                yield int(m.group('pid')), os.path.join(self._path, name)
+
+    def remove(self):
+        self.close()
+        for pid, ffn in list(self.iter_files(self._pid)):
+            os.remove(ffn)
+
+    def remove_stale(self, now=None):
+        '''remove the files of processes which are not running anymore if they are too old or too many'''
+        if now is None:
+            now = time.time()
+        sessions = dict()
+        for pid, ffn in self.iter_files():
+            if pid == self._pid or process_status.is_running(pid):
+                continue
+            try:
+                mtime = os.path.getmtime(ffn)
+            except OSError:
+                continue
+            files, last_modified = sessions.get(pid, ([], 0))
+            files.append(ffn)
+            sessions[pid] = (files, max(last_modified, mtime))
+        newest_first = sorted(sessions.values(), key=lambda session: session[1], reverse=True)
+        for i, (files, last_modified) in enumerate(newest_first):
+            if i < self.KEEP_SESSIONS and now - last_modified <= self.MAX_AGE_IN_S:
+                continue
+            for ffn in files:
+                try:
+                    os.remove(ffn)
+                except OSError as e:
+                    logging.getLogger(__name__).warning("failed to remove old output history %r: %s", ffn, e)
+
+
 # execute
 _log = DelayedLogger()
+async_file_handlers = AsyncFileHandlers()
 logfile = LogFile()
+output_history = OutputHistory()
 read_logging_configuration_file()
 _log = _log.write(logging.getLogger(__name__))
+output_history.remove_stale()
 atexit.register(logfile.append_end_line) # gui.WindowMain.close is not called for example when program is closed via Keyboard Interrupt
@@ -39,9 +39,11 @@ _PATH_TEMPLATES = os.path.join(_PATH_SELF, "templates")
 if _stay_local:
     PATH_CONFIG = os.path.join(_PATH_SELF, "config")
     PATH_LOG    = os.path.join(_PATH_SELF, "log")
+    PATH_CACHE  = os.path.join(_PATH_SELF, "cache")
 else:
     PATH_CONFIG = appdirs.user_data_dir(APP_NAME, APP_AUTHOR)
     PATH_LOG    = appdirs.user_log_dir(APP_NAME, APP_AUTHOR)
+    PATH_CACHE  = appdirs.user_cache_dir(APP_NAME, APP_AUTHOR)
     
 
 def get_config_ffn(fn, create=False, log=log):
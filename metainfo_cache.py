@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+'''
+an on-disk cache for the metainfo printed by youtube-dl --dump-json.
+
+Entries are keyed by extractor and video id (e.g. "youtube:dQw4w9WgXcQ")
+so that different urls of the same video share one entry. For well known
+sites the key is derived from the url directly, for all other sites the
+url (without tracking parameters) is remembered as an alias of the key
+reported by youtube-dl.
+
+Entries expire after ttl seconds. If there are more than max_entries
+entries the least recently used ones are removed.
+'''
+
+# standard libraries
+import os
+import re
+import time
+import json
+import sqlite3
+import logging
+log = logging.getLogger(__name__)
+try:
+    from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+except ImportError:
+    from urlparse import urlsplit, urlunsplit, parse_qsl
+    from urllib import urlencode
+
+# other libraries
+import metainfo
+
+
+FN_CACHE = "metainfo-cache.sqlite"
+
+# query parameters which do not change which video an url refers to
+_TRACKING_PARAMETERS = ('feature', 'si', 'pp', 'ab_channel', 'fbclid', 'gclid', 't', 'start')
+_TRACKING_PREFIXES = ('utm_',)
+
+_RE_YOUTUBE = re.compile(r'''
+    ^(?:https?://)?(?:[a-z0-9-]+\.)?
+    (?:
+        youtu\.be/(?P<id_short>[0-9A-Za-z_-]{11})
+    |
+        youtube(?:-nocookie)?\.com/
+        (?:
+            (?:watch|watch_popup)/?\?(?:.*&)?v=(?P<id_query>[0-9A-Za-z_-]{11})
+        |
+            (?:embed|v|shorts|live)/(?P<id_path>[0-9A-Za-z_-]{11})
+        )
+    )
+    (?:[?&#/]|$)''', re.VERBOSE)
+
+
+def get_key(extractor, video_id):
+    return "{}:{}".format(extractor.lower(), video_id)
+
+def get_key_from_metainfo(info):
+    '''return the key for the json object printed by youtube-dl or None'''
+    extractor = info.get('extractor_key') or info.get('extractor')
+    video_id = info.get('id')
+    if not extractor or not video_id:
+        return None
+    return get_key(extractor, video_id)
+
+def get_key_from_url(url):
+    '''return the key if it can be determined without asking youtube-dl, None otherwise'''
+    m = _RE_YOUTUBE.match(url.strip())
+    if m is None:
+        return None
+    return get_key('youtube', m.group('id_short') or m.group('id_query') or m.group('id_path'))
+
+def normalize_url(url):
+    '''remove the scheme, the fragment and all tracking parameters so that equivalent urls compare equal'''
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in _TRACKING_PARAMETERS and not k.startswith(_TRACKING_PREFIXES)]
+    query.sort()
+    netloc = parts.netloc.lower()
+    if netloc.startswith('www.'):
+        netloc = netloc[len('www.'):]
+    return urlunsplit(('', netloc, parts.path.rstrip('/'), urlencode(query), ''))
+
+
+class MetainfoCache(object):
+
+    def __init__(self, ffn=None, ttl=24*60*60, max_entries=1000):
+        if ffn is None:
+            ffn = os.path.join(metainfo.PATH_CACHE, FN_CACHE)
+        self.ffn = ffn
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._db = None
+
+    def _connect(self):
+        if self._db is None:
+            path = os.path.dirname(self.ffn)
+            if path and not os.path.isdir(path):
+                log.info("creating new directory {path!r} for metainfo cache".format(path=path))
+                os.makedirs(path)
+            self._db = sqlite3.connect(self.ffn)
+            self._db.executescript('''
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    raw TEXT NOT NULL,
+                    time_fetched REAL NOT NULL,
+                    time_used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS entries_time_used ON entries (time_used);
+                CREATE TABLE IF NOT EXISTS aliases (
+                    url TEXT PRIMARY KEY,
+                    key TEXT NOT NULL
+                );
+            ''')
+        return self._db
+
+    def _find_key(self, db, url):
+        key = get_key_from_url(url)
+        if key is not None:
+            return key
+        row = db.execute('SELECT key FROM aliases WHERE url=?', (normalize_url(url),)).fetchone()
+        if row is None:
+            return None
+        return row[0]
+
+    def get(self, url):
+        '''return the raw output of youtube-dl --dump-json for url or None if it is not cached or has expired'''
+        entry = self.get_entry(url)
+        if entry is None:
+            return None
+        return entry[0]
+
+    def get_entry(self, url):
+        '''like get but returns a tuple (raw, time_fetched)'''
+        try:
+            db = self._connect()
+            return self._get_entry(db, self._find_key(db, url))
+        except sqlite3.Error as e:
+            log.error("failed to read metainfo cache {ffn!r}: {e}".format(ffn=self.ffn, e=e))
+            return None
+
+    def get_entry_by_key(self, key):
+        '''like get_entry but for a key as returned by get_key'''
+        try:
+            return self._get_entry(self._connect(), key)
+        except sqlite3.Error as e:
+            log.error("failed to read metainfo cache {ffn!r}: {e}".format(ffn=self.ffn, e=e))
+            return None
+
+    def _get_entry(self, db, key):
+        if key is None:
+            return None
+        row = db.execute('SELECT raw, time_fetched FROM entries WHERE key=?', (key,)).fetchone()
+        if row is None:
+            return None
+        raw, time_fetched = row
+        now = time.time()
+        with db:
+            if now - time_fetched > self.ttl:
+                log.debug("metainfo for {key} has expired".format(key=key))
+                db.execute('DELETE FROM entries WHERE key=?', (key,))
+                return None
+            db.execute('UPDATE entries SET time_used=? WHERE key=?', (now, key))
+        log.debug("metainfo for {key} found in cache".format(key=key))
+        return raw, time_fetched
+
+    def put(self, url, raw, info=None):
+        '''store raw, the output of youtube-dl --dump-json for url. info is the parsed json if available.
+           url may be None if it refers to more than this video.'''
+        if info is None:
+            info = json.loads(raw)
+        key = get_key_from_metainfo(info)
+        if key is None:
+            log.warning("metainfo of {url!r} has no extractor or id, not caching it".format(url=url or info.get('webpage_url')))
+            return
+        try:
+            db = self._connect()
+            now = time.time()
+            with db:
+                db.execute('INSERT OR REPLACE INTO entries (key, raw, time_fetched, time_used) VALUES (?, ?, ?, ?)', (key, raw, now, now))
+                if url is not None and get_key_from_url(url) != key:
+                    db.execute('INSERT OR REPLACE INTO aliases (url, key) VALUES (?, ?)', (normalize_url(url), key))
+                self._evict(db)
+        except sqlite3.Error as e:
+            log.error("failed to write metainfo cache {ffn!r}: {e}".format(ffn=self.ffn, e=e))
+
+    def remove(self, url):
+        try:
+            db = self._connect()
+            key = self._find_key(db, url)
+            if key is not None:
+                with db:
+                    db.execute('DELETE FROM entries WHERE key=?', (key,))
+        except sqlite3.Error as e:
+            log.error("failed to write metainfo cache {ffn!r}: {e}".format(ffn=self.ffn, e=e))
+
+    def _evict(self, db):
+        db.execute('DELETE FROM entries WHERE time_fetched < ?', (time.time() - self.ttl,))
+        db.execute('''DELETE FROM entries WHERE key IN (
+            SELECT key FROM entries ORDER BY time_used DESC LIMIT -1 OFFSET ?)''', (self.max_entries,))
+        db.execute('DELETE FROM aliases WHERE key NOT IN (SELECT key FROM entries)')
+
+    def clear(self):
+        try:
+            db = self._connect()
+            with db:
+                db.execute('DELETE FROM entries')
+                db.execute('DELETE FROM aliases')
+        except sqlite3.Error as e:
+            log.error("failed to clear metainfo cache {ffn!r}: {e}".format(ffn=self.ffn, e=e))
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+if __name__=='__main__':
+    import sys
+    for url in sys.argv[1:]:
+        print("{url}\n    key: {key}\n    normalized: {normalized}".format(url=url, key=get_key_from_url(url), normalized=normalize_url(url)))
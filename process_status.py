@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+'''
+is_running(pid) checks whether another process is still alive,
+e.g. to find files and jobs which have been left behind by a crashed instance.
+'''
+
+# standard libraries
+import os
+import logging
+log = logging.getLogger(__name__)
+
+# other libraries
+import which_os_am_i_on as os_is
+
+if os_is.windows():
+    import ctypes
+    _PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    _STILL_ACTIVE = 259
+    _ERROR_ACCESS_DENIED = 5
+    def is_running(pid):
+        # os.kill would terminate the process on windows
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            # the process exists but belongs to another user
+            return ctypes.get_last_error() == _ERROR_ACCESS_DENIED
+        try:
+            exit_code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+                return True
+            return exit_code.value == _STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+else:
+    def is_running(pid):
+        try:
+            os.kill(pid, 0)
+        except PermissionError:
+            # the process exists but belongs to another user
+            return True
+        except OSError:
+            return False
+        return True
+
+
+if __name__=='__main__':
+    import sys
+    for pid in sys.argv[1:]:
+        print("{pid}: {state}".format(pid=pid, state="running" if is_running(int(pid)) else "not running"))
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+'''
+parses the progress lines printed by youtube-dl, e.g.
+    [download]  42.1% of 312.45MiB at  3.20MiB/s ETA 01:12
+    [download]  42.1% of ~312.45MiB at  3.20MiB/s ETA 01:12 (frag 12/120)
+    [download]   12.00MiB at  3.20MiB/s (00:03)
+    [download] 100% of 312.45MiB in 01:40
+'''
+
+# standard libraries
+import re
+
+
+_SIZE = r'[\d.]+(?:[KMGTPEZY]i?)?B'
+
+_RE_PROGRESS = re.compile(r'''
+    \s*(?:\x1b\[K)?\[download\]\s+
+    (?=[\d.]+%|Unknown\ %|''' + _SIZE + r''')
+    (?:(?P<percent>[\d.]+)%|Unknown\ %)?\s*
+    (?:of\s+(?P<estimate>~)?\s*(?P<total>''' + _SIZE + r''')\s*)?
+    (?P<downloaded>''' + _SIZE + r''')?\s*
+    (?:at\s+(?:(?P<speed>''' + _SIZE + r''')/s|Unknown\ speed)\s*)?
+    (?:ETA\s+(?:(?P<eta>[\d:]+)|Unknown\ ETA)\s*)?
+    (?:in\s+(?P<elapsed>[\d:]+)\s*)?
+    (?:\((?P<elapsed_unknown_total>[\d:]+)\)\s*)?
+    (?:\(frag\s+(?P<fragment_index>\d+)/(?P<fragment_count>\d+)\)\s*)?
+    $''', re.VERBOSE)
+
+_UNITS = 'BKMGTPEZY'
+
+
+def parse_bytes(text):
+    '''"312.45MiB" -> 327624294.4'''
+    if text is None:
+        return None
+    i = len(text) - 1
+    while not text[i-1].isdigit():
+        i -= 1
+    number, unit = text[:i], text[i:]
+    base = 1024 if 'i' in unit else 1000
+    return float(number) * base ** _UNITS.index(unit[0])
+
+def parse_duration(text):
+    '''"1:01:12" -> 3672'''
+    if text is None:
+        return None
+    seconds = 0
+    for part in text.split(':'):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+def format_bytes(number):
+    '''327624294.4 -> "312.45MiB"'''
+    if number is None:
+        return None
+    exponent = 0
+    while number >= 1024 and exponent < len(_UNITS) - 1:
+        number /= 1024.
+        exponent += 1
+    if exponent == 0:
+        return "{:.0f}B".format(number)
+    return "{:.2f}{}iB".format(number, _UNITS[exponent])
+
+def format_duration(seconds):
+    '''3672 -> "1:01:12"'''
+    if seconds is None:
+        return None
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours > 0:
+        return "{}:{:02d}:{:02d}".format(hours, minutes, seconds)
+    return "{:02d}:{:02d}".format(minutes, seconds)
+
+def _parse_int(text):
+    if text is None:
+        return None
+    return int(text)
+
+
+class Progress(object):
+
+    '''The state of a download as reported by one progress line.
+    All values are None if they are unknown. Sizes are in bytes, durations in seconds.'''
+
+    __slots__ = ('percent', 'total_bytes', 'is_estimate', 'downloaded_bytes', 'speed', 'eta', 'fragment_index', 'fragment_count', 'line')
+
+    def __init__(self, **kw):
+        for key in self.__slots__:
+            setattr(self, key, kw.pop(key, None))
+        if kw:
+            raise TypeError("unexpected keyword arguments: {}".format(", ".join(kw)))
+
+    @classmethod
+    def from_match(cls, match):
+        d = match.groupdict()
+        self = cls()
+        self.percent = float(d['percent']) if d['percent'] is not None else None
+        self.total_bytes = parse_bytes(d['total'])
+        self.is_estimate = d['estimate'] is not None
+        self.downloaded_bytes = parse_bytes(d['downloaded'])
+        if self.downloaded_bytes is None and self.total_bytes is not None and self.percent is not None:
+            self.downloaded_bytes = self.total_bytes * self.percent / 100
+        self.speed = parse_bytes(d['speed'])
+        self.eta = parse_duration(d['eta'])
+        if d['elapsed'] is not None:
+            self.eta = 0
+        self.fragment_index = _parse_int(d['fragment_index'])
+        self.fragment_count = _parse_int(d['fragment_count'])
+        self.line = match.string
+        return self
+
+    def is_finished(self):
+        return self.percent is not None and self.percent >= 100
+
+    def __repr__(self):
+        return "<Progress {}>".format(", ".join("{}={!r}".format(key, getattr(self, key)) for key in self.__slots__ if key!='line'))
+
+
+def match(line):
+    '''return a match object if line is a progress line, None otherwise.
+       matching is cheap, Progress.from_match does the conversion.'''
+    return _RE_PROGRESS.match(line)
+
+def parse(line):
+    '''return a Progress object if line is a progress line, None otherwise'''
+    m = _RE_PROGRESS.match(line)
+    if m is None:
+        return None
+    return Progress.from_match(m)
+
+def aggregate(records):
+    '''combine the progress of several downloads which are running at the same time into one Progress object'''
+    total = Progress(total_bytes=0, downloaded_bytes=0, speed=0, eta=0, is_estimate=False)
+    for r in records:
+        if r.total_bytes is None or r.downloaded_bytes is None:
+            total.is_estimate = True
+        else:
+            total.total_bytes += r.total_bytes
+            total.downloaded_bytes += r.downloaded_bytes
+            total.is_estimate = total.is_estimate or r.is_estimate
+        if r.speed is not None:
+            total.speed += r.speed
+        if r.eta is not None:
+            total.eta = max(total.eta, r.eta)
+    if total.total_bytes > 0:
+        total.percent = 100. * total.downloaded_bytes / total.total_bytes
+    return total
+
+
+if __name__=='__main__':
+    for ln in __doc__.strip().splitlines()[1:]:
+        print(parse(ln))
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+'''
+passes the urls of a second launch to the instance which is running already.
+
+The first instance listens on a Unix domain socket. When the program
+is started again hand_over connects to that socket, sends the urls
+given on the command line and the new process can exit immediately,
+before tkinter and the rest of the program have been imported.
+
+A request is one line of json: {"urls": [...]}. It is answered with
+"ok\\n" as soon as the running instance has queued it.
+
+This module is imported before anything else, it must be fast to import.
+Start the program with --new-instance to skip the handoff.
+'''
+
+# standard libraries
+import os
+import sys
+import json
+import socket
+import threading
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+import logging
+log = logging.getLogger(__name__)
+
+
+ARG_NEW_INSTANCE = '--new-instance'
+
+FN_SOCKET = "youtube-dl-gui.sock"
+MAX_REQUEST_SIZE = 1024*1024
+
+
+def is_supported():
+    return os.name == 'posix' and hasattr(socket, 'AF_UNIX')
+
+def get_socket_path():
+    '''the socket is in a directory which is accessible by the current user only'''
+    path = os.environ.get('XDG_RUNTIME_DIR')
+    if not path or not os.path.isdir(path):
+        path = os.path.join(os.environ.get('TMPDIR') or '/tmp', "youtube-dl-gui-{uid}".format(uid=os.getuid()))
+        if not os.path.isdir(path):
+            os.mkdir(path, 0o700)
+        st = os.stat(path)
+        if st.st_uid != os.getuid() or st.st_mode & 0o077:
+            raise OSError("{path!r} is not private".format(path=path))
+    return os.path.join(path, FN_SOCKET)
+
+def get_urls(argv):
+    '''the urls given on the command line'''
+    return [arg for arg in argv if not arg.startswith('-')]
+
+
+# ---------- second instance ----------
+
+def hand_over(argv, timeout=1.):
+    '''send the urls in argv to the running instance.
+       returns True if it has accepted them, in that case this process should exit.'''
+    if not is_supported() or ARG_NEW_INSTANCE in argv:
+        return False
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(get_socket_path())
+        request = json.dumps(dict(urls=get_urls(argv))) + "\n"
+        sock.sendall(request.encode('utf-8'))
+        reply = sock.makefile('rb').readline()
+    except (OSError, socket.error):
+        # no instance is running or it does not respond
+        return False
+    finally:
+        sock.close()
+    return reply.strip() == b'ok'
+
+
+# ---------- first instance ----------
+
+class Server(object):
+
+    '''receives the urls of other instances in a background thread.
+       it can be watched like an adapter.Adapter: the listener is notified from the
+       background thread whenever a request has arrived, iter_requests returns them.'''
+
+    def __init__(self, ffn=None):
+        self.ffn = ffn
+        self._sock = None
+        self._ino = None
+        self._queue = queue.Queue()
+        self._listener = None
+
+    def start(self):
+        '''returns False if another instance is listening already or this is not supported'''
+        if not is_supported():
+            return False
+        if self.ffn is None:
+            try:
+                self.ffn = get_socket_path()
+            except OSError as e:
+                log.error("not listening for other instances: {e}".format(e=e))
+                return False
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(self.ffn)
+        except (OSError, socket.error):
+            if self._is_alive():
+                log.info("another instance is listening on {ffn!r} already".format(ffn=self.ffn))
+                sock.close()
+                return False
+            # left over by an instance which has crashed
+            log.info("removing stale socket {ffn!r}".format(ffn=self.ffn))
+            os.remove(self.ffn)
+            sock.bind(self.ffn)
+        self._ino = os.stat(self.ffn).st_ino
+        sock.listen(5)
+        self._sock = sock
+        thread = threading.Thread(target=self._run)
+        thread.daemon = True
+        thread.start()
+        log.info("listening for other instances on {ffn!r}".format(ffn=self.ffn))
+        return True
+
+    def _is_alive(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(0.2)
+            sock.connect(self.ffn)
+            return True
+        except (OSError, socket.error):
+            return False
+        finally:
+            sock.close()
+
+    # executed in the background thread
+    def _run(self):
+        while True:
+            try:
+                conn, address = self._sock.accept()
+            except (OSError, socket.error, AttributeError):
+                # closed
+                return
+            try:
+                conn.settimeout(1.)
+                request = conn.makefile('rb').readline(MAX_REQUEST_SIZE)
+                if not request:
+                    # a connection to check whether this instance is alive
+                    continue
+                urls = json.loads(request.decode('utf-8'))['urls']
+                self._queue.put([str(url) for url in urls])
+                conn.sendall(b"ok\n")
+            except (OSError, socket.error, ValueError, KeyError, TypeError) as e:
+                log.error("invalid request from other instance: {e}".format(e=e))
+            finally:
+                conn.close()
+            self._notify_output_listener()
+
+    def _notify_output_listener(self):
+        # the reference to the listener must not be kept by this thread:
+        # a Tcl interpreter must not be deleted by another thread than the one which has created it
+        listener = self._listener
+        if listener is not None:
+            listener()
+
+    def set_output_listener(self, listener):
+        '''listener is called without arguments from the background thread when a request has arrived'''
+        self._listener = listener
+
+    def is_eof(self):
+        return False
+
+    def iter_requests(self):
+        '''iterate over the lists of urls received since the last call without blocking'''
+        while not self._queue.empty():
+            yield self._queue.get()
+
+    def close(self):
+        sock = self._sock
+        if sock is None:
+            return
+        self._sock = None
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except (OSError, socket.error):
+            pass
+        sock.close()
+        try:
+            # do not remove the socket of an instance which has replaced a stale socket of ours
+            if os.stat(self.ffn).st_ino == self._ino:
+                os.remove(self.ffn)
+        except OSError:
+            pass
+
+
+if __name__=='__main__':
+    if hand_over(sys.argv[1:]):
+        print("handed over to running instance")
+    else:
+        print("no instance is running")
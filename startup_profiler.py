@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+'''
+reports how the time to start the program is spent.
+
+Enabled with the command line argument --profile-startup or by setting
+the environment variable YOUTUBE_DL_GUI_PROFILE_STARTUP=1. It must be
+enabled before anything else is imported. Afterwards
+    * every import which loads at least one new module is timed
+      (cumulative and self time, nested like python -X importtime) and
+    * mark(name) records the end of a phase of the start.
+report() prints the timeline on stderr. report_when_idle(root) does
+so as soon as the first frame has been painted.
+
+This module must not import anything which is slow to import itself.
+If profiling is disabled mark and report_when_idle do nothing.
+'''
+
+# standard libraries
+import os
+import sys
+import time
+import threading
+try:
+    import builtins
+except ImportError:
+    # Python 2
+    import __builtin__ as builtins
+
+
+ARG = '--profile-startup'
+ENV = 'YOUTUBE_DL_GUI_PROFILE_STARTUP'
+
+_t0 = time.time()
+_is_enabled = False
+_original_import = None
+_main_thread = None
+
+# (t_start, duration, children_duration, depth, name)
+_imports = list()
+# (t, name)
+_phases = list()
+_stack = list()
+
+
+def is_requested(argv=None):
+    if argv is None:
+        argv = sys.argv
+    return ARG in argv or os.environ.get(ENV, '') not in ('', '0')
+
+def remove_arg(argv):
+    '''argv without ARG, e.g. for passing the arguments on to another instance which should not be profiled'''
+    return [arg for arg in argv if arg != ARG]
+
+def is_enabled():
+    return _is_enabled
+
+def enable_if_requested():
+    if is_requested():
+        enable()
+
+def enable():
+    global _is_enabled, _original_import, _main_thread
+    if _is_enabled:
+        return
+    _is_enabled = True
+    _main_thread = threading.current_thread()
+    _original_import = builtins.__import__
+    builtins.__import__ = _import
+    mark("profiler enabled")
+
+def disable():
+    global _is_enabled
+    if not _is_enabled:
+        return
+    builtins.__import__ = _original_import
+    _is_enabled = False
+
+
+def _import(name, *args, **kw):
+    if threading.current_thread() is not _main_thread:
+        return _original_import(name, *args, **kw)
+    n_modules = len(sys.modules)
+    record = [time.time(), None, 0., len(_stack), name]
+    _stack.append(record)
+    try:
+        return _original_import(name, *args, **kw)
+    finally:
+        _stack.pop()
+        record[1] = time.time() - record[0]
+        if _stack:
+            _stack[-1][2] += record[1]
+        # imports of modules which have been loaded already are not interesting
+        if len(sys.modules) != n_modules:
+            # importlib moves a module to the end of sys.modules when it has been executed,
+            # so the last one is the module imported here (with it's absolute name, even for relative imports)
+            record[4] = list(sys.modules)[-1]
+            _imports.append(record)
+
+
+def mark(name):
+    '''record that the phase called name has ended'''
+    if _is_enabled:
+        _phases.append((time.time(), name))
+
+def report_when_idle(widget):
+    '''print the report as soon as the Tk event loop of widget is idle, i.e. the first frame has been painted'''
+    if not _is_enabled:
+        return
+    def on_idle():
+        widget.update_idletasks()
+        mark("first frame painted")
+        report()
+    widget.after_idle(on_idle)
+
+def report(out=None, min_ms=1., n_slowest=15):
+    '''print the timeline of phases and imports. imports taking less than min_ms milliseconds are omitted.'''
+    disable()
+    if out is None:
+        out = sys.stderr
+    ms = lambda seconds: seconds * 1000.
+
+    out.write("===== startup profile (times in ms since {name} has been imported) =====\n".format(name=__name__))
+    out.write("phases:\n")
+    t_last = _t0
+    for t, name in _phases:
+        out.write("  {t:9.1f}  {dt:+9.1f}  {name}\n".format(t=ms(t-_t0), dt=ms(t-t_last), name=name))
+        t_last = t
+
+    out.write("imports (start, cumulative, self):\n")
+    for t, duration, children, depth, name in sorted(_imports, key=lambda r: r[0]):
+        if ms(duration) < min_ms:
+            continue
+        out.write("  {t:9.1f}  {cum:9.1f}  {own:9.1f}  {indent}{name}\n".format(t=ms(t-_t0), cum=ms(duration), own=ms(duration-children), indent="  "*depth, name=name))
+
+    out.write("slowest imports (self time):\n")
+    for t, duration, children, depth, name in sorted(_imports, key=lambda r: r[1]-r[2], reverse=True)[:n_slowest]:
+        out.write("  {own:9.1f}  {name}\n".format(own=ms(duration-children), name=name))
+    out.flush()
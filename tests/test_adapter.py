@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+
+# standard libraries
+import os
+import json
+import threading
+import unittest
+
+# other libraries
+import adapter
+
+
+class TestLineReader(unittest.TestCase):
+
+    def test_split_at_newline_and_carriage_return(self):
+        reader = adapter.LineReader(None)
+        lines = reader.feed(b"[download]  1.0% of 10MiB\r[download]  2.0% of 10MiB\rdone\nrest")
+        self.assertEqual(lines, ["[download]  1.0% of 10MiB\r", "[download]  2.0% of 10MiB\r", "done\n"])
+        self.assertEqual(reader.flush(), "rest")
+
+    def test_crlf(self):
+        reader = adapter.LineReader(None)
+        # "\r\n" is a line end followed by an empty line, the gui ignores empty lines
+        self.assertEqual(reader.feed(b"a\r\nb\n"), ["a\r", "\n", "b\n"])
+
+    def test_line_split_across_chunks(self):
+        reader = adapter.LineReader(None)
+        self.assertEqual(reader.feed(b"first li"), [])
+        self.assertEqual(reader.feed(b"ne\nsecond"), ["first line\n"])
+        self.assertEqual(reader.feed(b" line\r"), ["second line\r"])
+        self.assertEqual(reader.flush(), "")
+
+    def test_long_line_in_many_chunks(self):
+        # the incomplete line must not be copied for every chunk, that would take minutes
+        reader = adapter.LineReader(None)
+        n = 200000
+        for i in range(n):
+            self.assertEqual(reader.feed(b"x"), [])
+        self.assertEqual(reader.feed(b"\ry"), ["x"*n + "\r"])
+        self.assertEqual(reader.flush(), "y")
+
+    def test_multibyte_character_split_across_chunks(self):
+        reader = adapter.LineReader(None)
+        data = "äöü €\n".encode('utf-8')
+        lines = list()
+        for i in range(len(data)):
+            lines.extend(reader.feed(data[i:i+1]))
+        self.assertEqual(lines, ["äöü €\n"])
+
+    def test_invalid_bytes_are_replaced(self):
+        reader = adapter.LineReader(None)
+        self.assertEqual(reader.feed(b"a\xffb\n"), ["a\ufffdb\n"])
+
+    def test_iterate_pipe(self):
+        data = b"".join("[download] {:5.1f}%\r".format(i/10.).encode('utf-8') for i in range(1000)) + "Destination: ä.mp4\n".encode('utf-8')
+        # larger than CHUNK_SIZE so that lines and characters are split across chunks
+        data = data * (adapter.LineReader.CHUNK_SIZE // len(data) + 2) + b"no line end"
+        fd_read, fd_write = os.pipe()
+        def write():
+            with os.fdopen(fd_write, 'wb') as f:
+                f.write(data)
+        thread = threading.Thread(target=write)
+        thread.start()
+        try:
+            lines = list(adapter.LineReader(fd_read))
+        finally:
+            thread.join()
+            os.close(fd_read)
+        self.assertEqual("".join(lines), data.decode('utf-8'))
+        self.assertEqual(len(lines), data.count(b"\r") + data.count(b"\n") + 1)
+        self.assertEqual(lines[-1], "no line end")
+
+
+@unittest.skipUnless(adapter.Multiplexer.is_supported(), "selectors do not support pipes on this platform")
+class TestMultiplexer(unittest.TestCase):
+
+    TIMEOUT = 5
+
+    def open_pipe(self):
+        fd_read, fd_write = os.pipe()
+        self.addCleanup(os.close, fd_read)
+        return fd_read, fd_write
+
+    def test_exception_in_callback_stops_only_the_failing_stream(self):
+        multiplexer = adapter.Multiplexer()
+        fd_bad, fd_bad_write = self.open_pipe()
+        fd_good, fd_good_write = self.open_pipe()
+        eof_bad = threading.Event()
+        eof_good = threading.Event()
+        lines_good = list()
+        def raise_error(lines):
+            raise RuntimeError("bug in callback")
+
+        with self.assertLogs('adapter', 'ERROR'):
+            multiplexer.register(adapter.LineReader(fd_bad), raise_error, eof_bad.set)
+            multiplexer.register(adapter.LineReader(fd_good), lines_good.extend, eof_good.set)
+            os.write(fd_bad_write, b"a\n")
+            self.assertTrue(eof_bad.wait(self.TIMEOUT))
+
+        os.write(fd_good_write, b"b\n")
+        os.close(fd_good_write)
+        self.assertTrue(eof_good.wait(self.TIMEOUT))
+        self.assertEqual(lines_good, ["b\n"])
+        os.close(fd_bad_write)
+
+
+class TestMetainfoParser(unittest.TestCase):
+
+    RECORDS = [dict(id="aaaaaaaaaaa", title="ä video", extractor_key="Youtube"), dict(id="bbbbbbbbbbb", title="{not a brace}", extractor_key="Youtube")]
+
+    def setUp(self):
+        self.records = list()
+        self.warnings = list()
+        self.parser = adapter.MetainfoParser(lambda raw, info: self.records.append((raw, info)), self.warnings.append)
+
+    def feed_chunks(self, chunks):
+        '''pass the chunks through a LineReader like the I/O thread does'''
+        reader = adapter.LineReader(None)
+        for chunk in chunks:
+            for ln in reader.feed(chunk):
+                self.parser.feed(ln, adapter.Adapter.STDOUT)
+        self.parser.feed(reader.flush(), adapter.Adapter.STDOUT)
+
+    def get_output(self):
+        return "".join(json.dumps(info) + "\n" for info in self.RECORDS).encode('utf-8')
+
+    def test_records_split_across_chunks(self):
+        data = self.get_output()
+        for size in (1, 7, len(data) // 2):
+            del self.records[:]
+            self.feed_chunks(data[i:i+size] for i in range(0, len(data), size))
+            self.assertEqual([info for raw, info in self.records], self.RECORDS)
+        self.assertEqual(self.parser.get_error_message(), "")
+
+    def test_missing_final_newline(self):
+        self.feed_chunks([self.get_output().rstrip(b"\n")])
+        self.assertEqual([info for raw, info in self.records], self.RECORDS)
+        self.assertEqual(self.parser.count, 2)
+
+    def test_raw_is_the_json_code_without_line_end(self):
+        self.feed_chunks([self.get_output().replace(b"\n", b"\r\n")])
+        self.assertEqual([raw for raw, info in self.records], [json.dumps(info) for info in self.RECORDS])
+
+    def test_blank_and_garbage_lines(self):
+        lines = ["\n", "   \n", "[youtube] aaaaaaaaaaa: Downloading webpage\n", "{\"id\": \"truncated\n",
+            json.dumps(self.RECORDS[0]) + "\n", "WARNING: unable to extract uploader\n", "ERROR: Unable to download webpage\n"]
+        with self.assertLogs('adapter', 'ERROR'):
+            for ln in lines:
+                self.parser.feed(ln, adapter.Adapter.STDOUT)
+        self.assertEqual([info for raw, info in self.records], self.RECORDS[:1])
+        self.assertEqual(self.warnings, ["WARNING: unable to extract uploader"])
+        self.assertEqual(self.parser.get_error_message().splitlines(),
+            ["[youtube] aaaaaaaaaaa: Downloading webpage", "{\"id\": \"truncated", "ERROR: Unable to download webpage"])
+
+    def test_only_the_last_error_lines_are_kept(self):
+        for i in range(adapter.MetainfoParser.MAX_ERROR_LINES + 5):
+            self.parser.feed("line {}\n".format(i))
+        errors = self.parser.get_error_message().splitlines()
+        self.assertEqual(len(errors), adapter.MetainfoParser.MAX_ERROR_LINES)
+        self.assertEqual(errors[-1], "line {}".format(adapter.MetainfoParser.MAX_ERROR_LINES + 4))
+
+
+class TestPlaylistShards(unittest.TestCase):
+
+    def setUp(self):
+        adapter.settings[adapter.KEY.CMD] = ['youtube-dl']
+        self.adapter = adapter.Adapter()
+
+    def get_params(self):
+        cns = self.adapter
+        return {
+            cns.MODE: cns.MODE_PLAYLIST,
+            cns.SOURCE_URL: "https://www.youtube.com/playlist?list=PL0123456789",
+            cns.WORKING_DIRECTORY: "/tmp",
+            cns.AUDIO_ONLY: False,
+            cns.DOWNLOAD_ARCHIVE: "archive.txt",
+        }
+
+    def test_format_playlist_items(self):
+        self.assertEqual(adapter.format_playlist_items([9, 1, 2, 3, 7, 10, 2]), "1-3,7,9-10")
+
+    def test_split_playlist_items(self):
+        self.assertEqual(adapter.split_playlist_items([5, 1, 2, 3, 4, 1], 2), [[1, 2], [3, 4], [5]])
+
+    def test_build_shard_commands(self):
+        cns = self.adapter
+        params = self.get_params()
+        shards = list(adapter.iter_playlist_shards(params, [1, 2, 3, 5, 6], 3))
+        self.assertEqual([shard for shard, shard_params in shards], [[1, 2, 3], [5, 6]])
+        # the original params are not changed
+        self.assertNotIn(cns.PLAYLIST_ITEMS, params)
+
+        argvs = [self.adapter.build_command(shard_params).argv for shard, shard_params in shards]
+        for argv, items in zip(argvs, ("1-3", "5-6")):
+            self.assertEqual(argv[argv.index(cns.PLAYLIST_ITEMS) + 1], items)
+            self.assertEqual(argv[argv.index(cns.DOWNLOAD_ARCHIVE) + 1], "archive.txt")
+            self.assertIn(cns.PLAYLIST_YES, argv)
+            self.assertEqual(argv[-1], params[cns.SOURCE_URL])
+
+    def test_unknown_params_are_rejected(self):
+        params = self.get_params()
+        params['playlist-split-into-shards'] = True
+        with self.assertRaises(ValueError):
+            self.adapter.build_command(params)
+
+
+if __name__=='__main__':
+    unittest.main()
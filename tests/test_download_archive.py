@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+# standard libraries
+import os
+import shutil
+import tempfile
+import unittest
+
+# other libraries
+import download_archive
+import metainfo_cache
+
+
+class TestDownloadArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.ffn = os.path.join(self.path, 'archive.txt')
+
+    def append(self, data):
+        with open(self.ffn, 'ab') as f:
+            f.write(data)
+
+    def test_missing_file(self):
+        archive = download_archive.DownloadArchive(self.ffn)
+        self.assertEqual(len(archive), 0)
+        self.append(b"youtube aaaaaaaaaaa\n")
+        archive.refresh()
+        self.assertTrue(archive.contains('Youtube', 'aaaaaaaaaaa'))
+
+    def test_incremental_refresh(self):
+        self.append(b"youtube aaaaaaaaaaa\nvimeo 12345\n")
+        archive = download_archive.DownloadArchive(self.ffn)
+        self.assertEqual(len(archive), 2)
+        self.assertTrue(archive.contains('Vimeo', '12345'))
+        self.assertFalse(archive.contains('Youtube', 'bbbbbbbbbbb'))
+
+        # youtube-dl is still writing the last line
+        self.append(b"youtube bbbbbbbbbbb\nyoutube cccc")
+        archive.refresh()
+        self.assertTrue(archive.contains('Youtube', 'bbbbbbbbbbb'))
+        self.assertFalse(archive.contains('Youtube', 'cccc'))
+        self.assertEqual(len(archive), 3)
+
+        self.append(b"ccccccc\n\n")
+        archive.refresh()
+        self.assertTrue(archive.contains('Youtube', 'ccccccccccc'))
+        self.assertEqual(len(archive), 4)
+
+    def test_truncated_file_is_read_again(self):
+        self.append(b"youtube aaaaaaaaaaa\nyoutube bbbbbbbbbbb\n")
+        archive = download_archive.DownloadArchive(self.ffn)
+        with open(self.ffn, 'wb') as f:
+            f.write(b"vimeo 1\n")
+        with self.assertLogs('download_archive', 'INFO'):
+            archive.refresh()
+        self.assertFalse(archive.contains('Youtube', 'aaaaaaaaaaa'))
+        self.assertTrue(archive.contains('Vimeo', '1'))
+
+    def test_get_archive_reads_file_once(self):
+        self.append(b"youtube aaaaaaaaaaa\n")
+        archive = download_archive.get_archive(self.ffn)
+        self.assertIs(download_archive.get_archive(os.path.join(self.path, '.', 'archive.txt')), archive)
+
+    def test_contains_key(self):
+        self.append(b"youtube aaaaaaaaaaa\n")
+        archive = download_archive.DownloadArchive(self.ffn)
+        self.assertTrue(archive.contains_key("youtube:aaaaaaaaaaa"))
+        self.assertFalse(archive.contains_key("youtube:bbbbbbbbbbb"))
+        for key in ("youtube", "youtube:", ":aaaaaaaaaaa"):
+            with self.assertRaises(ValueError):
+                archive.contains_key(key)
+
+    def test_key_from_url(self):
+        self.append(b"youtube aaaaaaaaaaa\n")
+        archive = download_archive.DownloadArchive(self.ffn)
+        for url in (
+            "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+            "https://youtu.be/aaaaaaaaaaa",
+            " https://www.youtube.com/watch?feature=share&v=aaaaaaaaaaa ",
+        ):
+            self.assertTrue(archive.contains_key(metainfo_cache.get_key_from_url(url)), url)
+        self.assertFalse(archive.contains_key(metainfo_cache.get_key_from_url("https://www.youtube.com/watch?v=bbbbbbbbbbb")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+
+# standard libraries
+import sys
+import time
+import threading
+import unittest
+
+# other libraries
+import adapter
+import download_manager
+Job = download_manager.Job
+
+
+class FakeAdapter(adapter.Adapter):
+
+    '''builds the real command but does not start a process.
+       the test decides when the process writes output and when it exits.'''
+
+    def start(self, command):
+        self.command = command
+        self._lines = list()
+        self._returncode = None
+        self._eof = False
+
+    def write(self, *lines, **kw):
+        flag = kw.pop('flag', self.STDOUT)
+        self._lines.extend((ln, flag) for ln in lines)
+
+    def exit(self, returncode, eof=True):
+        '''eof: whether the I/O thread has queued all output already'''
+        self._returncode = returncode
+        self._eof = eof
+
+    def close_output(self):
+        self._eof = True
+
+    def kill(self):
+        self._returncode = -9
+        self._eof = True
+
+    def is_finished(self):
+        return self._returncode is not None
+
+    def get_returncode(self):
+        return self._returncode
+
+    def is_eof(self):
+        return self._eof
+
+    def iter_out(self):
+        lines = self._lines
+        self._lines = list()
+        return iter(lines)
+
+    def pop_progress(self):
+        return None
+
+
+class TestDownloadManager(unittest.TestCase):
+
+    def setUp(self):
+        adapter.settings[adapter.KEY.CMD] = ['youtube-dl']
+        self.manager = download_manager.DownloadManager(FakeAdapter, max_parallel=2)
+        self.states = list()
+        self.output = list()
+        self.manager.on_state_changed = lambda job: self.states.append((job.id, job.state))
+        self.manager.on_output = lambda job, lines: self.output.extend(ln for ln, flag in lines)
+
+    def add(self, url="https://youtu.be/dQw4w9WgXcQ", first=False, **kw):
+        cns = adapter.Adapter
+        params = {
+            cns.MODE: cns.MODE_SINGLE_VIDEO,
+            cns.SOURCE_URL: url,
+            cns.WORKING_DIRECTORY: "/tmp",
+            cns.AUDIO_ONLY: False,
+        }
+        params.update(kw)
+        return self.manager.add(params, first=first)
+
+    def test_at_most_max_parallel_jobs_are_running(self):
+        jobs = [self.add() for i in range(3)]
+        self.assertEqual([job.state for job in jobs], [Job.STATE_RUNNING, Job.STATE_RUNNING, Job.STATE_QUEUED])
+        self.assertTrue(self.manager.is_active())
+
+    def test_queued_job_starts_when_a_job_finishes(self):
+        jobs = [self.add() for i in range(3)]
+        jobs[0].adapter.write("[download] Destination: a.mp4\n")
+        jobs[0].adapter.exit(0)
+        self.manager.poll()
+        self.assertEqual([job.state for job in jobs], [Job.STATE_FINISHED, Job.STATE_RUNNING, Job.STATE_RUNNING])
+        self.assertEqual(jobs[0].destination, "a.mp4")
+        self.assertEqual(jobs[0].returncode, 0)
+        self.assertEqual(self.states[-2:], [(1, Job.STATE_FINISHED), (3, Job.STATE_RUNNING)])
+
+    def test_failed(self):
+        job = self.add()
+        job.adapter.write("ERROR: Unsupported URL\n", flag=adapter.Adapter.STDERR)
+        job.adapter.exit(1)
+        self.manager.poll()
+        self.assertEqual(job.state, Job.STATE_FAILED)
+        self.assertEqual(self.output, ["ERROR: Unsupported URL\n"])
+        self.assertFalse(self.manager.is_active())
+
+    def test_invalid_params_fail_without_starting(self):
+        job = self.add(**{'unknown-key': True})
+        self.assertEqual(job.state, Job.STATE_FAILED)
+        self.assertIsNone(job.command)
+        self.assertIn("unused arguments", job.error)
+
+    def test_add_first(self):
+        jobs = [self.add() for i in range(3)]
+        first = self.add(first=True)
+        jobs[0].adapter.exit(0)
+        self.manager.poll()
+        self.assertEqual(first.state, Job.STATE_RUNNING)
+        self.assertEqual(jobs[2].state, Job.STATE_QUEUED)
+
+    def test_cancel_queued(self):
+        jobs = [self.add() for i in range(3)]
+        self.manager.cancel(jobs[2])
+        self.assertEqual(jobs[2].state, Job.STATE_CANCELLED)
+        self.assertIsNone(jobs[2].adapter)
+
+    def test_cancel_running(self):
+        job = self.add()
+        self.manager.cancel(job)
+        # the state changes when the process has exited
+        self.assertEqual(job.state, Job.STATE_RUNNING)
+        self.manager.poll()
+        self.assertEqual(job.state, Job.STATE_CANCELLED)
+
+    def test_cancel_all(self):
+        jobs = [self.add() for i in range(3)]
+        self.manager.cancel_all()
+        self.manager.poll()
+        self.assertEqual([job.state for job in jobs], [Job.STATE_CANCELLED]*3)
+        self.assertFalse(self.manager.is_active())
+        self.manager.clear_done()
+        self.assertEqual(self.manager.jobs, [])
+
+    def test_retry_with_full_extraction(self):
+        cns = adapter.Adapter
+        job = self.add(**{cns.LOAD_INFO_JSON: "/tmp/video.info.json"})
+        self.assertIn(cns.LOAD_INFO_JSON, job.command.argv)
+        job.adapter.write("ERROR: unable to download video data: HTTP Error 403: Forbidden\n", flag=cns.STDERR)
+        job.adapter.exit(1)
+        self.manager.poll()
+        self.assertEqual(self.states[-2:], [(job.id, Job.STATE_QUEUED), (job.id, Job.STATE_RUNNING)])
+        self.assertNotIn(cns.LOAD_INFO_JSON, job.params)
+        self.assertNotIn(cns.LOAD_INFO_JSON, job.command.argv)
+        self.assertIn("https://youtu.be/dQw4w9WgXcQ", job.command.argv)
+
+        # it is retried once only
+        job.adapter.write("ERROR: unable to download video data: HTTP Error 403: Forbidden\n", flag=cns.STDERR)
+        job.adapter.exit(1)
+        self.manager.poll()
+        self.assertEqual(job.state, Job.STATE_FAILED)
+
+    def test_no_retry_without_info_file(self):
+        job = self.add()
+        job.adapter.write("ERROR: unable to download video data: HTTP Error 403: Forbidden\n", flag=adapter.Adapter.STDERR)
+        job.adapter.exit(1)
+        self.manager.poll()
+        self.assertEqual(job.state, Job.STATE_FAILED)
+
+    def test_wait_for_output_after_exit(self):
+        cns = adapter.Adapter
+        job = self.add(**{cns.LOAD_INFO_JSON: "/tmp/video.info.json"})
+        job.adapter.exit(1, eof=False)
+        self.manager.poll()
+        self.assertEqual(job.state, Job.STATE_RUNNING)
+        self.assertTrue(self.manager.is_eof())
+        # the error line arrives after the process has exited
+        job.adapter.write("ERROR: unable to download video data: HTTP Error 403: Forbidden\n", flag=cns.STDERR)
+        job.adapter.close_output()
+        self.manager.poll()
+        self.assertIn((job.id, Job.STATE_QUEUED), self.states)
+        self.assertEqual(job.state, Job.STATE_RUNNING)
+        self.assertNotIn(cns.LOAD_INFO_JSON, job.params)
+
+    def test_output_which_is_never_closed(self):
+        self.manager.TIMEOUT_EOF_AFTER_EXIT = 0.
+        job = self.add()
+        job.adapter.exit(0, eof=False)
+        self.manager.poll()
+        self.assertEqual(job.state, Job.STATE_FINISHED)
+
+    def test_progress_lines_are_not_passed_on(self):
+        progress = list()
+        self.manager.on_progress = lambda job: progress.append(job.progress.percent)
+        job = self.add()
+        job.adapter.write("[download]  10.0% of 10.00MiB at  1.00MiB/s ETA 00:05\r", "[download]  20.0% of 10.00MiB at  1.00MiB/s ETA 00:05\r")
+        self.manager.poll()
+        self.assertEqual(self.output, [])
+        self.assertEqual(progress, [20])
+        job.adapter.write("[download] 100% of 10.00MiB in 00:10\n")
+        self.manager.poll()
+        self.assertEqual(self.output, ["[download] 100% of 10.00MiB in 00:10\n"])
+        self.assertEqual(progress, [20, 100])
+
+
+class ScriptAdapter(adapter.Adapter):
+
+    '''runs a python script instead of youtube-dl'''
+
+    SCRIPT = r'''
+import sys
+sys.stdout.write("[download] Destination: video.mp4\n")
+sys.stdout.write("[download] 100% of 1.00MiB in 00:01\n")
+sys.stdout.flush()
+sys.stderr.write("ERROR: unable to download video data: HTTP Error 403: Forbidden\n")
+sys.stderr.flush()
+sys.exit(1)
+'''
+
+    def build_command(self, params):
+        adapter.Adapter.build_command(self, params)
+        return adapter.Command([sys.executable, '-c', self.SCRIPT])
+
+
+class TestDownloadManagerWithProcess(unittest.TestCase):
+
+    def test_last_lines_before_exit_are_not_lost(self):
+        cns = adapter.Adapter
+        adapter.settings[adapter.KEY.CMD] = ['youtube-dl']
+        manager = download_manager.DownloadManager(ScriptAdapter, max_parallel=4)
+        wakeup = threading.Event()
+        manager.set_output_listener(wakeup.set)
+        states = list()
+        manager.on_state_changed = lambda job: states.append(job.state)
+        jobs = list()
+        for i in range(4):
+            jobs.append(manager.add({
+                cns.MODE: cns.MODE_SINGLE_VIDEO,
+                cns.SOURCE_URL: "https://youtu.be/dQw4w9WgXcQ",
+                cns.WORKING_DIRECTORY: None,
+                cns.AUDIO_ONLY: False,
+                cns.LOAD_INFO_JSON: "/tmp/video.info.json",
+            }))
+        t_end = time.time() + 20
+        while manager.is_active() and time.time() < t_end:
+            wakeup.wait(0.01 if manager.is_eof() else 0.5)
+            wakeup.clear()
+            manager.poll()
+        for job in jobs:
+            self.assertEqual(job.state, Job.STATE_FAILED)
+            self.assertEqual(job.destination, "video.mp4")
+            self.assertTrue(job.progress.is_finished())
+            # the error line has triggered the retry without --load-info-json
+            self.assertNotIn(cns.LOAD_INFO_JSON, job.params)
+        self.assertEqual(states.count(Job.STATE_QUEUED), len(jobs))
+
+
+if __name__=='__main__':
+    unittest.main()
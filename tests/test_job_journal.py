@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+# standard libraries
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+import subprocess
+import unittest
+
+# other libraries
+import job_journal
+
+
+def get_pid_of_finished_process():
+    p = subprocess.Popen([sys.executable, '-c', 'pass'])
+    p.wait()
+    return p.pid
+
+PARAMS = {'mode': 'single-video', 'url': 'https://www.youtube.com/watch?v=aaaaaaaaaaa'}
+
+
+class TestJobJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.ffn = os.path.join(self.path, 'config', job_journal.FN_JOURNAL)
+
+    def create_journal(self, owner=None, **kw):
+        journal = job_journal.JobJournal(self.ffn, owner=owner, **kw)
+        self.addCleanup(journal.close)
+        return journal
+
+    def test_round_trip(self):
+        journal = self.create_journal()
+        job_id = journal.add(PARAMS, name="video", data=3)
+        journal.set_state(job_id, 'running')
+        journal.set_destination(job_id, "/tmp/video.mp4")
+        journal.set_params(job_id, dict(PARAMS, continue_dl=True))
+        journal.close()
+
+        entries = self.create_journal().get_unfinished()
+        self.assertEqual(entries, [job_journal.Entry(job_id, "video", dict(PARAMS, continue_dl=True), 3, 'running', "/tmp/video.mp4")])
+
+    def test_done_jobs_are_not_unfinished(self):
+        journal = self.create_journal()
+        ids = [journal.add(PARAMS, name=state) for state in job_journal.STATES_DONE + ('queued',)]
+        for job_id, state in zip(ids, job_journal.STATES_DONE):
+            journal.set_state(job_id, state)
+        self.assertEqual([e.name for e in journal.get_unfinished()], ['queued'])
+
+    def test_old_done_jobs_are_removed(self):
+        journal = self.create_journal()
+        journal.set_state(journal.add(PARAMS), 'finished')
+        journal.close()
+        journal = self.create_journal(keep_done=-1)
+        count, = journal._connect().execute('SELECT COUNT(*) FROM jobs').fetchone()
+        self.assertEqual(count, 0)
+
+    def test_not_serializable(self):
+        journal = self.create_journal()
+        with self.assertLogs('job_journal', 'ERROR'):
+            self.assertIsNone(journal.add(dict(PARAMS, x=object())))
+
+    def test_resume_after_close(self):
+        first = self.create_journal()
+        job_id = first.add(PARAMS)
+        # the job belongs to the first instance as long as it is running
+        self.assertEqual(self.create_journal(owner=os.getppid()).claim_unfinished(), [])
+        first.close()
+        second = self.create_journal()
+        self.assertEqual([e.id for e in second.claim_unfinished()], [job_id])
+
+    def test_resume_after_crash(self):
+        crashed = self.create_journal(owner=get_pid_of_finished_process())
+        job_id = crashed.add(PARAMS)
+        # a crashed process does not release it's jobs
+        crashed._db.close()
+        crashed._db = None
+        with self.assertLogs('job_journal', 'INFO'):
+            entries = self.create_journal().claim_unfinished()
+        self.assertEqual([e.id for e in entries], [job_id])
+
+    def test_claim_once(self):
+        first = self.create_journal()
+        first.add(PARAMS)
+        first.close()
+        claims = [self.create_journal(owner=owner).claim_unfinished() for owner in (os.getpid(), os.getppid())]
+        self.assertEqual([len(entries) for entries in claims], [1, 0])
+
+    def test_claim_concurrently(self):
+        journal = self.create_journal(owner=get_pid_of_finished_process())
+        for i in range(20):
+            journal.add(PARAMS, name=str(i))
+        journal.release()
+        # every process claims in a separate connection, it's pid is the owner.
+        # the processes keep running until all have claimed, otherwise the jobs of the first could be claimed again.
+        script = "import sys, job_journal; print(len(job_journal.JobJournal(sys.argv[1]).claim_unfinished()), flush=True); sys.stdin.read()"
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.dirname(os.path.abspath(job_journal.__file__))] + sys.path))
+        procs = [subprocess.Popen([sys.executable, '-c', script, self.ffn], stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env, cwd=self.path) for i in range(4)]
+        try:
+            counts = [int(p.stdout.readline()) for p in procs]
+        finally:
+            for p in procs:
+                p.communicate()
+        self.assertEqual(sum(counts), 20)
+
+    def test_journal_without_owner_column(self):
+        os.makedirs(os.path.dirname(self.ffn))
+        db = sqlite3.connect(self.ffn)
+        with db:
+            db.execute('CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, params TEXT NOT NULL, data TEXT, state TEXT NOT NULL, destination TEXT, time_created REAL NOT NULL, time_updated REAL NOT NULL)')
+            db.execute("INSERT INTO jobs (name, params, state, time_created, time_updated) VALUES ('old', '{}', 'running', ?, ?)", (time.time(), time.time()))
+        db.close()
+        self.assertEqual([e.name for e in self.create_journal().claim_unfinished()], ['old'])
+
+
+if __name__ == '__main__':
+    unittest.main()
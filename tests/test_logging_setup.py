@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+
+# standard libraries
+import os
+import sys
+import gzip
+import json
+import copy
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+import shutil
+import tempfile
+import subprocess
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+# other libraries
+import metainfo
+
+# logging_setup creates the log directory and reads the logging configuration on import
+TMP_PATH = tempfile.mkdtemp()
+# registered before importing logging_setup so that it runs after the handlers registered by logging_setup
+atexit.register(shutil.rmtree, TMP_PATH, ignore_errors=True)
+metainfo.PATH_LOG = os.path.join(TMP_PATH, 'log')
+metainfo.PATH_CONFIG = os.path.join(TMP_PATH, 'config')
+import logging_setup
+
+
+def get_pid_of_finished_process():
+    p = subprocess.Popen([sys.executable, '-c', 'pass'])
+    p.wait()
+    return p.pid
+
+
+class TestReadLastLine(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.ffn = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, self.ffn)
+
+    def write(self, data):
+        with open(self.ffn, 'wb') as f:
+            f.write(data)
+
+    def test_empty_file(self):
+        self.assertEqual(logging_setup.read_last_line(self.ffn), "")
+
+    def test_only_line_ends(self):
+        self.write(b"\n\r\n\n")
+        self.assertEqual(logging_setup.read_last_line(self.ffn), "")
+
+    def test_trailing_newline(self):
+        self.write(b"first\nsecond\n\n")
+        self.assertEqual(logging_setup.read_last_line(self.ffn), "second")
+
+    def test_no_trailing_newline(self):
+        self.write(b"first\nsecond")
+        self.assertEqual(logging_setup.read_last_line(self.ffn), "second")
+
+    def test_single_line(self):
+        self.write("ä single line".encode('utf-8'))
+        self.assertEqual(logging_setup.read_last_line(self.ffn), "ä single line")
+
+    def test_last_line_longer_than_block(self):
+        last = "x" * 1000 + logging_setup.LogFile.END_LINE
+        self.write(b"first\n" + last.encode('utf-8') + b"\n")
+        self.assertEqual(logging_setup.read_last_line(self.ffn, block_size=64), last)
+
+    def test_last_line_longer_than_max_size(self):
+        self.write(b"first\n" + b"x" * 1000 + b"end\n")
+        ln = logging_setup.read_last_line(self.ffn, block_size=64, max_size=256)
+        self.assertTrue(ln.endswith("end"))
+        self.assertLess(len(ln), 1000)
+
+
+class TestRotatingLogFileHandler(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.ffn = os.path.join(self.path, 'test.log')
+
+    def create_handler(self, **kw):
+        handler = logging_setup.RotatingLogFileHandler(self.ffn, encoding='utf-8', **kw)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        self.addCleanup(handler.close)
+        return handler
+
+    def emit(self, handler, msg):
+        handler.handle(logging.makeLogRecord(dict(msg=msg)))
+
+    def read_gz(self, n):
+        with gzip.open('{}.{}.gz'.format(self.ffn, n), 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    def test_rollover_compresses_old_generations(self):
+        handler = self.create_handler(maxBytes=20, backupCount=2)
+        for msg in ("first line 1", "second line", "third line", "fourth line"):
+            self.emit(handler, msg)
+        handler.close()
+        self.assertEqual(sorted(os.listdir(self.path)), ['test.log', 'test.log.1.gz', 'test.log.2.gz'])
+        # the newest old generation is .1.gz, the oldest one has been removed
+        self.assertEqual(self.read_gz(1), "third line\n")
+        self.assertEqual(self.read_gz(2), "second line\n")
+        with open(self.ffn, 'rt') as f:
+            self.assertEqual(f.read(), "fourth line\n")
+
+    def test_without_compression(self):
+        handler = self.create_handler(maxBytes=20, backupCount=1, compress=False)
+        for msg in ("first line 1", "second line"):
+            self.emit(handler, msg)
+        handler.close()
+        self.assertEqual(sorted(os.listdir(self.path)), ['test.log', 'test.log.1'])
+
+    def test_defer_flush(self):
+        handler = self.create_handler(defer_flush=True)
+        self.emit(handler, "a")
+        self.assertEqual(os.path.getsize(self.ffn), 0)
+        handler.flush()
+        self.assertEqual(os.path.getsize(self.ffn), 2)
+
+    def test_old_generations_are_found_by_logfile(self):
+        handler = self.create_handler(maxBytes=20, backupCount=3)
+        for msg in ("first line 1", "second line", "third line"):
+            self.emit(handler, msg)
+        handler.close()
+        logfile = logging_setup.LogFile()
+        logfile._ffn = self.ffn
+        self.assertEqual(sorted(os.path.basename(ffn) for ffn in logfile.iter_old_generations()), ['test.log.1.gz', 'test.log.2.gz'])
+
+
+class TestMigrateLogSettings(unittest.TestCase):
+
+    OLD_HANDLER = {
+        "class": "logging.FileHandler",
+        "level": "DEBUG",
+        "formatter": "detailed",
+        "filename": "youtube-dl-gui.log",
+        "mode": "w",
+        "encoding": "utf8"
+    }
+
+    def get_settings(self, handler):
+        return dict(version=1, disable_existing_loggers=False,
+            formatters={'detailed': dict(format="%(message)s")},
+            handlers={'log-file': copy.deepcopy(handler)},
+            root=dict(level='DEBUG', handlers=['log-file']))
+
+    def test_old_template(self):
+        log_settings = self.get_settings(self.OLD_HANDLER)
+        self.assertTrue(logging_setup.migrate_log_settings(log_settings))
+        handler = log_settings['handlers']['log-file']
+        self.assertEqual(handler['class'], logging_setup.CLASS_ROTATING_FILE_HANDLER)
+        self.assertNotIn('mode', handler)
+        self.assertEqual(handler['maxBytes'], 10*1024*1024)
+        self.assertEqual(handler['filename'], "youtube-dl-gui.log")
+
+    def test_current_template_is_not_changed(self):
+        with open(os.path.join(os.path.dirname(os.path.abspath(logging_setup.__file__)), 'templates', logging_setup.FN_LOGGING_JSON), 'rt') as f:
+            log_settings = json.load(f)
+        expected = copy.deepcopy(log_settings)
+        self.assertFalse(logging_setup.migrate_log_settings(log_settings))
+        self.assertEqual(log_settings, expected)
+
+    def test_disabled_log_file_is_not_changed(self):
+        log_settings = self.get_settings(dict(self.OLD_HANDLER, filename="/dev/null", level=logging_setup.LEVEL_MAX+1))
+        self.assertFalse(logging_setup.migrate_log_settings(log_settings))
+
+    def test_configuration_file_is_updated(self):
+        ffn = os.path.join(metainfo.PATH_CONFIG, logging_setup.FN_LOGGING_JSON)
+        os.makedirs(metainfo.PATH_CONFIG, exist_ok=True)
+        self.addCleanup(os.remove, ffn)
+        with open(ffn, 'wt') as f:
+            json.dump(self.get_settings(dict(self.OLD_HANDLER, filename=os.path.join(TMP_PATH, 'migrated.log'))), f)
+        # the logging configuration of logging_setup and the test runner is restored afterwards
+        root = logging.getLogger()
+        root_handlers = list(root.handlers)
+        root_level = root.level
+        logfile_state = dict(vars(logging_setup.logfile))
+        try:
+            logging_setup.read_logging_configuration_file()
+        finally:
+            logging_setup.async_file_handlers.uninstall()
+            for handler in root.handlers:
+                if handler not in root_handlers:
+                    handler.close()
+            root.handlers = root_handlers
+            root.setLevel(root_level)
+            vars(logging_setup.logfile).update(logfile_state)
+        with open(ffn, 'rt') as f:
+            handler = json.load(f)['handlers']['log-file']
+        self.assertEqual(handler['class'], logging_setup.CLASS_ROTATING_FILE_HANDLER)
+        self.assertNotIn('mode', handler)
+
+
+class RecordingHandler(logging.Handler):
+
+    '''remembers the messages which have been emitted since the last flush and the batches which have been flushed'''
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.unflushed = list()
+        self.batches = list()
+
+    def emit(self, record):
+        self.unflushed.append(record.getMessage())
+
+    def flush(self):
+        if self.unflushed:
+            self.batches.append(self.unflushed)
+            self.unflushed = list()
+
+
+class TestBatchingQueueListener(unittest.TestCase):
+
+    def create_listener(self, records):
+        q = queue.Queue()
+        for msg in records:
+            q.put(logging.makeLogRecord(dict(msg=msg)))
+        handler = RecordingHandler()
+        listener = logging_setup.BatchingQueueListener(q, handler)
+        return listener, handler
+
+    def test_records_queued_while_busy_are_flushed_once(self):
+        listener, handler = self.create_listener(['a', 'b', 'c'])
+        listener.start()
+        listener.queue.join()
+        self.assertEqual(handler.batches, [['a', 'b', 'c']])
+        listener.queue.put(logging.makeLogRecord(dict(msg='d')))
+        listener.queue.join()
+        self.assertEqual(handler.batches, [['a', 'b', 'c'], ['d']])
+        listener.stop()
+
+    def test_max_batch_size(self):
+        records = [str(i) for i in range(25)]
+        listener, handler = self.create_listener(records)
+        listener.MAX_BATCH_SIZE = 10
+        listener.start()
+        listener.queue.join()
+        listener.stop()
+        self.assertEqual(handler.batches, [records[0:10], records[10:20], records[20:25]])
+
+    def test_stop_flushes(self):
+        # the last record is followed by the sentinel, so the queue is not empty after it has been handled
+        listener, handler = self.create_listener(['a', 'b'])
+        listener.enqueue_sentinel()
+        listener.start()
+        listener.stop()
+        self.assertEqual(handler.unflushed, [])
+        self.assertEqual(handler.batches, [['a', 'b']])
+
+
+class TestAsyncFileHandlers(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.ffn = os.path.join(self.path, 'test.log')
+        self.handler = logging_setup.RotatingLogFileHandler(self.ffn, encoding='utf-8', delay=True)
+        self.handler.setFormatter(logging.Formatter('%(message)s'))
+        self.addCleanup(self.handler.close)
+        self.logger = logging.getLogger('test_logging_setup.async')
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+        self.async_file_handlers = logging_setup.AsyncFileHandlers()
+        self.addCleanup(self.async_file_handlers.uninstall)
+
+    def read(self):
+        with open(self.ffn, 'rt') as f:
+            return f.read()
+
+    def install(self):
+        # the root logger is always included, leave it's handlers alone
+        with mock.patch.object(logging.getLogger(), 'handlers', []):
+            self.async_file_handlers.install(dict(loggers={self.logger.name: {}}))
+
+    def test_install(self):
+        self.install()
+        self.assertTrue(self.async_file_handlers.is_installed())
+        self.assertNotIn(self.handler, self.logger.handlers)
+        self.assertIsInstance(self.logger.handlers[0], logging.handlers.QueueHandler)
+        self.assertTrue(self.handler.defer_flush)
+
+    def test_flush(self):
+        self.install()
+        for i in range(100):
+            self.logger.info("line %s", i)
+        self.async_file_handlers.flush()
+        self.assertEqual(self.read(), "".join("line {}\n".format(i) for i in range(100)))
+
+    def test_uninstall(self):
+        self.install()
+        self.logger.info("async")
+        self.async_file_handlers.uninstall()
+        self.assertFalse(self.async_file_handlers.is_installed())
+        self.assertEqual(self.logger.handlers, [self.handler])
+        self.assertFalse(self.handler.defer_flush)
+        self.logger.info("sync")
+        self.assertEqual(self.read(), "async\nsync\n")
+
+
+class TestOutputHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def create_history(self, pid=None):
+        history = logging_setup.OutputHistory(self.path, pid)
+        self.addCleanup(history.close)
+        return history
+
+    def create_file(self, pid, age=0, ext=''):
+        ffn = os.path.join(self.path, logging_setup.OutputHistory.FN_PATTERN.format(pid=pid) + ext)
+        with open(ffn, 'wt') as f:
+            f.write('output of {}\n'.format(pid))
+        t = time.time() - age
+        os.utime(ffn, (t, t))
+        return ffn
+
+    def test_write(self):
+        history = self.create_history()
+        self.assertFalse(history.exists())
+        history.write('[download] a\n')
+        history.write('[download] b\n')
+        self.assertTrue(history.exists())
+        history.close()
+        with open(history.get_name(), 'rt') as f:
+            self.assertEqual(f.read(), '[download] a\n[download] b\n')
+
+    def test_rotate(self):
+        history = self.create_history()
+        history.MAX_BYTES = 100
+        history.BACKUP_COUNT = 2
+        line = '-'*39 + '\n'
+        for i in range(10):
+            history.write(line)
+        history.close()
+        names = sorted(os.path.basename(ffn) for pid, ffn in history.iter_files())
+        fn = os.path.basename(history.get_name())
+        self.assertEqual(names, [fn, fn + '.1.gz', fn + '.2.gz'])
+        self.assertLessEqual(os.path.getsize(history.get_name()), history.MAX_BYTES)
+
+    def test_remove_includes_rotated_files(self):
+        history = self.create_history()
+        history.write('a\n')
+        pid = os.getpid()
+        self.create_file(pid, ext='.1.gz')
+        other = self.create_file(get_pid_of_finished_process())
+        history.remove()
+        self.assertEqual([ffn for pid, ffn in history.iter_files()], [other])
+
+    def test_remove_stale_too_old(self):
+        history = self.create_history()
+        dead_pid = get_pid_of_finished_process()
+        old = self.create_file(dead_pid, age=history.MAX_AGE_IN_S + 60)
+        old_rotated = self.create_file(dead_pid, age=history.MAX_AGE_IN_S + 60, ext='.1.gz')
+        running = self.create_file(os.getppid(), age=history.MAX_AGE_IN_S + 60)
+        history.remove_stale()
+        self.assertFalse(os.path.exists(old))
+        self.assertFalse(os.path.exists(old_rotated))
+        self.assertTrue(os.path.exists(running))
+
+    def test_remove_stale_too_many(self):
+        history = self.create_history()
+        history.KEEP_SESSIONS = 2
+        dead_pid = get_pid_of_finished_process()
+        # pids of processes which have terminated are not reused that quickly
+        files = [self.create_file(dead_pid + 100000 + i, age=60*(10-i)) for i in range(4)]
+        history.remove_stale()
+        self.assertEqual([os.path.exists(ffn) for ffn in files], [False, False, True, True])
+
+    def test_unrelated_files_are_kept(self):
+        history = self.create_history()
+        ffn = os.path.join(self.path, 'youtube-dl-gui.log')
+        with open(ffn, 'wt') as f:
+            f.write('log\n')
+        os.utime(ffn, (0, 0))
+        history.remove_stale()
+        self.assertTrue(os.path.exists(ffn))
+
+
+if __name__ == '__main__':
+    unittest.main()
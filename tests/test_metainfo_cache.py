@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+# standard libraries
+import os
+import json
+import shutil
+import tempfile
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+# other libraries
+import metainfo_cache
+
+
+def get_raw(video_id, extractor='Youtube'):
+    return json.dumps(dict(id=video_id, extractor_key=extractor, title="video {}".format(video_id)))
+
+def get_url(video_id):
+    return "https://www.youtube.com/watch?v={}".format(video_id)
+
+ID_A = "aaaaaaaaaaa"
+ID_B = "bbbbbbbbbbb"
+ID_C = "ccccccccccc"
+
+
+class TestKeys(unittest.TestCase):
+
+    def test_key_from_youtube_urls(self):
+        for url in (
+            "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+            "youtube.com/watch?feature=share&v=dQw4w9WgXcQ&t=42",
+            "https://youtu.be/dQw4w9WgXcQ?si=abc",
+            "https://m.youtube.com/shorts/dQw4w9WgXcQ",
+            "https://www.youtube-nocookie.com/embed/dQw4w9WgXcQ",
+        ):
+            self.assertEqual(metainfo_cache.get_key_from_url(url), "youtube:dQw4w9WgXcQ", url)
+
+    def test_no_key_from_other_urls(self):
+        self.assertIsNone(metainfo_cache.get_key_from_url("https://vimeo.com/123456"))
+        self.assertIsNone(metainfo_cache.get_key_from_url("https://www.youtube.com/playlist?list=PL0123"))
+
+    def test_normalize_url(self):
+        self.assertEqual(
+            metainfo_cache.normalize_url("https://www.Vimeo.com/123456/?utm_source=x&b=2&a=1#t=3"),
+            metainfo_cache.normalize_url("http://vimeo.com/123456?a=1&b=2"))
+
+
+class TestMetainfoCache(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = metainfo_cache.MetainfoCache(os.path.join(self.path, metainfo_cache.FN_CACHE), ttl=100, max_entries=2)
+        self.now = 1000.
+        patcher = mock.patch.object(metainfo_cache.time, 'time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.path)
+
+    def test_get(self):
+        self.assertIsNone(self.cache.get(get_url(ID_A)))
+        self.cache.put(get_url(ID_A), get_raw(ID_A))
+        self.assertEqual(self.cache.get("https://youtu.be/" + ID_A), get_raw(ID_A))
+        self.assertEqual(self.cache.get_entry_by_key("youtube:" + ID_A), (get_raw(ID_A), 1000.))
+
+    def test_alias_for_other_sites(self):
+        url = "https://vimeo.com/123456?utm_source=newsletter"
+        self.cache.put(url, get_raw("123456", extractor='Vimeo'))
+        self.assertEqual(self.cache.get("https://www.vimeo.com/123456"), get_raw("123456", extractor='Vimeo'))
+
+    def test_expiry(self):
+        self.cache.put(get_url(ID_A), get_raw(ID_A))
+        self.now += 100
+        self.assertIsNotNone(self.cache.get(get_url(ID_A)))
+        self.now += 1
+        self.assertIsNone(self.cache.get(get_url(ID_A)))
+        # the expired entry has been removed
+        self.now -= 1
+        self.assertIsNone(self.cache.get(get_url(ID_A)))
+
+    def test_least_recently_used_is_evicted(self):
+        self.cache.put(get_url(ID_A), get_raw(ID_A))
+        self.now += 1
+        self.cache.put(get_url(ID_B), get_raw(ID_B))
+        self.now += 1
+        # using A makes B the least recently used entry
+        self.cache.get(get_url(ID_A))
+        self.now += 1
+        self.cache.put(get_url(ID_C), get_raw(ID_C))
+        self.assertIsNotNone(self.cache.get(get_url(ID_A)))
+        self.assertIsNone(self.cache.get(get_url(ID_B)))
+        self.assertIsNotNone(self.cache.get(get_url(ID_C)))
+
+    def test_expired_entries_are_evicted_on_put(self):
+        self.cache.put(get_url(ID_A), get_raw(ID_A))
+        self.now += 101
+        self.cache.put(get_url(ID_B), get_raw(ID_B))
+        count = self.cache._connect().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        self.assertEqual(count, 1)
+
+    def test_metainfo_without_id_is_not_cached(self):
+        self.cache.put(get_url(ID_A), json.dumps(dict(title="no id")))
+        self.assertIsNone(self.cache.get(get_url(ID_A)))
+
+    def test_remove_and_clear(self):
+        self.cache.put(get_url(ID_A), get_raw(ID_A))
+        self.cache.put(get_url(ID_B), get_raw(ID_B))
+        self.cache.remove(get_url(ID_A))
+        self.assertIsNone(self.cache.get(get_url(ID_A)))
+        self.cache.clear()
+        self.assertIsNone(self.cache.get(get_url(ID_B)))
+
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+# standard libraries
+import unittest
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+# other libraries
+import progress
+import adapter
+
+MiB = 1024**2
+
+
+class TestParse(unittest.TestCase):
+
+    def test_percent_of_total(self):
+        p = progress.parse("[download]  42.1% of 312.45MiB at  3.20MiB/s ETA 01:12")
+        self.assertEqual(p.percent, 42.1)
+        self.assertAlmostEqual(p.total_bytes, 312.45*MiB)
+        self.assertAlmostEqual(p.downloaded_bytes, 312.45*MiB*0.421)
+        self.assertAlmostEqual(p.speed, 3.2*MiB)
+        self.assertEqual(p.eta, 72)
+        self.assertFalse(p.is_estimate)
+        self.assertFalse(p.is_finished())
+
+    def test_fragments_with_estimated_size(self):
+        p = progress.parse("[download]  42.1% of ~312.45MiB at  3.20MiB/s ETA 01:12 (frag 12/120)")
+        self.assertTrue(p.is_estimate)
+        self.assertEqual((p.fragment_index, p.fragment_count), (12, 120))
+
+    def test_unknown_total(self):
+        p = progress.parse("[download]   12.00MiB at  3.20MiB/s (00:03)")
+        self.assertIsNone(p.percent)
+        self.assertIsNone(p.total_bytes)
+        self.assertAlmostEqual(p.downloaded_bytes, 12*MiB)
+
+    def test_unknown_speed_and_eta(self):
+        p = progress.parse("[download]   0.0% of 10.00MiB at Unknown speed ETA Unknown ETA")
+        self.assertEqual(p.percent, 0)
+        self.assertIsNone(p.speed)
+        self.assertIsNone(p.eta)
+
+    def test_finished(self):
+        p = progress.parse("[download] 100% of 312.45MiB in 01:40")
+        self.assertTrue(p.is_finished())
+        self.assertEqual(p.eta, 0)
+
+    def test_line_end_and_erase_sequence(self):
+        p = progress.parse("\x1b[K[download]   5.3% of 50.00MiB at  1.00MiB/s ETA 00:47\r")
+        self.assertEqual(p.percent, 5.3)
+
+    def test_other_lines(self):
+        for ln in (
+            "[download] Destination: Some Video-dQw4w9WgXcQ.mp4",
+            "[download] Some Video-dQw4w9WgXcQ.mp4 has already been downloaded",
+            "[youtube] dQw4w9WgXcQ: Downloading webpage",
+            "ERROR: unable to download video data: HTTP Error 403: Forbidden",
+        ):
+            self.assertIsNone(progress.parse(ln), ln)
+
+    def test_bytes_and_durations(self):
+        self.assertEqual(progress.parse_bytes("1.50KiB"), 1536)
+        self.assertEqual(progress.parse_bytes("2MB"), 2000000)
+        self.assertEqual(progress.parse_duration("1:01:12"), 3672)
+        self.assertEqual(progress.format_bytes(312.45*MiB), "312.45MiB")
+        self.assertEqual(progress.format_duration(3672), "1:01:12")
+
+    def test_aggregate(self):
+        total = progress.aggregate([
+            progress.parse("[download]  50.0% of 10.00MiB at  1.00MiB/s ETA 00:05"),
+            progress.parse("[download]  25.0% of 30.00MiB at  2.00MiB/s ETA 00:12"),
+        ])
+        self.assertAlmostEqual(total.total_bytes, 40*MiB)
+        self.assertAlmostEqual(total.percent, 100. * 12.5 / 40)
+        self.assertAlmostEqual(total.speed, 3*MiB)
+        self.assertEqual(total.eta, 12)
+
+
+class TestCoalesce(unittest.TestCase):
+
+    def setUp(self):
+        adapter.settings[adapter.KEY.CMD] = ['youtube-dl']
+        self.adapter = adapter.Adapter()
+        self.queue = queue.Queue()
+        self.on_lines = self.adapter._on_lines(self.queue, self.adapter.STDOUT)
+
+    def get_queued(self):
+        lines = list()
+        while not self.queue.empty():
+            lines.append(self.queue.get()[0])
+        return lines
+
+    def test_updates_are_coalesced(self):
+        self.on_lines(["[download] {:4.1f}% of 10.00MiB at  1.00MiB/s ETA 00:05\r".format(i) for i in range(50)])
+        self.assertEqual(self.get_queued(), [])
+        self.assertEqual(self.adapter.pop_progress().percent, 49)
+        # an update is returned once only
+        self.assertIsNone(self.adapter.pop_progress())
+
+    def test_pending_update_is_queued_before_next_line(self):
+        self.on_lines([
+            "[download]  10.0% of 10.00MiB at  1.00MiB/s ETA 00:05\r",
+            "[download]  20.0% of 10.00MiB at  1.00MiB/s ETA 00:05\r",
+            "[download] Destination: b.mp4\n",
+        ])
+        self.assertEqual(self.get_queued(), [
+            "[download]  20.0% of 10.00MiB at  1.00MiB/s ETA 00:05\r",
+            "[download] Destination: b.mp4\n",
+        ])
+        self.assertIsNone(self.adapter.pop_progress())
+        self.assertEqual(self.adapter.get_progress().percent, 20)
+
+    def test_final_line_is_queued(self):
+        self.on_lines(["\r", "[download] 100% of 10.00MiB in 00:10\n"])
+        self.assertEqual(self.get_queued(), ["[download] 100% of 10.00MiB in 00:10\n"])
+        self.assertTrue(self.adapter.get_progress().is_finished())
+
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+# standard libraries
+import os
+import time
+import json
+import socket
+import shutil
+import tempfile
+import unittest
+import tkinter as tk
+import _tkinter
+
+# other libraries
+import single_instance
+import tkinter_extensions as tkx
+
+
+@unittest.skipUnless(single_instance.is_supported(), "unix domain sockets are not supported")
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.server = single_instance.Server(os.path.join(self.path, single_instance.FN_SOCKET))
+        self.assertTrue(self.server.start())
+
+    def tearDown(self):
+        self.server.close()
+        shutil.rmtree(self.path)
+
+    def send(self, urls):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(1.)
+            sock.connect(self.server.ffn)
+            sock.sendall((json.dumps(dict(urls=urls)) + "\n").encode('utf-8'))
+            return sock.makefile('rb').readline()
+        finally:
+            sock.close()
+
+    def test_get_urls(self):
+        self.assertEqual(single_instance.get_urls(['--new-instance', 'https://a', 'https://b']), ['https://a', 'https://b'])
+
+    def test_second_server_is_refused(self):
+        other = single_instance.Server(self.server.ffn)
+        self.assertFalse(other.start())
+
+    def test_request_wakes_up_event_loop(self):
+        tcl = tk.Tcl()
+        if not tkx.Waker.is_supported(tcl):
+            self.skipTest("createfilehandler is not available")
+        received = list()
+        waker = tkx.Waker(tcl, lambda: received.extend(self.server.iter_requests()))
+        self.server.set_output_listener(waker.notify)
+        try:
+            self.assertEqual(self.send(['https://a']), b"ok\n")
+            t_end = time.time() + 1.
+            while not received and time.time() < t_end:
+                tcl.tk.dooneevent(_tkinter.DONT_WAIT)
+            self.assertEqual(received, [['https://a']])
+            # waiting for the next request does not need a timer
+            self.assertEqual(tcl.tk.call('after', 'info'), '')
+        finally:
+            self.server.set_output_listener(None)
+            waker.close()
+
+    def test_close_removes_socket(self):
+        self.server.close()
+        self.assertFalse(os.path.exists(self.server.ffn))
+
+
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+# standard libraries
+import io
+import time
+import threading
+import unittest
+import tkinter as tk
+import _tkinter
+
+# other libraries
+import tkinter_extensions as tkx
+
+
+class TestWaker(unittest.TestCase):
+
+    # a Tcl interpreter without Tk does not need a display
+    def setUp(self):
+        self.tcl = tk.Tcl()
+        if not tkx.Waker.is_supported(self.tcl):
+            self.skipTest("createfilehandler is not available")
+        self.calls = 0
+        self.waker = tkx.Waker(self.tcl, self.callback)
+
+    def tearDown(self):
+        self.waker.close()
+
+    def callback(self):
+        self.calls += 1
+
+    def process_events(self, timeout=1.):
+        t_end = time.time() + timeout
+        while time.time() < t_end:
+            if not self.tcl.tk.dooneevent(_tkinter.DONT_WAIT):
+                if self.calls:
+                    return
+                time.sleep(0.001)
+
+    def test_is_supported_on_posix(self):
+        self.assertTrue(hasattr(self.tcl.tk, 'createfilehandler'))
+
+    def test_notify_from_other_thread(self):
+        thread = threading.Thread(target=self.waker.notify)
+        thread.start()
+        thread.join()
+        self.process_events()
+        self.assertEqual(self.calls, 1)
+
+    def test_notifications_are_coalesced(self):
+        for i in range(5):
+            self.waker.notify()
+        self.process_events()
+        self.assertEqual(self.calls, 1)
+
+    def test_idle_without_notification(self):
+        self.process_events(timeout=0.05)
+        self.assertEqual(self.calls, 0)
+        # nothing is polled: no timer is pending and there is no event to process
+        self.assertEqual(self.tcl.tk.call('after', 'info'), '')
+        self.assertFalse(self.tcl.tk.dooneevent(_tkinter.DONT_WAIT))
+
+    def test_close(self):
+        self.waker.close()
+        self.waker.notify()
+        self.process_events(timeout=0.05)
+        self.assertEqual(self.calls, 0)
+
+
+class TestLineStore(unittest.TestCase):
+
+    # LineStore does not need Tk
+    def setUp(self):
+        self.store = tkx.LineStore()
+        self.store.BLOCK_SIZE = 4
+
+    def get_lines(self, store=None):
+        store = store or self.store
+        return [store.get(i)[0] for i in range(len(store))]
+
+    def test_lines_and_tags(self):
+        self.store.extend([("a\nb\n", None), ("ERROR: c\n", ('error',)), ("d", None)])
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual([self.store.get(i) for i in range(4)], [("a", None), ("b", None), ("ERROR: c", ('error',)), ("d", None)])
+
+    def test_block_boundaries(self):
+        n = 3 * self.store.BLOCK_SIZE + 1
+        for i in range(n):
+            self.store.extend([("line {}\n".format(i), ('even',) if i % 2 == 0 else None)])
+            self.assertEqual(len(self.store), i + 1)
+        self.assertEqual(self.get_lines(), ["line {}".format(i) for i in range(n)])
+        self.assertEqual([self.store.get(i)[1] for i in range(n)], [('even',) if i % 2 == 0 else None for i in range(n)])
+
+    def test_chunk_spanning_several_blocks(self):
+        n = 2 * self.store.BLOCK_SIZE + 3
+        self.store.extend([("".join("line {}\n".format(i) for i in range(n)), None)])
+        self.assertEqual(self.get_lines(), ["line {}".format(i) for i in range(n)])
+
+    def test_get_runs(self):
+        self.store.extend([("a\nb\n", None), ("c\nd\n", ('error',)), ("e\nf\n", None)])
+        self.assertEqual(self.store.get_runs(1, 5), [("b\n", None), ("c\nd\n", ('error',)), ("e\n", None)])
+        self.assertEqual(self.store.get_runs(5, 100), [("f\n", None)])
+        self.assertEqual(self.store.get_runs(6, 100), [])
+
+    def test_carriage_return_overwrites_line(self):
+        self.store.extend([("[download]  1.0%\r[download]  2.0%\r", None)])
+        self.assertEqual(self.get_lines(), ["[download]  2.0%"])
+        self.store.extend([("[download] 100%\n", ('finished',)), ("next\n", None)])
+        self.assertEqual([self.store.get(i) for i in range(len(self.store))], [("[download] 100%", ('finished',)), ("next", None)])
+
+    def test_crlf_does_not_overwrite(self):
+        self.store.extend([("a\r\nb\r\n", None)])
+        self.assertEqual(self.get_lines(), ["a", "b"])
+
+    def test_overwrite_at_block_boundary(self):
+        size = self.store.BLOCK_SIZE
+        self.store.extend([("".join("line {}\n".format(i) for i in range(size - 1)), None)])
+        # the last line of the block is not frozen while it can be overwritten
+        self.store.extend([("progress 1\r", None), ("progress 2\r", None), ("done\n", None), ("after\n", None)])
+        self.assertEqual(self.get_lines(), ["line {}".format(i) for i in range(size - 1)] + ["done", "after"])
+
+    def test_max_lines(self):
+        self.store.max_lines = 6
+        removed = self.store.extend([("".join("line {}\n".format(i) for i in range(10)), None)])
+        self.assertEqual(removed, 4)
+        self.assertEqual(self.get_lines(), ["line {}".format(i) for i in range(4, 10)])
+
+    def test_write_to(self):
+        self.store.extend([("".join("line {}\n".format(i) for i in range(6)), None), ("progress\r", None)])
+        f = io.StringIO()
+        self.store.write_to(f)
+        self.assertEqual(f.getvalue(), "".join("line {}\n".format(i) for i in range(6)) + "progress\n")
+
+    def test_clear(self):
+        self.store.extend([("a\r", None)])
+        self.store.clear()
+        self.store.extend([("b\n", None)])
+        self.assertEqual(self.get_lines(), ["b"])
+
+    def test_split_lines(self):
+        self.assertEqual(list(tkx.LineStore.split_lines("a\r\nb\rc\n\nd")), [("a", "\r\n"), ("b", "\r"), ("c", "\n"), ("", "\n"), ("d", "")])
+        self.assertEqual(list(tkx.LineStore.split_lines("")), [])
+
+
+if __name__=='__main__':
+    unittest.main()
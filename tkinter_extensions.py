@@ -1,18 +1,25 @@
 #!/usr/bin/env python
 # ========== libraries ==========
 # standard libraries
+import lazy_import
 try:
     # Python 2
     import Tkinter as tk
     import ttk
     import ScrolledText as tkText
+    # is needed by VirtualLog only which is not created at startup
+    tkFont = lazy_import.LazyModule('tkFont')
 except:
     # Python 3
     import tkinter as tk
     from tkinter import scrolledtext
     tkText = scrolledtext
     from tkinter import ttk
+    tkFont = lazy_import.LazyModule('tkinter.font')
 import os.path
+import re
+import array
+import threading
 import logging
 log = logging.getLogger(__name__)
 
@@ -80,6 +87,23 @@ def only(*x):
     return tkc.RETURNCODE_BREAK
 
 
+def group_runs(chunks):
+    '''merge consecutive (text, tags) pairs which have equal tags into one (text, tags) pair'''
+    runs = list()
+    texts = None
+    run_tags = None
+    for text, tags in chunks:
+        if texts is not None and tags == run_tags:
+            texts.append(text)
+        else:
+            if texts is not None:
+                runs.append(("".join(texts), run_tags))
+            texts = [text]
+            run_tags = tags
+    if texts is not None:
+        runs.append(("".join(texts), run_tags))
+    return runs
+
 def create_image(imagepath):
     if os.path.splitext(imagepath)[1]=='.xbm':
         image = tk.BitmapImage(file=imagepath)
@@ -647,6 +671,222 @@ class AutoScrolledText(ScrolledText):
             self.yview(tk.END)
 
 
+class LineStore(object):
+
+    '''Keeps lines of text and their tags in blocks of BLOCK_SIZE lines.
+
+    A full block is stored as a single string together with an array of line
+    offsets and an array of tag ids so that millions of lines need little memory
+    and every line can be accessed in constant time.
+    If max_lines is given the oldest lines are removed in whole blocks.
+
+    Lines end with '\n', '\r\n' or '\r'. Like in a terminal a line ending with
+    a lone '\r' (e.g. a progress update of youtube-dl) is replaced by the next line.'''
+
+    BLOCK_SIZE = 1024
+
+    _RE_LINE_END = re.compile(r'(\r\n|\n|\r)')
+
+    def __init__(self, max_lines=None):
+        self.max_lines = max_lines
+        self.clear()
+
+    def clear(self):
+        self._blocks = list()
+        self._lines = list()
+        self._line_tags = array.array('H')
+        self._tags = [None]
+        self._tag_ids = {None: 0}
+        self._overwrite = False
+
+    @classmethod
+    def split_lines(cls, text):
+        '''return (line, line end) for every line in text. The line end of the last line may be empty.'''
+        parts = cls._RE_LINE_END.split(text)
+        # split returns line, line end, line, ..., line
+        last = parts.pop()
+        lines = list(zip(parts[0::2], parts[1::2]))
+        if last:
+            lines.append((last, ''))
+        return lines
+
+    def __len__(self):
+        return len(self._blocks) * self.BLOCK_SIZE + len(self._lines)
+
+    def _get_tag_id(self, tags):
+        tags = tuple(tags) if tags else None
+        tag_id = self._tag_ids.get(tags)
+        if tag_id is None:
+            tag_id = len(self._tags)
+            self._tags.append(tags)
+            self._tag_ids[tags] = tag_id
+        return tag_id
+
+    def extend(self, chunks):
+        '''chunks: iterable of (text, tags) pairs. text may contain several lines.
+           returns the number of lines which have been removed from the beginning.'''
+        for text, tags in chunks:
+            tag_id = self._get_tag_id(tags)
+            for ln, end in self.split_lines(text):
+                if self._overwrite:
+                    self._lines[-1] = ln
+                    self._line_tags[-1] = tag_id
+                else:
+                    # a block is frozen when the next line arrives because it's last line may still be overwritten
+                    if len(self._lines) >= self.BLOCK_SIZE:
+                        self._freeze()
+                    self._lines.append(ln)
+                    self._line_tags.append(tag_id)
+                self._overwrite = end == '\r'
+        return self._trim()
+
+    def _freeze(self):
+        offsets = array.array('L', [0])
+        pos = 0
+        for ln in self._lines:
+            pos += len(ln) + 1
+            offsets.append(pos)
+        self._blocks.append(('\n'.join(self._lines), offsets, self._line_tags))
+        self._lines = list()
+        self._line_tags = array.array('H')
+
+    def _trim(self):
+        if not self.max_lines:
+            return 0
+        number_blocks = (len(self) - self.max_lines) // self.BLOCK_SIZE
+        if number_blocks <= 0:
+            return 0
+        del self._blocks[:number_blocks]
+        return number_blocks * self.BLOCK_SIZE
+
+    def get(self, i):
+        '''return (line, tags) of the i-th line'''
+        b, j = divmod(i, self.BLOCK_SIZE)
+        if b < len(self._blocks):
+            text, offsets, tag_ids = self._blocks[b]
+            return text[offsets[j]:offsets[j+1]-1], self._tags[tag_ids[j]]
+        return self._lines[j], self._tags[self._line_tags[j]]
+
+    def get_runs(self, start, stop):
+        '''return lines start to stop as list of (text, tags) pairs with one pair per group of consecutive lines with equal tags'''
+        return group_runs((ln + '\n', tags) for ln, tags in (self.get(i) for i in range(start, min(stop, len(self)))))
+
+    def write_to(self, f):
+        for text, offsets, tag_ids in self._blocks:
+            f.write(text)
+            f.write('\n')
+        for ln in self._lines:
+            f.write(ln)
+            f.write('\n')
+
+
+class VirtualLog(ScrolledText):
+
+    '''A read only log view for a huge number of lines.
+
+    All lines are kept in a LineStore, only the lines which fit into the
+    visible area are inserted into the text widget. Therefore appending,
+    rendering and scrolling take the same time for a thousand or for millions of lines.
+    wrap defaults to NONE because every row is assumed to be one line of the store.'''
+
+    SCROLL_UNITS_WHEEL = 3
+
+    def __init__(self, master=None, **kwargs):
+        self.frame_ver = tkText.Frame(master)
+        self.store = LineStore(max_lines=kwargs.pop('max_lines', None))
+        kwargs.setdefault('wrap', tk.NONE)
+        ScrolledText.__init__(self, self.frame_ver, **kwargs)
+        self.configure(yscrollcommand=lambda y0, y1: None)
+        self.vbar.configure(command=self._on_scrollbar)
+        self.pack(expand=True, fill=tk.BOTH)
+        self.checkbox_auto_scroll = Checkbutton(self.frame_ver, value=True, text="scroll automatically to end", command=self.render) #TODO: settings
+        self.checkbox_auto_scroll.pack(side=tk.BOTTOM, anchor=tk.W)
+
+        self._top = 0
+        self._render_pending = False
+        self._linespace = tkFont.Font(self, font=self.cget('font')).metrics('linespace')
+        self.bind('<Configure>', lambda event: self.render_later())
+        self.bind('<MouseWheel>', lambda event: self.scroll(-self.SCROLL_UNITS_WHEEL if event.delta > 0 else self.SCROLL_UNITS_WHEEL))
+        self.bind('<Button-4>', lambda event: self.scroll(-self.SCROLL_UNITS_WHEEL))
+        self.bind('<Button-5>', lambda event: self.scroll(self.SCROLL_UNITS_WHEEL))
+
+        # see AutoScrolledText
+        text_meths = vars(tkText.Text).keys()
+        methods = tuple(vars(tkText.Pack).keys()) + tuple(vars(tkText.Grid).keys()) + tuple(vars(tkText.Place).keys())
+        methods = set(methods).difference(text_meths)
+
+        for m in methods:
+            if m[0] != '_' and m != 'config' and m != 'configure':
+                setattr(self, m, getattr(self.frame_ver, m))
+
+    def auto_scroll(self, value=None):
+        if value==None:
+            return self.checkbox_auto_scroll.get_value()
+        else:
+            self.checkbox_auto_scroll.set_value(value)
+
+    def append_runs(self, runs):
+        '''add a list of (chars, tags) pairs. The view is redrawn once the event loop is idle.'''
+        self._top -= self.store.extend(runs)
+        self.render_later()
+
+    def clear(self):
+        self.store.clear()
+        self._top = 0
+        self.render()
+
+    def get_visible_rows(self):
+        return max(1, self.winfo_height() // self._linespace)
+
+    def render_later(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self.render)
+
+    def render(self):
+        self._render_pending = False
+        n = len(self.store)
+        rows = self.get_visible_rows()
+        if self.auto_scroll():
+            self._top = max(0, n - rows)
+        else:
+            self._top = max(0, min(self._top, n - rows))
+        args = list()
+        for chars, tags in self.store.get_runs(self._top, self._top + rows):
+            args.append(chars)
+            args.append(tags if tags else ())
+        self.delete('1.0', tk.END)
+        if args:
+            self.insert('1.0', *args)
+        if n > 0:
+            self.vbar.set(self._top / float(n), min(1., (self._top + rows) / float(n)))
+        else:
+            self.vbar.set(0, 1)
+
+    def scroll(self, lines):
+        self.scroll_to(self._top + lines)
+        return RETURN_CODE_BREAK
+
+    def scroll_to(self, top):
+        n = len(self.store)
+        rows = self.get_visible_rows()
+        self._top = max(0, min(top, n - rows))
+        # auto_scroll triggers render
+        is_at_end = self._top >= n - rows
+        if self.auto_scroll() != is_at_end:
+            self.auto_scroll(is_at_end)
+        else:
+            self.render()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == tk.MOVETO:
+            self.scroll_to(int(float(value) * len(self.store)))
+        elif unit == tk.PAGES:
+            self.scroll(int(value) * self.get_visible_rows())
+        else:
+            self.scroll(int(value))
+
+
 class Indentation(tk.Label):
     WIDTH_INDENTATION_LEVEL = 3
     def __init__(self, master=None, **kw):
@@ -925,16 +1165,23 @@ class Menu(tk.Menu):
 
     tearoff = False
 
+    # a function filling this menu, see add_named_cascade
+    _populate = None
+
     def __init__(self, master=None, **kw):
         if tkc.KEY_TEAROFF not in kw:
             kw[tkc.KEY_TEAROFF] = self.tearoff
         tk.Menu.__init__(self, master, kw)
 
+    # if label is not given the name is used until relabel is called
+
     def add_named_command(self, name, **kw):
+        kw.setdefault('label', name)
         setattr(self, self._PREFIX_INDEX+name, kw['label'])
         self.add_command(**kw)
 
     def add_named_checkbutton(self, name, **kw):
+        kw.setdefault('label', name)
         if 'variable' in kw:
             var = kw['variable']
         else:
@@ -952,10 +1199,17 @@ class Menu(tk.Menu):
         var.set(value)
 
     def add_named_cascade(self, name, **kw):
+        '''populate: a function taking the new menu as argument which adds the entries.
+           it is called when the menu is opened or invoked for the first time.'''
+        kw.setdefault('label', name)
         menu = kw.pop(tkc.KEY_MENU, None)
         if menu==None:
             tearoff = kw.pop(tkc.KEY_TEAROFF, self.tearoff)
             menu = Menu(self, tearoff=tearoff)
+        populate = kw.pop('populate', None)
+        if populate is not None:
+            menu._populate = populate
+            menu.configure(postcommand=menu.populate)
         kw[tkc.KEY_MENU] = menu
         visible = bool(kw.pop('visible', True))
         menu.label = kw['label']
@@ -966,6 +1220,28 @@ class Menu(tk.Menu):
         menu._visible = visible
         return menu
 
+    def populate(self):
+        '''add the entries of a menu created with add_named_cascade(populate=...) if that has not happened yet'''
+        populate = self._populate
+        if populate is None:
+            return
+        self._populate = None
+        self.configure(postcommand='')
+        populate(self)
+
+    def is_populated(self):
+        return self._populate is None
+
+    def relabel(self, name, label):
+        '''change the label of an entry or a cascade added with add_named_*'''
+        attr = self._PREFIX_INDEX+name
+        menu = getattr(self, self._PREFIX_MENU+name, None)
+        if menu is None or menu._visible:
+            self.entryconfig(getattr(self, attr), label=label)
+        if menu is not None:
+            menu.label = label
+        setattr(self, attr, label)
+
     def set_cascade_visibility(self, menu, visible):
         visible = bool(visible)
         if visible == menu._visible:
@@ -1012,6 +1288,7 @@ class Menu(tk.Menu):
         return names
 
     def invoke(self, btn):
+        self.populate()
         i = self.to_index(btn)
         tk.Menu.invoke(self, i)
 
@@ -1140,6 +1417,64 @@ class CursorManager(object):
         return self._is_cursor_changed
 
 
+class Waker(object):
+
+    '''Calls callback in the Tk thread after notify has been called from any other thread.
+
+    The Tk event loop watches the read end of a pipe with createfilehandler
+    so nothing needs to be polled. Several calls to notify before the callback
+    is executed are coalesced into one call. createfilehandler is a method of
+    the Tcl interpreter (widget.tk) and is available on Unix only, check
+    is_supported before creating an instance.'''
+
+    @staticmethod
+    def is_supported(widget):
+        return os.name == 'posix' and hasattr(widget.tk, 'createfilehandler')
+
+    def __init__(self, widget, callback):
+        self.widget = widget
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._is_pending = False
+        self._is_running = False
+        self._call_again = False
+        self._fd_read, self._fd_write = os.pipe()
+        widget.tk.createfilehandler(self._fd_read, tk.READABLE, self._on_readable)
+
+    def notify(self):
+        with self._lock:
+            if self._is_pending or self._fd_write is None:
+                return
+            self._is_pending = True
+            os.write(self._fd_write, b'x')
+
+    def _on_readable(self, fd, mask):
+        os.read(fd, 1024)
+        with self._lock:
+            self._is_pending = False
+        if self._is_running:
+            # callback has called update and is not finished yet
+            self._call_again = True
+            return
+        self._is_running = True
+        try:
+            self._call_again = True
+            while self._call_again and self._fd_write is not None:
+                self._call_again = False
+                self.callback()
+        finally:
+            self._is_running = False
+
+    def close(self):
+        with self._lock:
+            if self._fd_write is None:
+                return
+            self.widget.tk.deletefilehandler(self._fd_read)
+            os.close(self._fd_read)
+            os.close(self._fd_write)
+            self._fd_write = None
+
+
 # ========== test ==========
 
 if __name__=='__main__':